@@ -0,0 +1,115 @@
+"""Correspondance entre les caractères de la sortie et ceux du texte source."""
+from array import array
+
+
+def align_replacement(old, new):
+    """Pour chaque caractère de `new`, l'index du caractère de `old` dont il provient.
+
+    Le préfixe et le suffixe communs se correspondent position par position ;
+    au milieu, un caractère présent dans `old` est rattaché à cet endroit
+    (permutations, suppressions) et les autres au premier caractère modifié.
+    """
+    if not old:
+        return [0] * len(new)
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    middle = old[prefix:len(old) - suffix]
+    changed = min(prefix, len(old) - 1)
+    indexes = list(range(prefix))
+    used = set()
+    for char in new[prefix:len(new) - suffix]:
+        position = middle.find(char)
+        while position >= 0 and position in used:
+            position = middle.find(char, position + 1)
+        if position >= 0:
+            used.add(position)
+            indexes.append(prefix + position)
+        else:
+            indexes.append(changed)
+    indexes.extend(range(len(old) - suffix, len(old)))
+    return indexes
+
+
+def sub_aligned(pattern, replace, text, offsets, align=align_replacement):
+    """Comme pattern.sub(replace, text), en suivant la liste `offsets`
+    (un index source par caractère de `text`).
+
+    `align(ancien, nouveau)` donne l'origine de chaque caractère remplacé,
+    voir align_replacement.
+    """
+    parts = []
+    new_offsets = []
+    last = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        replacement = replace(match)
+        parts.append(text[last:start])
+        parts.append(replacement)
+        new_offsets.extend(offsets[last:start])
+        if start == end:
+            new_offsets.extend([offsets[min(start, len(offsets) - 1)]] * len(replacement))
+        else:
+            new_offsets.extend(offsets[start + j] for j in align(match.group(0), replacement))
+        last = end
+    if not parts:
+        return text, offsets
+    parts.append(text[last:])
+    new_offsets.extend(offsets[last:])
+    return "".join(parts), new_offsets
+
+
+class Alignment:
+    """Table de correspondance sortie <-> source, sur deux array('I').
+
+    ``source[j]`` est l'index dans le texte source du caractère qui a produit
+    ``output_text[j]`` ; ``output[i]`` est l'index du premier caractère de la
+    sortie produit par ``source_text[i]`` ou, s'il n'a rien produit, par un
+    caractère suivant (``output[len(source_text)]`` vaut la longueur de la
+    sortie).
+    """
+
+    __slots__ = ("source", "output", "_first", "_ends")
+
+    def __init__(self, source_offsets, source_length):
+        self.source = array("I", source_offsets)
+        missing = len(self.source)
+        # index inverse : première position de sortie de chaque caractère
+        # source (`missing` s'il n'a rien produit) et fin de sa dernière
+        # position (0 s'il n'a rien produit)
+        first = array("I", [missing]) * (source_length + 1)
+        ends = array("I", [0]) * (source_length + 1)
+        for position in range(len(self.source) - 1, -1, -1):
+            first[self.source[position]] = position
+        for position, index in enumerate(self.source):
+            ends[index] = position + 1
+        output = array("I", first)
+        for index in range(source_length - 1, -1, -1):
+            if output[index] == missing:
+                output[index] = output[index + 1]
+        self.output = output
+        self._first = first
+        self._ends = ends
+
+    def __len__(self):
+        return len(self.source)
+
+    def output_span(self, start, end):
+        """(début, fin) de la sortie produite par source_text[start:end], en
+        O(end - start) grâce à l'index inverse"""
+        last = max(self._ends[start:end], default=0)
+        if not last:
+            return self.output[start], self.output[start]
+        return min(self._first[start:end]), last
+
+    def source_span(self, start, end):
+        """(début, fin) du texte source qui a produit output_text[start:end]"""
+        indexes = self.source[start:end]
+        if not indexes:
+            index = self.source[start] if start < len(self.source) else len(self.output) - 1
+            return index, index
+        return min(indexes), max(indexes) + 1
@@ -64,9 +64,32 @@ EMPTY_CENTRE_LOW_STOP = chr(0x06EA)
 EMPTY_CENTRE_HIGH_STOP = chr(0x06EB)
 ROUNDED_HIGH_STOP_WITH_FILLED_CENTRE = chr(0x06EC)
 SMALL_LOW_MEEM = chr(0x06ED)
-VOWELS = [FATHA, DAMMA, KASRA]
-TANWIN = [FATHATAN, DAMMATAN, KASRATAN]
-HAMZAS = [HAMZA, ALIF_WITH_HAMZA_ABOVE, ALIF_WITH_HAMZA_BELOW]
+VOWELS = frozenset((FATHA, DAMMA, KASRA))
+TANWIN = frozenset((FATHATAN, DAMMATAN, KASRATAN))
+HAMZAS = frozenset((HAMZA, ALIF_WITH_HAMZA_ABOVE, ALIF_WITH_HAMZA_BELOW))
+HAMZA_CARRIERS = frozenset((
+    HAMZA, ALIF_WITH_HAMZA_ABOVE, ALIF_WITH_HAMZA_BELOW, WAW_WITH_HAMZA_ABOVE,
+    YA_WITH_HAMZA_ABOVE, ALIF_WITH_MADDA_ABOVE,
+))
+SUN_LETTERS = frozenset((
+    TA, THA, DAL, THAL, RA, ZAY, SEEN, SHEEN, SAD, DAD, TAH, ZAH, LAM, NOON,
+))
+QURANIC_MARKS = frozenset((
+    MADDAH, HAMZAABOVE, ALIF_KHANJAREEYA, SMALL_HIGH_SEEN, SMALL_HIGH_ROUNDED_ZERO,
+    SMALL_HIGH_UPRIGHT_RECTANGULAR_ZERO_, SMALL_HIGH_MEEM_ISOLATED_FORM,
+    SMALL_LOW_SEEN, SMALL_WAW, SMALL_YA, SMALL_HIGH_NOON, EMPTY_CENTRE_LOW_STOP,
+    EMPTY_CENTRE_HIGH_STOP, ROUNDED_HIGH_STOP_WITH_FILLED_CENTRE, SMALL_LOW_MEEM,
+))
+DIGITS = frozenset("0123456789٠١٢٣٤٥٦٧٨٩")
+# Ponctuation conservée par défaut (chiffres et symboles islamiques compris)
+PUNCTUATION = (
+    '،', '؟', '!', '.', ':', ';', '(', ')', '[', ']', '{', '}', '"', "'", '؛',
+    ',', '?', '-', '_', '/', '\\', '«', '»', '*', '&', '%', '$', '#', '@',
+    '+', '=', '<', '>', '|', '~', '^', '٠', '١', '٢', '٣', '٤', '٥', '٦', '٧', '٨', '٩',
+    '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
+    # Symboles islamiques spéciaux
+    'ﷺ', 'ﷻ', 'ﷲ', '﷽', '﴿', '﴾'
+)
 # WOLOFAL CARACTERS
 PEH = chr(0x0752)
 CEH = chr(0x0756)
@@ -74,3 +97,57 @@ GNEH = chr(0x0767)
 GAF = chr(0x06AF)
 EH = chr(0x08FA)
 OH = chr(0x08F7)
+
+
+# Table des classes, indexée par point de code. Chaque entrée combine les
+# drapeaux ci-dessous ; les caractères au-delà de la table n'ont aucune classe
+# (sauf la ponctuation, voir char_class).
+CONSONANT = 1
+SHORT_VOWEL = 2
+TANWIN_MARK = 4
+HAMZA_CARRIER = 8
+SUN_LETTER = 16
+PUNCTUATION_MARK = 32
+DIGIT = 64
+QURANIC_MARK = 128
+
+# Couvre l'ASCII et les blocs arabes jusqu'aux lettres du wolofal
+_TABLE_SIZE = 0x0900
+
+
+def _build_class_table():
+    table = bytearray(_TABLE_SIZE)
+    consonants = [chr(c) for c in range(0x0621, 0x064B)]
+    # chr(0x067E) : le peh persan, PEH désignant ici celui du wolofal
+    consonants += [ALIF_WITH_HAMZAT_WASL, chr(0x067E), TCHEH, VEH, GAF,
+                   PEH, CEH, GNEH, EH, OH]
+    for flag, chars in (
+        (CONSONANT, consonants),
+        (SHORT_VOWEL, VOWELS),
+        (TANWIN_MARK, TANWIN),
+        (HAMZA_CARRIER, HAMZA_CARRIERS),
+        (SUN_LETTER, SUN_LETTERS),
+        (PUNCTUATION_MARK, set(PUNCTUATION) - DIGITS),
+        (DIGIT, DIGITS),
+        (QURANIC_MARK, QURANIC_MARKS),
+    ):
+        for char in chars:
+            if ord(char) < _TABLE_SIZE:
+                table[ord(char)] |= flag
+    # le tatweel n'est qu'un trait d'allongement ; l'alif et l'alif maksura
+    # portent la voyelle longue, le ta marbuta a sa propre règle
+    for char in (TATWEEL, ALIF, ALIF_MAKSURA, TA_MARBUTA):
+        table[ord(char)] &= ~CONSONANT
+    return bytes(table)
+
+
+CHAR_CLASSES = _build_class_table()
+_WIDE_PUNCTUATION = frozenset(c for c in PUNCTUATION if ord(c) >= _TABLE_SIZE)
+
+
+def char_class(char):
+    """Drapeaux de classe de `char` (0 si le caractère n'est pas classé)"""
+    code = ord(char)
+    if code < _TABLE_SIZE:
+        return CHAR_CLASSES[code]
+    return PUNCTUATION_MARK if char in _WIDE_PUNCTUATION else 0
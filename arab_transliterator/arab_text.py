@@ -1,61 +1,63 @@
 from . import alphabet
-from ._types import LinkedQueue
 
 
-class ArabicText(LinkedQueue):
+class ArabicText:
     class ArabicTextChar:
-        def __init__(self, parent, node):
-            self._node = node
+        __slots__ = ("_parent", "index")
+
+        def __init__(self, parent, index):
             self._parent = parent
-            # Ajouter un attribut index pour faciliter le lookahead
-            self.index = parent._find_index(node)
+            # position du caractère dans le texte, tous les lookarounds en dérivent
+            self.index = index
 
         def char(self):
-            return self._node._ele
+            return self._parent._chars[self.index]
 
         def __eq__(self, other):
-            return self.char() == other
+            return self._parent._chars[self.index] == other
+
+        __hash__ = None
 
         def __str__(self):
-            return self.char()
+            return self._parent._chars[self.index]
 
         def next(self, val=None):
             if not val:
-                return self._parent.after(self)
-            ele = self
-            while val != 0 and ele.next():
-                ele = ele.next()
-                val -= 1
-            return ele
+                return self._parent._make_position(self.index + 1)
+            # comme l'ancien parcours, on s'arrête sur le dernier caractère
+            return self._parent._make_position(
+                min(self.index + val, len(self._parent) - 1)
+            )
 
         def prev(self, val=None):
             if not val:
-                return self._parent.before(self)
-            ele = self
-            while val != 0 and ele.prev():
-                ele = ele.prev()
-                val -= 1
-            return ele
-            
+                return self._parent._make_position(self.index - 1)
+            return self._parent._make_position(max(self.index - val, 0))
+
         def get_lookahead(self, offset=1):
             """Retourne le caractère à la position offset sans avancer le curseur"""
             if offset <= 0:
                 return self.char()
-            
-            # Utiliser la méthode next() pour obtenir le caractère à la position offset
-            lookahead = self
-            for _ in range(offset):
-                lookahead = lookahead.next()
-                if lookahead is None:
-                    return None
-            
-            return lookahead.char()
+            return self._parent.char_at(self.index + offset)
+
+        def char_class(self):
+            """Drapeaux de alphabet.CHAR_CLASSES pour ce caractère"""
+            return alphabet.char_class(self._parent._chars[self.index])
+
+        def is_vowel(self):
+            return bool(self.char_class() & alphabet.SHORT_VOWEL)
+
+        def is_tanwin(self):
+            return bool(self.char_class() & alphabet.TANWIN_MARK)
+
+        def is_sun_letter(self):
+            return bool(self.char_class() & alphabet.SUN_LETTER)
 
         def is_blank(self):
             return self == " "
 
         def is_start(self):
-            return self._node is self._parent._head
+            return self.index == 0
 
         def is_mid(self):
             try:
@@ -64,39 +66,27 @@ class ArabicText(LinkedQueue):
                 return False
 
         def is_end(self):
-            return self._node is self._parent._tail
+            return self.index == len(self._parent) - 1
 
         def is_word_start(self):
-            return self.prev() == " " or (not self.prev())
+            return self.index == 0 or self._parent._chars[self.index - 1] == " "
 
         def is_phrase_start(self):
-            return (not self.prev()) or (not self.prev().prev()) or self.prev().prev() == " "
-        
-        
+            return self.index < 2 or self._parent._chars[self.index - 2] == " "
+
         def preceeded(self, n):
-            out = ""
-            ele = self
-            while n != 0 and ele.prev():
-                out += ele.prev().char()
-                ele = ele.prev()
-                n -= 1
-            return out
+            start = max(self.index - n, 0)
+            return self._parent._chars[start:self.index][::-1]
 
         def succeeded(self, n):
-            out = ""
-            ele = self
-            while n != 0 and ele.next():
-                out += ele.next().char()
-                ele = ele.next()
-                n -= 1
-            return out
+            return self._parent._chars[self.index + 1:self.index + 1 + n]
 
         def is_sun(self):
             c = self.next()
             if not c:
                 return False
             if c.is_followed_by_shadda():
-                return self.next().char()
+                return c.char()
             return False
 
         def is_followed_by_sun(self):
@@ -106,60 +96,67 @@ class ArabicText(LinkedQueue):
             return False
 
         def is_followed_by_shadda(self):
-            return self.next() == alphabet.SHADDA
+            return self._parent.char_at(self.index + 1) == alphabet.SHADDA
 
         def is_fatha_followed_by_alif(self):
-            try:
-                return self == alphabet.FATHA and self.next().is_alif()
-            except Exception:
-                return False
+            return self == alphabet.FATHA and self._parent.char_at(self.index + 1) == alphabet.ALIF
 
         def is_kasra_followed_by_ya(self):
-            return self == alphabet.KASRA and self.next() == alphabet.YA
+            return self == alphabet.KASRA and self._parent.char_at(self.index + 1) == alphabet.YA
 
         def is_damma_followed_by_waw(self):
-            return self == alphabet.DAMMA and self.next() == alphabet.WAW
+            return self == alphabet.DAMMA and self._parent.char_at(self.index + 1) == alphabet.WAW
 
     def __init__(self, text):
-        super().__init__()
-        for c in text:
-            self.enqueue(c)
+        # le texte est gardé d'un seul bloc, les positions ne sont que des index
+        self._chars = text if isinstance(text, str) else "".join(text)
         self.cursor = None
         self._state_stack = []  # Pour sauvegarder et restaurer l'état
+        self._masks = None
+
+    def __len__(self):
+        return len(self._chars)
+
+    def is_empty(self):
+        return not self._chars
 
-    def _find_index(self, node):
-        """Trouve l'index d'un nœud dans la file"""
-        if node is None:
-            return -1
-        
-        current = self._head
-        index = 0
-        while current is not None:
-            if current == node:
-                return index
-            current = current._next
-            index += 1
-        return -1
-
-    def _make_position(self, node):
-        if node is None:
+    def masks(self):
+        """Prédicats de ArabicTextChar pour tout le texte, en masques
+        booléens (voir masks.classify), calculés au premier appel"""
+        if self._masks is None:
+            from .masks import classify
+
+            self._masks = classify(self._chars)
+        return self._masks
+
+    def char_at(self, index):
+        """Retourne le caractère à l'index donné, ou None hors du texte"""
+        if 0 <= index < len(self._chars):
+            return self._chars[index]
+        return None
+
+    def _make_position(self, index):
+        if not 0 <= index < len(self._chars):
             return None
-        return self.ArabicTextChar(self, node)
+        return self.ArabicTextChar(self, index)
 
     def first(self):
-        return self._make_position(self._head)
+        return self._make_position(0)
+
+    def last(self):
+        return self._make_position(len(self._chars) - 1)
 
     def after(self, p):
-        return self._make_position(p._node._next)
+        return self._make_position(p.index + 1)
 
     def before(self, p):
-        return self._make_position(p._node._prev)
+        return self._make_position(p.index - 1)
 
     def get_state(self):
         """Retourne l'état actuel de l'itérateur"""
         if self.cursor is None:
             return None
-        return self.cursor._node
+        return self.cursor.index
 
     def set_state(self, state):
         """Restaure l'état de l'itérateur"""
@@ -170,8 +167,8 @@ class ArabicText(LinkedQueue):
         return self.cursor
 
     def __iter__(self):
-        cursor = self.first()
-        while cursor is not None:
+        make_position = self.ArabicTextChar
+        for index in range(len(self._chars)):
+            cursor = make_position(self, index)
             self.cursor = cursor
             yield cursor
-            cursor = self.after(cursor)
@@ -0,0 +1,93 @@
+"""Cache LRU des mots translittérés par la passe principale."""
+from collections import OrderedDict
+
+from .rules import apply_rules, word_context
+
+
+class WordCache:
+    """Mémorise la sortie de la passe principale mot par mot.
+
+    La clé contient le schéma, le mot et tout ce que les règles lisent autour
+    de lui : son contexte (rules.word_context), l'état after_tanwin et les
+    deux dernières entrées de la sortie, que regarde la règle du shadda. La valeur
+    est la liste des entrées ajoutées à la sortie et l'état after_tanwin
+    final. Le résultat est donc identique à celui de la passe sans cache.
+    """
+
+    def __init__(self, maxsize=4096):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def info(self):
+        """Compteurs du cache sous forme de dictionnaire"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _put(self, key, value):
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def apply(self, translator, text, dispatch, out):
+        """Équivalent de apply_rules sur tout le texte, en servant les mots connus"""
+        entries = self._entries
+        n = len(text)
+        i = 0
+        after_tanwin = False
+        while i < n:
+            # Les espaces en trop, et la suite d'un mot qu'une règle a entamé
+            # au-delà d'un espace, passent directement par les règles
+            if text[i] == " " or (i and text[i - 1] != " "):
+                i, after_tanwin = apply_rules(translator, text, i, i + 1, dispatch, out, after_tanwin)
+                continue
+
+            # Le mot est mémorisé avec l'espace qui le suit
+            end = text.find(" ", i)
+            if end < 0:
+                end = n
+            stop = min(end + 1, n)
+            size = len(out)
+            key = (
+                translator._active,
+                text[i:stop],
+                *word_context(text, i, end),
+                after_tanwin,
+                size >= 1 and out[-1] == "l-",
+                size >= 2 and out[-2] == "l-",
+                size >= 2,
+            )
+            cached = entries.get(key)
+            if cached is not None:
+                entries.move_to_end(key)
+                self.hits += 1
+                out.extend(cached[0])
+                after_tanwin = cached[1]
+                i = stop
+                continue
+
+            self.misses += 1
+            last = out[-1] if out else None
+            i, after_tanwin = apply_rules(translator, text, i, stop, dispatch, out, after_tanwin)
+            # Ne mémoriser que les mots traités sans déborder ni réécrire la
+            # sortie du mot précédent
+            if i == stop and (not size or out[size - 1] is last):
+                self._put(key, (tuple(out[size:]), after_tanwin))
@@ -0,0 +1,213 @@
+"""Translittération d'une colonne de table : Parquet (pyarrow) ou CSV.
+
+    python -m arab_transliterator.dataset versets.parquet sortie.parquet --column text [-j jobs]
+
+La colonne `column` est lue par lots (record batches pour Parquet, paquets de
+lignes pour CSV), translittérée par translate_many et écrite dans une
+nouvelle colonne (`output_column`, par défaut ``<column>_latin``) à côté des
+colonnes d'origine ; la table n'est jamais chargée en entier. Avec `jobs`
+différent de 1, les groupes de lignes (row groups) d'un fichier Parquet, ou
+les paquets de lignes d'un CSV, sont répartis sur des processus.
+
+pyarrow est une dépendance optionnelle (``pip install arab_transliterator[arrow]``),
+nécessaire seulement pour Parquet ; le CSV passe par le module csv.
+
+Chaque fonction retourne ``{"rows": ..., "seconds": ..., "rows_per_second": ...}``.
+"""
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import os
+import sys
+import time
+
+from . import parallel
+from .transliterator import ArabTransliterator
+
+# Lignes par lot lu, puis envoyé à translate_many (ou à un processus)
+DEFAULT_BATCH_SIZE = 1 << 14
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Parquet needs pyarrow: pip install arab_transliterator[arrow] (CSV works without it)"
+        ) from None
+    return pyarrow, pyarrow.parquet
+
+
+def _report(rows, start):
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+
+
+def translate_values(translator, values, scheme=None):
+    """translate_many sur une colonne ; les valeurs nulles (None) le restent"""
+    results = translator.translate_many(
+        ("" if value is None else value for value in values), chunksize=max(len(values), 1), scheme=scheme
+    )
+    return [None if value is None else result for value, result in zip(values, results)]
+
+
+def _with_column(pa, batch, name, values):
+    """Table du lot `batch` avec la colonne `name` ajoutée ou remplacée"""
+    table = pa.Table.from_batches([batch]) if isinstance(batch, pa.RecordBatch) else batch
+    array = pa.array(values, type=pa.string())
+    index = table.schema.get_field_index(name)
+    if index >= 0:
+        return table.set_column(index, pa.field(name, pa.string()), array)
+    return table.append_column(name, array)
+
+
+def transliterate_batches(batches, column, output_column=None, translator=None, scheme=None):
+    """Pour chaque pyarrow.RecordBatch de `batches`, une pyarrow.Table avec la
+    colonne translittérée en plus ; un lot à la fois.
+
+    ValueError si un lot n'a pas de colonne `column`.
+    """
+    pa, _ = _require_pyarrow()
+    translator = translator or ArabTransliterator()
+    output_column = output_column or f"{column}_latin"
+    for batch in batches:
+        # get_field_index rend -1 pour une colonne absente, soit la dernière
+        index = batch.schema.get_field_index(column)
+        if index < 0:
+            raise ValueError(f"no column {column!r} in batch schema {batch.schema.names}")
+        values = batch.column(index).to_pylist()
+        yield _with_column(pa, batch, output_column, translate_values(translator, values, scheme))
+
+
+def _translate_row_group(path, index, column, scheme):
+    # dans un processus de travail : ne lit que la colonne à translittérer
+    _, pq = _require_pyarrow()
+    values = pq.ParquetFile(path).read_row_group(index, columns=[column]).column(column).to_pylist()
+    return translate_values(parallel._translator, values, scheme)
+
+
+def transliterate_parquet(source, destination, column, output_column=None, jobs=1,
+                          batch_size=DEFAULT_BATCH_SIZE, scheme=None):
+    """Copie le fichier Parquet `source` dans `destination` avec la colonne
+    `column` translittérée dans `output_column`.
+
+    Avec `jobs` différent de 1 (0 ou None : tous les cœurs), chaque row group
+    est translittéré par un processus ; au plus deux row groups par processus
+    sont en mémoire à la fois.
+    """
+    pa, pq = _require_pyarrow()
+    output_column = output_column or f"{column}_latin"
+    start = time.perf_counter()
+    source_file = pq.ParquetFile(source)
+    schema = source_file.schema_arrow
+    if schema.get_field_index(column) < 0:
+        raise ValueError(f"no column {column!r} in {source}")
+    # une colonne de sortie déjà présente, de n'importe quel type, devient
+    # une colonne de texte, comme celle que _with_column écrit
+    output_field = pa.field(output_column, pa.string())
+    output_index = schema.get_field_index(output_column)
+    if output_index < 0:
+        schema = schema.append(output_field)
+    else:
+        schema = schema.set(output_index, output_field)
+    rows = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        if jobs == 1:
+            batches = source_file.iter_batches(batch_size=batch_size)
+            for table in transliterate_batches(batches, column, output_column, scheme=scheme):
+                writer.write_table(table)
+                rows += table.num_rows
+            return _report(rows, start)
+
+        jobs = jobs or os.cpu_count() or 1
+        groups = iter(range(source_file.num_row_groups))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=parallel._init_worker) as executor:
+            pending = deque()
+            while True:
+                while len(pending) < 2 * jobs:
+                    index = next(groups, None)
+                    if index is None:
+                        break
+                    pending.append((index, executor.submit(_translate_row_group, source, index, column, scheme)))
+                if not pending:
+                    break
+                index, future = pending.popleft()
+                table = _with_column(pa, source_file.read_row_group(index), output_column, future.result())
+                writer.write_table(table)
+                rows += table.num_rows
+    return _report(rows, start)
+
+
+def transliterate_csv(source, destination, column, output_column=None, jobs=1,
+                      batch_size=DEFAULT_BATCH_SIZE, scheme=None, delimiter=","):
+    """Comme transliterate_parquet pour un fichier CSV (UTF-8, avec une ligne
+    d'en-tête) ; la colonne ajoutée est la dernière. Les lignes sont lues et
+    écrites au fil de l'eau ; avec `jobs`, réparties par paquets de
+    `batch_size` lignes (parallel.translate_parallel)."""
+    output_column = output_column or f"{column}_latin"
+    start = time.perf_counter()
+    rows = 0
+    with open(source, newline="", encoding="utf-8") as infile, \
+            open(destination, "w", newline="", encoding="utf-8") as outfile:
+        reader = csv.reader(infile, delimiter=delimiter)
+        writer = csv.writer(outfile, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None or column not in header:
+            raise ValueError(f"no column {column!r} in {source}")
+        index = header.index(column)
+        output_index = header.index(output_column) if output_column in header else None
+        writer.writerow(header if output_index is not None else header + [output_column])
+        pending = deque()
+
+        def texts():
+            for row in reader:
+                pending.append(row)
+                yield row[index] if index < len(row) else ""
+
+        if jobs == 1:
+            results = ArabTransliterator().translate_many(texts(), chunksize=batch_size, scheme=scheme)
+        else:
+            results = parallel.translate_parallel(texts(), jobs=jobs, chunksize=batch_size, scheme=scheme)
+        for result in results:
+            row = pending.popleft()
+            if output_index is None:
+                row.append(result)
+            else:
+                # une ligne courte est complétée jusqu'à la colonne de sortie
+                row.extend([""] * (output_index + 1 - len(row)))
+                row[output_index] = result
+            writer.writerow(row)
+            rows += 1
+    return _report(rows, start)
+
+
+def transliterate_file(source, destination, column, **options):
+    """transliterate_parquet ou transliterate_csv, selon l'extension de `source`"""
+    if str(source).endswith(".parquet"):
+        return transliterate_parquet(source, destination, column, **options)
+    if str(source).endswith(".tsv"):
+        options.setdefault("delimiter", "\t")
+    return transliterate_csv(source, destination, column, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transliterate a column of a Parquet or CSV table")
+    parser.add_argument("source", help="Input table (.parquet, .csv or .tsv)")
+    parser.add_argument("destination", help="Output table, in the same format")
+    parser.add_argument("--column", required=True, help="Column holding the Arabic text")
+    parser.add_argument("--output-column", help="Column written with the transcription (default: <column>_latin)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of processes (0 for all cores)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per batch")
+    parser.add_argument("--scheme", help="Transliteration scheme (see scheme.available_schemes)")
+    args = parser.parse_args(argv)
+    report = transliterate_file(args.source, args.destination, args.column, output_column=args.output_column,
+                                jobs=args.jobs, batch_size=args.batch_size, scheme=args.scheme)
+    print(f"{report['rows']} rows in {report['seconds']:.2f} s ({report['rows_per_second']:.0f} rows/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Cache persistant des translittérations, partagé entre processus (sqlite).
+
+Chaque entrée associe une clé de 16 octets au texte translittéré. La clé est
+un hachage (blake2b) du texte normalisé (le texte brut pour un schéma du
+moteur ``table``, qui ne normalise pas) et de tout ce qui fixe la sortie :
+le schéma compilé (tous les attributs de compile_scheme qui fixent la
+sortie : modifier un fichier JSON de schéma change donc les clés), la
+ponctuation du translittérateur et la version des règles (rules_version(),
+un hachage du code de tous les modules de la passe de translate). Quand
+cette version change, les entrées déjà écrites ne sont plus jamais lues mais
+restent dans le fichier : deux versions déployées peuvent ainsi partager le
+même cache sans effacer les entrées de l'autre. Chaque entrée garde la
+version qui l'a écrite ; prune() retire celles des autres versions.
+
+La base est en mode WAL : plusieurs processus peuvent lire et écrire en
+même temps, chacun avec sa propre connexion (rouverte après un fork).
+"""
+from functools import lru_cache
+import hashlib
+import os
+import sqlite3
+
+# Au plus autant de paramètres par requête (limite des anciens sqlite : 999)
+_BATCH = 500
+
+
+# Modules dont le code détermine la sortie de translate, y compris par le
+# chemin vectorize (masks) ; lus sans être importés (masks importerait NumPy)
+_RULES_MODULES = ("alphabet", "mapping", "masks", "rules", "scheme", "transliterator")
+
+
+@lru_cache(maxsize=None)
+def rules_version():
+    """Hachage du code qui détermine la sortie de translate"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in _RULES_MODULES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.py"), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _config(translator, scheme):
+    """Octets qui décrivent `scheme` et la ponctuation de `translator`"""
+    parts = (
+        scheme.engine, sorted(scheme.letters.items()), sorted((scheme.output or {}).items()),
+        scheme.letter_class, scheme.double_shadda,
+        tuple(translator.punctuation), sorted(translator.punctuation_mapping.items()),
+    )
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).digest()
+
+
+class DiskCache:
+    """Cache persistant de ArabTransliterator (paramètre `disk_cache`).
+
+    `path` est le fichier sqlite, créé au besoin. Les compteurs ``hits``,
+    ``misses`` et ``writes`` sont propres au processus ; info() ajoute le
+    nombre d'entrées du fichier.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = os.fspath(path)
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._connection = None
+        self._pid = None
+        # identifiant de rules_version() dans la table versions du fichier
+        self._version = None
+        # préfixe de clé par (schéma, ponctuation, mapping de ponctuation)
+        self._prefixes = {}
+
+    def __repr__(self):
+        return f"DiskCache({self.path!r})"
+
+    def _connect(self):
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        # la connexion héritée d'un fork n'est jamais réutilisée
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations (key BLOB PRIMARY KEY, result TEXT NOT NULL, version INTEGER)"
+                " WITHOUT ROWID"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(translations)")]
+            if "version" not in columns:
+                # fichier d'avant les versions : ses entrées n'ont pas de version
+                connection.execute("ALTER TABLE translations ADD COLUMN version INTEGER")
+            connection.execute("CREATE TABLE IF NOT EXISTS versions (id INTEGER PRIMARY KEY, rules TEXT UNIQUE)")
+            connection.execute("INSERT OR IGNORE INTO versions (rules) VALUES (?)", (rules_version(),))
+            self._version = connection.execute(
+                "SELECT id FROM versions WHERE rules = ?", (rules_version(),)
+            ).fetchone()[0]
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            connection.close()
+            raise
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def keys(self, translator, texts):
+        """Clé de chaque texte (normalisé, sauf pour le moteur ``table``) pour le
+        schéma actif de `translator`"""
+        scheme = translator._active
+        lookup = (scheme, tuple(translator.punctuation), tuple(translator.punctuation_mapping.items()))
+        prefix = self._prefixes.get(lookup)
+        if prefix is None:
+            prefix = self._prefixes[lookup] = rules_version().encode("ascii") + _config(translator, scheme)
+        blake2b = hashlib.blake2b
+        return [blake2b(prefix + text.encode("utf-8", "surrogatepass"), digest_size=16).digest() for text in texts]
+
+    def get_many(self, keys):
+        """Résultat de chaque clé, ou None si elle n'est pas dans le cache"""
+        connection = self._connect()
+        found = {}
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            found.update(connection.execute(
+                f"SELECT key, result FROM translations WHERE key IN ({','.join('?' * len(batch))})", batch
+            ))
+        results = [found.get(key) for key in keys]
+        hits = len(keys) - results.count(None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return results
+
+    def put_many(self, pairs):
+        """Ajoute les couples (clé, résultat) ; une clé déjà présente est gardée"""
+        pairs = list(pairs)
+        if not pairs:
+            return
+        connection = self._connect()
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO translations VALUES (?, ?, ?)",
+                [(key, result, self._version) for key, result in pairs],
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self.writes += len(pairs)
+
+    def clear(self):
+        self._connect().execute("DELETE FROM translations")
+
+    def prune(self):
+        """Retire les entrées écrites par une autre version des règles ;
+        retourne leur nombre"""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            removed = connection.execute(
+                "DELETE FROM translations WHERE version IS NOT ?", (self._version,)
+            ).rowcount
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return removed
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def info(self):
+        """Compteurs du cache sous forme de dictionnaire, comme WordCache.info"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "size": len(self),
+            "path": self.path,
+            "rules_version": rules_version(),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
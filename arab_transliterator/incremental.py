@@ -0,0 +1,288 @@
+"""Document translittéré de façon incrémentale, pour les éditeurs.
+
+Le document est découpé en morceaux : chaque ligne, puis chaque ligne aux
+coupures sûres (rules.is_safe_split), c'est-à-dire après presque chaque
+espace. Chaque morceau, un mot le plus souvent, est translittéré seul ; une
+modification ne retranslittère que les morceaux qu'elle touche et leurs
+voisins immédiats. Les positions des morceaux, dans la source et dans la
+sortie, sont tenues par blocs (_Offsets) : une modification ne parcourt pas
+tout le document.
+"""
+from bisect import bisect_right
+from itertools import accumulate
+
+from .rules import is_safe_split
+from .transliterator import ArabTransliterator
+
+# Caractères de contexte lus par is_safe_split avant et après une coupure
+_LEFT_CONTEXT = 2
+_RIGHT_CONTEXT = 3
+
+
+def _split_line(context, begin, end):
+    """Coupures sûres de context[begin:end], en index relatifs à `begin`"""
+    cuts = []
+    k = context.find(" ", begin, end)
+    while k >= 0:
+        k += 1
+        if begin < k < end and is_safe_split(context, k):
+            cuts.append(k - begin)
+        k = context.find(" ", k, end)
+    return cuts
+
+
+class _Offsets:
+    """Longueurs d'une suite de morceaux, rangées par blocs d'au plus
+    2 * BLOCK avec la somme de chaque bloc : position d'un morceau, morceau
+    d'une position et remplacement de morceaux en O(n / BLOCK + BLOCK),
+    les sommes cumulées étant faites par accumulate et bisect."""
+
+    BLOCK = 512
+
+    def __init__(self, lengths=()):
+        lengths = list(lengths)
+        self._blocks = [lengths[i:i + self.BLOCK] for i in range(0, len(lengths), self.BLOCK)] or [[]]
+        self._sums = list(map(sum, self._blocks))
+
+    def total(self):
+        return sum(self._sums)
+
+    def _locate(self, index):
+        """(bloc, index dans le bloc) du morceau `index` ; index == len donne
+        la fin du dernier bloc"""
+        counts = list(accumulate(map(len, self._blocks)))
+        b = min(bisect_right(counts, index), len(counts) - 1)
+        return b, index - (counts[b - 1] if b else 0)
+
+    def start(self, index):
+        """Position du début du morceau `index` (la longueur totale pour index == len)"""
+        b, index = self._locate(index)
+        return sum(self._sums[:b]) + sum(self._blocks[b][:index])
+
+    def find(self, position):
+        """Index du dernier morceau qui commence avant ou à `position`"""
+        # le bloc est le dernier dont le début est avant ou à `position`
+        ends = list(accumulate(self._sums))
+        b = min(bisect_right(ends, position), len(ends) - 1)
+        block = self._blocks[b]
+        k = bisect_right(list(accumulate(block)), position - (ends[b - 1] if b else 0))
+        return sum(map(len, self._blocks[:b])) + min(k, len(block) - 1)
+
+    def splice(self, lo, hi, lengths):
+        """Remplace les longueurs des morceaux lo..hi-1 par `lengths`"""
+        first, i = self._locate(lo)
+        last, j = self._locate(hi)
+        blocks = self._blocks
+        merged = blocks[first][:i] + list(lengths) + blocks[last][j:]
+        size = self.BLOCK
+        if len(merged) > 2 * size:
+            parts = [merged[k:k + size] for k in range(0, len(merged), size)]
+        else:
+            parts = [merged] if merged or len(blocks) == last - first + 1 else []
+        blocks[first:last + 1] = parts
+        self._sums[first:last + 1] = map(sum, parts)
+
+
+class IncrementalTransliterator:
+    """Source et translittération d'un document, tenues à jour à chaque édition.
+
+    La sortie est celle de translate() appliqué à chaque ligne, les lignes
+    étant jointes par "\\n" (comme l'option -f en ligne de commande).
+    Les modifications (replace, insert, delete) retournent la partie de la
+    sortie qui a changé. Leur coût dépend de la taille de la modification et
+    des mots voisins, pas de celle du document (hormis la recherche des
+    morceaux dans les blocs de _Offsets).
+    """
+
+    def __init__(self, text="", translator=None):
+        self.translator = translator or ArabTransliterator()
+        self._sources = []
+        self._ends = []
+        self._outputs = []
+        self._rendered = []
+        # Longueur source de chaque morceau, retour à la ligne compris, et
+        # longueur de son rendu dans la sortie
+        self._source_offsets = _Offsets()
+        self._output_offsets = _Offsets()
+        # text et output, joints au premier accès après une modification
+        self._text = None
+        self._output = None
+        # Nombre de caractères source retranslittérés par la dernière modification
+        self.last_recomputed = 0
+        sources, ends = self._segment(text, "", "", False)
+        self._splice(0, 0, sources, ends)
+
+    def __len__(self):
+        return self._source_offsets.total()
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "".join(
+                source + "\n" if ends else source for source, ends in zip(self._sources, self._ends)
+            )
+        return self._text
+
+    @property
+    def output(self):
+        if self._output is None:
+            self._output = "".join(self._rendered)
+        return self._output
+
+    def _segment(self, text, left, right, ends_line):
+        """Découpe `text` en morceaux ; `left` et `right` sont le contexte de
+        la même ligne avant et après, `ends_line` dit si la dernière ligne de
+        `text` se termine par un retour à la ligne."""
+        lines = text.split("\n")
+        if ends_line:
+            # le dernier "\n" appartient au dernier morceau
+            lines.pop()
+        sources = []
+        ends = []
+        for index, line in enumerate(lines):
+            before = left if index == 0 else ""
+            after = right if index == len(lines) - 1 else ""
+            previous = 0
+            for cut in _split_line(before + line + after, len(before), len(before) + len(line)):
+                sources.append(line[previous:cut])
+                ends.append(False)
+                previous = cut
+            sources.append(line[previous:])
+            ends.append(index < len(lines) - 1 or ends_line)
+        return sources, ends
+
+    def _splice(self, lo, hi, sources, ends):
+        """Remplace les morceaux lo..hi-1 et retourne (début, fin, texte) de la
+        sortie modifiée, en positions de l'ancienne sortie."""
+        output_start = self._output_offsets.start(lo)
+        outputs = list(self.translator.translate_many(sources))
+        self.last_recomputed = sum(map(len, sources))
+        self._text = self._output = None
+
+        old = self._rendered[lo:hi]
+        self._sources[lo:hi] = sources
+        self._ends[lo:hi] = ends
+        self._source_offsets.splice(lo, hi, [len(source) + end for source, end in zip(sources, ends)])
+        self._outputs[lo:hi] = outputs
+        self._rendered[lo:hi] = [""] * len(outputs)
+
+        # un morceau est précédé d'une espace s'il suit, sur la même ligne, un
+        # morceau dont la sortie n'est pas vide ; on rend les nouveaux morceaux
+        # puis les suivants tant que leur rendu change
+        need_space = False
+        i = lo - 1
+        while i >= 0 and not self._ends[i]:
+            if self._outputs[i]:
+                need_space = True
+                break
+            i -= 1
+        i = lo
+        stop = lo + len(outputs)
+        while i < len(self._outputs):
+            output = self._outputs[i]
+            piece = (" " + output if need_space and output else output) + ("\n" if self._ends[i] else "")
+            if i >= stop:
+                if piece == self._rendered[i]:
+                    break
+                old.append(self._rendered[i])
+            self._rendered[i] = piece
+            need_space = (need_space or bool(output)) and not self._ends[i]
+            i += 1
+        # les morceaux suivants rendus de nouveau gardent leur index, décalé
+        # de len(outputs) - (hi - lo) par rapport à l'ancienne suite
+        changed = max(i, stop)
+        self._output_offsets.splice(lo, hi + changed - stop, map(len, self._rendered[lo:changed]))
+        return output_start, output_start + sum(map(len, old)), "".join(self._rendered[lo:changed])
+
+    def replace(self, start, end, text):
+        """Remplace source[start:end] par `text`.
+
+        Retourne (début, fin, remplacement) : output[début:fin] de l'ancienne
+        sortie est devenu `remplacement`.
+        """
+        offsets = self._source_offsets
+        if not 0 <= start <= end <= offsets.total():
+            raise ValueError("edit range out of the document")
+        sources = self._sources
+        ends = self._ends
+        count = len(sources)
+        first = offsets.find(start)
+        # dernier morceau qui commence avant `end`
+        last = max(first, offsets.find(end - 1)) if end else first
+
+        # voisins : assez de caractères inchangés de part et d'autre pour que
+        # les coupures aux bords de la région restent sûres (is_safe_split
+        # lit trois caractères après la coupure et deux avant)
+        lo = first
+        added = 0
+        while lo > 0 and not ends[lo - 1] and added < _RIGHT_CONTEXT:
+            lo -= 1
+            added += len(sources[lo])
+        # si la modification supprime le retour à la ligne de `last`, la
+        # ligne suivante rejoint la région
+        joins_next = ends[last] and end == offsets.start(last + 1)
+        hi = last
+        added = 0
+        while hi + 1 < count and (not ends[hi] or (hi == last and joins_next)) and added < _LEFT_CONTEXT:
+            hi += 1
+            added += len(sources[hi])
+
+        region_start = offsets.start(lo)
+        region = "".join(
+            source + "\n" if line_end else source
+            for source, line_end in zip(sources[lo:hi + 1], ends[lo:hi + 1])
+        )
+        region = region[:start - region_start] + text + region[end - region_start:]
+
+        left = ""
+        i = lo
+        while i > 0 and not ends[i - 1] and len(left) < _LEFT_CONTEXT:
+            i -= 1
+            left = sources[i] + left
+        right = ""
+        i = hi
+        while i + 1 < count and not ends[i] and len(right) < _RIGHT_CONTEXT:
+            i += 1
+            right += sources[i]
+        new_sources, new_ends = self._segment(
+            region, left[-_LEFT_CONTEXT:], right[:_RIGHT_CONTEXT], ends[hi]
+        )
+        return self._splice(lo, hi + 1, new_sources, new_ends)
+
+    def insert(self, position, text):
+        return self.replace(position, position, text)
+
+    def delete(self, start, end):
+        return self.replace(start, end, "")
+
+    def offset_map(self):
+        """(début source, fin source, début sortie, fin sortie) de chaque morceau.
+
+        Les bornes excluent le retour à la ligne et l'espace qui sépare la
+        sortie d'un morceau de la précédente.
+        """
+        spans = []
+        source_start = 0
+        output_start = 0
+        for source, line_end, output, piece in zip(self._sources, self._ends, self._outputs, self._rendered):
+            start = output_start + len(piece) - len(output) - line_end
+            spans.append((source_start, source_start + len(source), start, start + len(output)))
+            source_start += len(source) + line_end
+            output_start += len(piece)
+        return spans
+
+    def _span(self, index):
+        source_start = self._source_offsets.start(index)
+        output_start = self._output_offsets.start(index)
+        source = self._sources[index]
+        output = self._outputs[index]
+        start = output_start + len(self._rendered[index]) - len(output) - self._ends[index]
+        return source_start, source_start + len(source), start, start + len(output)
+
+    def to_output(self, position):
+        """Portion de la sortie qui correspond au morceau contenant source[position]"""
+        return self._span(self._source_offsets.find(position))[2:]
+
+    def to_source(self, position):
+        """Portion de la source qui correspond au morceau contenant output[position]"""
+        return self._span(self._output_offsets.find(position))[:2]
@@ -0,0 +1,192 @@
+"""Accès direct aux lignes d'un grand corpus : fichier projeté en mémoire (mmap)
+et index des débuts de ligne.
+
+L'index est enregistré à côté du fichier (``<fichier>.idx``) : un en-tête
+(signature, taille et date de modification du fichier indexé) suivi d'un
+array('Q') des positions, en octets, du début de chaque ligne, plus une
+position finale. La ligne i occupe donc ``offsets[i]:offsets[i + 1] - 1``.
+L'index est lui aussi projeté en mémoire : get_line(i) ne lit que la ligne
+demandée, quelle que soit la taille du corpus. Un index plus ancien que son
+fichier, tronqué ou dont les positions extrêmes ne correspondent pas au
+fichier est reconstruit à l'ouverture.
+
+Les lignes sont celles de ``split("\\n")``, comme pour ``-f`` : un fichier
+terminé par un retour à la ligne a une dernière ligne vide.
+
+    corpus = IndexedCorpus("quran.txt")
+    corpus.get_line(6235)
+    corpus.translate(1, 8)
+    write_translated("quran.txt", "quran_latin.txt")
+"""
+from array import array
+import mmap
+import os
+
+from .transliterator import ArabTransliterator
+
+INDEX_SUFFIX = ".idx"
+# Signature de l'en-tête, qui révèle aussi un index écrit dans l'autre boutisme
+_MAGIC = int.from_bytes(b"ARTIDX01", "big")
+_HEADER = 3
+_ITEM = array("Q").itemsize
+
+
+def index_path(path):
+    return os.fspath(path) + INDEX_SUFFIX
+
+
+def _header(path):
+    stat = os.stat(path)
+    return array("Q", (_MAGIC, stat.st_size, stat.st_mtime_ns))
+
+
+def _map(file):
+    # mmap refuse les fichiers vides
+    if os.fstat(file.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def line_offsets(data):
+    """array('Q') des débuts de ligne de `data` (bytes ou mmap), plus la
+    position qui suivrait un dernier retour à la ligne"""
+    offsets = array("Q", [0])
+    find = data.find
+    k = find(b"\n")
+    while k >= 0:
+        offsets.append(k + 1)
+        k = find(b"\n", k + 1)
+    offsets.append(len(data) + 1)
+    return offsets
+
+
+def _save_index(path, offsets):
+    # écrit à côté puis renommé : un lecteur ne voit jamais d'index à moitié écrit
+    target = index_path(path)
+    temporary = f"{target}.{os.getpid()}"
+    try:
+        with open(temporary, "wb") as file:
+            _header(path).tofile(file)
+            offsets.tofile(file)
+        os.replace(temporary, target)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def build_index(path):
+    """Calcule et enregistre l'index de `path` ; retourne le nombre de lignes"""
+    with open(path, "rb") as file:
+        offsets = line_offsets(_map(file))
+    _save_index(path, offsets)
+    return len(offsets) - 1
+
+
+class IndexedCorpus:
+    """Fichier UTF-8 dont chaque ligne s'obtient en O(1) par son numéro
+    (à partir de 0), sans le charger.
+
+    L'index est construit au besoin (voir build_index). S'utilise comme un
+    gestionnaire de contexte, ou fermé par close().
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._file = open(self.path, "rb")
+        self._data = _map(self._file)
+        self._index_file = None
+        self._index = None
+        self._offsets = self._load_index()
+
+    def _valid_index(self, index, header):
+        """L'index projeté `index` est-il celui du fichier dans son état actuel ?
+
+        En plus de l'en-tête, le corps doit être un nombre entier de positions,
+        de la première (0) à la position finale (taille du fichier + 1) : un
+        index tronqué ou écrasé est reconstruit.
+        """
+        body = len(index) - _HEADER * _ITEM
+        if body < 2 * _ITEM or body % _ITEM:
+            return False
+        if array("Q", index[:_HEADER * _ITEM]) != header:
+            return False
+        first = array("Q", index[_HEADER * _ITEM:(_HEADER + 1) * _ITEM])[0]
+        last = array("Q", index[-_ITEM:])[0]
+        return first == 0 and last == len(self._data) + 1
+
+    def _load_index(self):
+        header = _header(self.path)
+        try:
+            index_file = open(index_path(self.path), "rb")
+        except FileNotFoundError:
+            index_file = None
+        if index_file is not None:
+            index = _map(index_file)
+            if self._valid_index(index, header):
+                self._index_file, self._index = index_file, index
+                return memoryview(index)[_HEADER * _ITEM:].cast("Q")
+            if index:
+                index.close()
+            index_file.close()
+        # absent ou périmé : reconstruit à partir du fichier déjà projeté
+        offsets = line_offsets(self._data)
+        _save_index(self.path, offsets)
+        return offsets
+
+    def close(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        for resource in (self._index, self._index_file, self._data, self._file):
+            if resource:
+                resource.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def get_line(self, i):
+        """Ligne `i` (sans le retour à la ligne) ; un `i` négatif compte depuis la fin"""
+        count = len(self._offsets) - 1
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError("line index out of range")
+        return self._data[self._offsets[i]:self._offsets[i + 1] - 1].decode("utf-8")
+
+    def lines(self, start=0, stop=None):
+        """Lignes `start` à `stop` (exclue), comme une tranche de liste"""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        for i in range(start, stop):
+            yield self.get_line(i)
+
+    def translate(self, start=0, stop=None, translator=None, scheme=None, reverse=False):
+        """Translittération des lignes `start` à `stop` (translate_many, ou
+        untranslate_many avec `reverse`) ; retourne un générateur"""
+        translator = translator or ArabTransliterator()
+        many = translator.untranslate_many if reverse else translator.translate_many
+        return many(self.lines(start, stop), scheme=scheme)
+
+
+def write_translated(source, destination, translator=None, scheme=None, reverse=False, chunksize=1024):
+    """Écrit dans `destination` la translittération de chaque ligne de
+    `source`, et l'index de `destination` : la ligne i de l'une correspond à
+    la ligne i de l'autre. Retourne le nombre de lignes."""
+    translator = translator or ArabTransliterator()
+    many = translator.untranslate_many if reverse else translator.translate_many
+    offsets = array("Q", [0])
+    with IndexedCorpus(source) as corpus, open(destination, "wb") as file:
+        for result in many(corpus.lines(), chunksize=chunksize, scheme=scheme):
+            data = result.encode("utf-8")
+            # pas de retour à la ligne après la dernière ligne, comme dans la source
+            if len(offsets) > 1:
+                file.write(b"\n")
+            file.write(data)
+            offsets.append(offsets[-1] + len(data) + 1)
+    _save_index(destination, offsets)
+    return len(offsets) - 1
@@ -0,0 +1,291 @@
+"""Classification vectorisée des caractères : les prédicats de voisinage de
+ArabicText.ArabicTextChar calculés d'un coup, pour tout le texte, en masques
+booléens.
+
+Le texte est d'abord réduit à un identifiant par caractère (0 pour ceux que
+les masques ne regardent pas) ; chaque ensemble de caractères devient un
+masque par une table de traduction, et chaque prédicat une combinaison de
+masques décalés (le caractère suivant, le précédent...). Deux moteurs
+calculent les mêmes expressions :
+
+- NumPy (dépendance optionnelle, ``pip install arab_transliterator[numpy]``) :
+  un tableau ``uint32`` des points de code, des tableaux de booléens
+- pur Python, sans NumPy : un octet par caractère (bytes.translate), et
+  chaque masque un entier dont les octets valent 0 ou 1, combiné par les
+  opérations bit à bit des entiers
+
+trigger_positions en tire, pour le moteur de règles, les positions où une
+règle dépend du contexte ; rules.apply_spans ne passe alors par les règles
+que les fenêtres autour de ces positions, le reste du texte est traduit d'un
+bloc par str.translate.
+"""
+from functools import lru_cache
+import re
+from unicodedata import combining
+
+from . import alphabet
+from .rules import _SILENT, SENTENCE_ENDS, punctuation_rule
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Nom du masque -> prédicat de ArabicText.ArabicTextChar qu'il remplace
+FLAGS = {
+    "kasra_ya": "is_kasra_followed_by_ya",
+    "damma_waw": "is_damma_followed_by_waw",
+    "fatha_alif": "is_fatha_followed_by_alif",
+    "before_shadda": "is_followed_by_shadda",
+    "sun": "is_sun",
+    "word_start": "is_word_start",
+    "mid": "is_mid",
+}
+
+# Caractères dont le déclenchement dépend du voisinage, voir trigger_positions
+_CONTEXTUAL = frozenset((alphabet.ALIF, alphabet.ALIF_MAKSURA, alphabet.ALIF_WITH_HAMZAT_WASL, alphabet.LAM,
+                         alphabet.KASRA, alphabet.DAMMA, alphabet.SHADDA))
+_SINGLE = (alphabet.ALIF, alphabet.ALIF_MAKSURA, alphabet.ALIF_WITH_HAMZAT_WASL, alphabet.LAM, alphabet.KASRA,
+           alphabet.DAMMA, alphabet.FATHA, alphabet.SHADDA, alphabet.YA, alphabet.WAW, alphabet.HA, " ")
+
+
+def code_points(text):
+    """Tableau NumPy ``uint32`` des points de code de `text`"""
+    return numpy.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+class _Sets:
+    """Identifiant de chaque caractère utile et table de chaque ensemble.
+
+    `sets` associe un nom à un ensemble de caractères ; chaque caractère
+    de _SINGLE est aussi un ensemble, sous son propre nom.
+    """
+
+    def __init__(self, sets):
+        sets = {**{char: {char} for char in _SINGLE}, **sets}
+        chars = sorted(set().union(*sets.values()))
+        if len(chars) > 255:
+            raise ValueError("too many characters for the masks")
+        ids = {char: k for k, char in enumerate(chars, 1)}
+        self.tables = {}
+        for name, members in sets.items():
+            table = bytearray(256)
+            for char in members:
+                table[ids[char]] = 1
+            self.tables[name] = bytes(table)
+        self.pattern = re.compile("[^" + "".join(map(re.escape, chars)) + "]")
+        self.to_ids = {ord(char): k for char, k in ids.items()}
+        self._lookup = None
+        if numpy is not None:
+            self._lookup = numpy.zeros(ord(chars[-1]) + 2, dtype=numpy.uint8)
+            self._lookup[[ord(char) for char in chars]] = list(ids.values())
+
+    def ids(self, text):
+        """Un octet par caractère de `text` : son identifiant, ou 0"""
+        return self.pattern.sub("\0", text).translate(self.to_ids).encode("latin-1")
+
+    def numpy_ids(self, text):
+        lookup = self._lookup
+        return lookup[numpy.minimum(code_points(text), len(lookup) - 1)]
+
+
+class _Bits:
+    """Masque du moteur pur Python : l'octet i de `value` (gros-boutiste)
+    vaut 1 si le masque est vrai pour le caractère i"""
+
+    __slots__ = ("value", "ones")
+
+    def __init__(self, value, ones):
+        self.value = value
+        self.ones = ones
+
+    def __and__(self, other):
+        return _Bits(self.value & other.value, self.ones)
+
+    def __or__(self, other):
+        return _Bits(self.value | other.value, self.ones)
+
+    def __invert__(self):
+        return _Bits(self.value ^ self.ones, self.ones)
+
+
+class _PythonMasks:
+    def __init__(self, sets, text):
+        self.sets = sets
+        self.size = len(text)
+        self.ones = int.from_bytes(b"\x01" * self.size, "big")
+        self.ids = sets.ids(text)
+
+    def __getitem__(self, name):
+        return _Bits(int.from_bytes(self.ids.translate(self.sets.tables[name]), "big"), self.ones)
+
+    def shift(self, mask, k):
+        """mask[i + k] à la position i, faux hors du texte"""
+        if k > 0:
+            return _Bits((mask.value << 8 * k) & self.ones, self.ones)
+        return _Bits(mask.value >> -8 * k, self.ones)
+
+    def outside(self, k):
+        """Vrai à la position i si i + k est hors du texte"""
+        if k > 0:
+            return _Bits(self.ones & ((1 << 8 * k) - 1), self.ones)
+        return _Bits(self.ones ^ (self.ones >> -8 * k), self.ones)
+
+    def array(self, mask):
+        return bytearray(mask.value.to_bytes(self.size, "big"))
+
+    def positions(self, mask):
+        data = mask.value.to_bytes(self.size, "big")
+        positions = []
+        k = data.find(1)
+        while k >= 0:
+            positions.append(k)
+            k = data.find(1, k + 1)
+        return positions
+
+
+class _NumpyMasks:
+    def __init__(self, sets, text):
+        self.sets = sets
+        self.size = len(text)
+        self.ids = sets.numpy_ids(text)
+
+    def __getitem__(self, name):
+        return numpy.frombuffer(self.sets.tables[name], dtype=numpy.bool_)[self.ids]
+
+    def shift(self, mask, k):
+        shifted = numpy.zeros_like(mask)
+        if k > 0:
+            shifted[:-k] = mask[k:]
+        else:
+            shifted[-k:] = mask[:k]
+        return shifted
+
+    def outside(self, k):
+        mask = numpy.zeros(self.size, dtype=bool)
+        if k > 0:
+            mask[-k:] = True
+        else:
+            mask[:-k] = True
+        return mask
+
+    def array(self, mask):
+        return mask
+
+    def positions(self, mask):
+        return numpy.flatnonzero(mask).tolist()
+
+
+def _masks(sets, text, use_numpy):
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    return _NumpyMasks(sets, text) if use_numpy else _PythonMasks(sets, text)
+
+
+def _predicates(m):
+    """Masques de FLAGS calculés par le moteur `m`"""
+    shift = m.shift
+    word_start = shift(m[" "], -1) | m.outside(-1)
+    return {
+        "kasra_ya": m[alphabet.KASRA] & shift(m[alphabet.YA], 1),
+        "damma_waw": m[alphabet.DAMMA] & shift(m[alphabet.WAW], 1),
+        "fatha_alif": m[alphabet.FATHA] & shift(m[alphabet.ALIF], 1),
+        "before_shadda": shift(m[alphabet.SHADDA], 1),
+        "sun": shift(m[alphabet.SHADDA], 2),
+        "word_start": word_start,
+        "mid": ~word_start & ~shift(m[" "], 1) & ~m.outside(1),
+    }
+
+
+_CLASSIFY_SETS = None
+
+
+def classify(text, use_numpy=None):
+    """Masques de FLAGS pour `text` : ``masks[nom][i]`` est vrai si le
+    prédicat est vrai pour le caractère i.
+
+    Des tableaux NumPy de booléens si NumPy est installé (ou avec
+    `use_numpy`), sinon des bytearray de 0 et de 1.
+    """
+    global _CLASSIFY_SETS
+    if _CLASSIFY_SETS is None:
+        _CLASSIFY_SETS = _Sets({})
+    m = _masks(_CLASSIFY_SETS, text, use_numpy)
+    return {name: m.array(mask) for name, mask in _predicates(m).items()}
+
+
+@lru_cache(maxsize=32)
+def _sets_for(always, letters):
+    return _Sets({
+        "always": always,
+        # lettres que translate_simple double devant un shadda (voir compile_simple)
+        "letter": letters,
+        # un shadda après lettre + l'un de ces caractères passe par sa règle
+        "no_double": _SILENT | {" ", alphabet.LAM, alphabet.ALIF_WITH_HAMZAT_WASL},
+        "tanwin": alphabet.TANWIN,
+        "end_or_tanwin": SENTENCE_ENDS | alphabet.TANWIN,
+        "vowel_or_shadda": alphabet.VOWELS | {alphabet.SHADDA},
+        "contextual": _CONTEXTUAL,
+    })
+
+
+def _trigger_sets(translator, dispatch):
+    # par contenu et non par identité : le cache ne garde ni les tables ni
+    # les translittérateurs, et deux schémas aux mêmes lettres le partagent
+    always = frozenset(
+        char for char, rule in dispatch.items() if rule is not punctuation_rule and char not in _CONTEXTUAL
+    )
+    letters = frozenset(
+        char for char in translator.table
+        if char not in dispatch and char not in (alphabet.YA, alphabet.WAW) and not combining(char)
+    )
+    return _sets_for(always, letters)
+
+
+def trigger_positions(text, translator, dispatch, use_numpy=None):
+    """Positions croissantes des caractères de `text` que rules.apply_spans
+    doit passer par les règles : là où la règle de `dispatch` dépend du
+    voisinage.
+
+    Les autres caractères se traduisent d'un bloc par la table de
+    rules.compile_simple : fatha + alif ou alif maksura (ā), kasra + ya et
+    damma + waw sans voyelle ni shadda ensuite (masques kasra_ya,
+    damma_waw), alif muet, article en milieu de phrase sans lettre solaire
+    (masque sun), lettre doublée par un shadda en milieu de mot, lam
+    isolé... comme le motif de compile_simple, dont les conditions sont
+    reprises ici.
+    """
+    m = _masks(_trigger_sets(translator, dispatch), text, use_numpy)
+    shift, outside = m.shift, m.outside
+    alif, lam, wasl, fatha = alphabet.ALIF, alphabet.LAM, alphabet.ALIF_WITH_HAMZAT_WASL, alphabet.FATHA
+    predicates = _predicates(m)
+    space_before = shift(m[" "], -1)
+    lam_after = shift(m[lam], 1)
+    fatha_before = shift(m[fatha], -1)
+    alif_before = shift(m[alif], -1)
+    wasl_before = shift(m[wasl], -1)
+    shadda_3 = shift(m[alphabet.SHADDA], 3)
+    # fatha + alif (ā), sauf si une règle qui consomme plusieurs caractères
+    # (Allah, kasra + ya + shadda + voyelle, alif + suivant) s'arrête sur la fatha
+    long_a = fatha_before & ~shift(m[alphabet.HA] | m[alphabet.SHADDA] | m[alif], -2)
+    # alif de l'article en milieu de phrase, ni Allah ni lettre solaire
+    article = (
+        lam_after & ~(shift(m[lam], 2) & shift(m[alphabet.HA], 3)) & ~shadda_3
+        & ~outside(-3) & ~shift(m["tanwin"], -3)
+        & ((space_before & ~shift(m["end_or_tanwin"], -2))
+           | ~(space_before | fatha_before | alif_before | shift(m["tanwin"], -2)))
+    )
+    # hamzat wasl + lam (l-), sauf en tête du texte ou après un alif
+    wasl_article = lam_after & ~outside(-1) & ~alif_before & ~shadda_3
+    vowel_after = shift(m["vowel_or_shadda"], 2)
+    plain = (
+        (m[alif] & ((~lam_after & ((~outside(-1) & ~space_before & ~fatha_before) | long_a)) | article))
+        | (m[alphabet.ALIF_MAKSURA] & (~fatha_before | long_a))
+        | (m[wasl] & (~lam_after | wasl_article))
+        | (m[lam] & ~predicates["sun"] & (~(alif_before | wasl_before) | (alif_before & shift(article, -1))
+                                          | (wasl_before & shift(wasl_article, -1))))
+        | (m[alphabet.KASRA] & ~(predicates["kasra_ya"] & vowel_after))
+        | (m[alphabet.DAMMA] & ~(predicates["damma_waw"] & vowel_after))
+        | (m[alphabet.SHADDA] & shift(m["letter"], -1) & ~(shift(m["no_double"], -2) | outside(-2)))
+    )
+    return m.positions(m["always"] | (m["contextual"] & ~plain))
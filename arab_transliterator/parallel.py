@@ -0,0 +1,113 @@
+"""Translittération multi-processus, un ArabTransliterator par processus."""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+
+from .rules import is_safe_split
+from .transliterator import ArabTransliterator
+
+# Taille visée, en caractères, des morceaux d'une longue ligne
+DEFAULT_SHARD_SIZE = 1 << 12
+
+# Instance propre à chaque processus de travail, créée par _init_worker
+_translator = None
+
+
+def _init_worker(disk_cache=None, scheme=None, punctuation=None, punctuation_mapping=None):
+    # schéma et ponctuation par défaut de l'ArabTransliterator de l'appelant
+    global _translator
+    if scheme is None:
+        _translator = ArabTransliterator(disk_cache=disk_cache)
+    else:
+        _translator = ArabTransliterator(scheme=scheme, disk_cache=disk_cache)
+    if punctuation is not None:
+        _translator.punctuation = list(punctuation)
+    if punctuation_mapping is not None:
+        _translator.punctuation_mapping = dict(punctuation_mapping)
+
+
+def _translate_chunk(texts, scheme=None, reverse=False):
+    if reverse:
+        return list(_translator.untranslate_many(texts, chunksize=len(texts), scheme=scheme))
+    return list(_translator.translate_many(texts, chunksize=len(texts), scheme=scheme))
+
+
+def translate_parallel(texts, jobs=None, chunksize=256, scheme=None, reverse=False, disk_cache=None,
+                       translator=None):
+    """Translittère `texts` sur `jobs` processus et retourne un générateur.
+
+    Les textes sont envoyés par paquets de `chunksize` ; les résultats sont
+    rendus dans l'ordre d'entrée. Au plus deux paquets par processus sont en
+    cours à la fois, la mémoire utilisée ne dépend donc pas de la taille de
+    l'entrée. `scheme` est le nom du schéma de translittération ; avec
+    `reverse`, les textes latins sont rendus en arabe (untranslate).
+    `disk_cache` est le chemin d'un cache persistant (disk_cache.DiskCache)
+    ouvert par chaque processus. Avec `translator`, chaque processus reprend
+    son schéma par défaut et sa ponctuation : la sortie est celle de ses
+    méthodes translate et untranslate.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if chunksize < 1:
+        raise ValueError("chunksize must be >= 1")
+    texts = iter(texts)
+    if disk_cache is not None:
+        disk_cache = getattr(disk_cache, "path", disk_cache)
+    initargs = (disk_cache,)
+    if translator is not None:
+        initargs += (translator.scheme, translator.punctuation, translator.punctuation_mapping)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < 2 * jobs:
+                chunk = list(islice(texts, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_translate_chunk, chunk, scheme, reverse))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def split_text(text, size=DEFAULT_SHARD_SIZE):
+    """Coupe `text` en morceaux d'au moins `size` caractères (sauf le dernier)
+    aux coupures sûres de rules.is_safe_split.
+
+    Les translittérations des morceaux, jointes par une espace (en sautant
+    les vides), donnent celle du texte entier.
+    """
+    if size < 1:
+        raise ValueError("size must be >= 1")
+    pieces = []
+    start = 0
+    while len(text) - start > size:
+        k = text.find(" ", start + size - 1)
+        while k >= 0 and not is_safe_split(text, k + 1):
+            k = text.find(" ", k + 1)
+        if k < 0:
+            break
+        pieces.append(text[start:k + 1])
+        start = k + 1
+    pieces.append(text[start:])
+    return pieces
+
+
+def translate_sharded(texts, jobs=None, shard_size=DEFAULT_SHARD_SIZE, chunksize=256, scheme=None, disk_cache=None):
+    """Comme translate_parallel, en coupant aussi chaque texte long en
+    morceaux (split_text) répartis sur les processus.
+
+    Une seule ligne géante, sans retour à la ligne, profite donc de tous les
+    processus ; le résultat est identique à celui de translate().
+    """
+    counts = deque()
+
+    def pieces():
+        for text in texts:
+            shards = split_text(text, shard_size)
+            counts.append(len(shards))
+            yield from shards
+
+    results = translate_parallel(pieces(), jobs=jobs, chunksize=chunksize, scheme=scheme, disk_cache=disk_cache)
+    for first in results:
+        parts = [first, *islice(results, counts.popleft() - 1)]
+        yield " ".join(filter(None, parts))
@@ -0,0 +1,201 @@
+"""Instrumentation de translate : règles déclenchées par branche et temps par phase.
+
+Rien n'est ajouté au chemin normal de translate : Profiler.translate refait
+les mêmes étapes que ArabTransliterator.translate et chronomètre chaque
+phase. Hors du temps mesuré, le texte repasse ensuite par les seules règles
+(rules.apply_rules), avec une table de dispatch dont chaque règle est
+enveloppée d'un compteur : les branches sont comptées même quand la passe
+principale les a traduites par un chemin rapide (compile_simple,
+apply_spans), qui ne passe pas par les règles. Sans Profiler,
+l'instrumentation ne coûte donc rien.
+
+    profiler = Profiler()
+    for line in lines:
+        profiler.translate(translator, line)
+    print(profiler.summary())
+"""
+from collections import Counter
+import time
+
+from . import alphabet, rules
+from .rules import char_at
+from .transliterator import _ALLAH_FORMS, _hyphen_patterns, normalize, postprocess
+
+PHASES = ("prepare", "normalize", "main_pass", "postprocess", "output")
+
+
+def _alif_branch(text, i):
+    return "allah" if text[i + 1:i + 4] == alphabet.LAM + alphabet.LAM + alphabet.HA else "long_a"
+
+
+def _lam_branch(text, i):
+    if char_at(text, i + 2) == alphabet.SHADDA:
+        return "lam_sun"
+    if char_at(text, i - 1) in (alphabet.ALIF, alphabet.ALIF_WITH_HAMZAT_WASL):
+        return "lam_article"
+    return "lam"
+
+
+def _vowel_branch(short, long, semi_vowel):
+    def branch(text, i):
+        return long if char_at(text, i + 1) == semi_vowel else short
+
+    return branch
+
+
+# Branche comptée pour chaque règle de rules.RULES : un nom fixe, ou une
+# fonction (texte, index) -> nom quand la règle a plusieurs chemins
+BRANCHES = {
+    rules.alif_rule: _alif_branch,
+    rules.long_a_rule: "long_a",
+    rules.hamza_rule: "hamza",
+    rules.lam_rule: _lam_branch,
+    rules.hamzat_wasl_rule: "hamzat_wasl",
+    rules.madda_rule: "madda",
+    rules.kasra_rule: _vowel_branch("kasra", "long_i", alphabet.YA),
+    rules.damma_rule: _vowel_branch("damma", "long_u", alphabet.WAW),
+    rules.shadda_rule: "shadda",
+    rules.punctuation_rule: "punctuation",
+}
+
+
+class Profiler:
+    """Compteurs de règles et temps cumulés des appels à Profiler.translate.
+
+    - ``hits`` : déclenchements de chaque branche des règles (``allah``,
+      ``lam_sun``, ``shadda``...), du chemin de la passe principale
+      (``path.simple``, ``path.spans``, ``path.vectorize``, ``path.rules``,
+      ``path.cache``, voir ArabTransliterator._path) et
+      des corrections de postprocess (``post.hyphen``, ``post.allah_form``)
+    - ``seconds`` : temps passé dans chaque phase (PHASES)
+    """
+
+    def __init__(self):
+        self.hits = Counter()
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.texts = 0
+        self.characters = 0
+        # table de dispatch enveloppée, par table d'origine
+        self._wrapped = {}
+
+    def reset(self):
+        self.hits.clear()
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.texts = 0
+        self.characters = 0
+
+    def _counting(self, rule):
+        hits = self.hits
+        branch = BRANCHES.get(rule, rule.__name__)
+        if isinstance(branch, str):
+            def counted(translator, text, i, out, after_tanwin):
+                hits[branch] += 1
+                return rule(translator, text, i, out, after_tanwin)
+        else:
+            def counted(translator, text, i, out, after_tanwin):
+                hits[branch(text, i)] += 1
+                return rule(translator, text, i, out, after_tanwin)
+        return counted
+
+    def _dispatch(self, dispatch):
+        wrapped = self._wrapped.get(id(dispatch))
+        if wrapped is None or wrapped[0] is not dispatch:
+            wrapped = self._wrapped[id(dispatch)] = (
+                dispatch, {char: self._counting(rule) for char, rule in dispatch.items()}
+            )
+        return wrapped[1]
+
+    def translate(self, translator, text, scheme=None):
+        """translator.translate(text, scheme=scheme), en comptant et en chronométrant"""
+        seconds = self.seconds
+        clock = time.perf_counter
+        start = clock()
+        dispatch = translator._prepare(scheme)
+        active = translator._active
+        self.texts += 1
+        self.characters += len(text)
+        now = clock()
+        seconds["prepare"] += now - start
+        if not text:
+            return ""
+        if active.engine == "table":
+            result = active.transliterate(text)
+            seconds["output"] += clock() - now
+            self.hits["path.table"] += 1
+            return result
+
+        normalized = normalize(text)
+        start, now = now, clock()
+        seconds["normalize"] += now - start
+
+        raw = translator._main_pass(normalized, dispatch, [])
+        start, now = now, clock()
+        seconds["main_pass"] += now - start
+
+        result = postprocess(raw, active.letter_class)
+        start, now = now, clock()
+        seconds["postprocess"] += now - start
+
+        if active.output:
+            result = result.translate(active.output)
+            seconds["output"] += clock() - now
+
+        # hors du temps mesuré : chemin de la passe principale, branches des
+        # règles et corrections que postprocess a pu faire
+        self.hits["path." + translator._path(normalized)] += 1
+        rules.apply_rules(translator, normalized, 0, len(normalized), self._dispatch(dispatch), [], False)
+        fixes = []
+        if "-" in raw:
+            fixes += [("post.hyphen", pattern) for pattern in _hyphen_patterns(active.letter_class)]
+        if "l-lāh" in raw or "llah" in raw:
+            fixes.append(("post.allah_form", _ALLAH_FORMS))
+        for branch, pattern in fixes:
+            count = sum(1 for _ in pattern.finditer(raw))
+            if count:
+                self.hits[branch] += count
+        return result
+
+    def translate_many(self, translator, texts, scheme=None):
+        """Profiler.translate sur chaque texte ; retourne la liste des résultats"""
+        return [self.translate(translator, text, scheme) for text in texts]
+
+    def info(self):
+        """Compteurs et temps sous forme de dictionnaire"""
+        return {
+            "texts": self.texts,
+            "characters": self.characters,
+            "hits": dict(self.hits.most_common()),
+            "seconds": dict(self.seconds),
+        }
+
+    def prometheus(self, prefix="arab_transliterator"):
+        """Compteurs et temps au format texte de Prometheus"""
+        lines = [
+            f"# HELP {prefix}_texts_total Texts transliterated while profiling",
+            f"# TYPE {prefix}_texts_total counter",
+            f"{prefix}_texts_total {self.texts}",
+            f"# HELP {prefix}_characters_total Characters transliterated while profiling",
+            f"# TYPE {prefix}_characters_total counter",
+            f"{prefix}_characters_total {self.characters}",
+            f"# HELP {prefix}_rule_hits_total Rule firings per branch",
+            f"# TYPE {prefix}_rule_hits_total counter",
+        ]
+        lines += [f'{prefix}_rule_hits_total{{branch="{branch}"}} {count}'
+                  for branch, count in sorted(self.hits.items())]
+        lines += [
+            f"# HELP {prefix}_phase_seconds_total Time spent in each phase of translate",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{phase}"}} {seconds:.6f}'
+                  for phase, seconds in self.seconds.items()]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Tableau lisible des temps par phase et des branches les plus fréquentes"""
+        total = sum(self.seconds.values()) or 1.0
+        lines = [f"{self.texts} texts, {self.characters} characters", ""]
+        lines.append(f"{'phase':>12} {'time (s)':>9} {'share':>6}")
+        lines += [f"{phase:>12} {seconds:>9.3f} {seconds / total:>6.1%}" for phase, seconds in self.seconds.items()]
+        lines += ["", f"{'branch':>16} {'hits':>9}"]
+        lines += [f"{branch:>16} {count:>9}" for branch, count in self.hits.most_common()]
+        return "\n".join(lines)
@@ -0,0 +1,204 @@
+"""Translittération inverse : du latin vers l'écriture arabe.
+
+Le décodeur d'un schéma (compile_reverse) est construit sur sa table de
+lettres inversée, rangée dans un trie dont on tire une expression régulière :
+à chaque position, la transcription la plus longue l'emporte ("sh" avant
+"s", "ā" avant "a"). Quelques motifs contextuels passent avant le trie :
+la particule séparée de l'article ("wa l-"), Allah, l'article (avec ou sans
+lettre solaire), la voyelle en début de mot, le tanwin (après au moins une
+syllabe) et le ta marbuta en fin de mot, la consonne doublée (shadda).
+
+Pour un schéma ``table`` réversible (Buckwalter), le décodage est exact ;
+pour les schémas ``rules``, il est approché : le sukun, l'alif muet ou le
+support de la hamza, que la translittération ne note pas, ne reviennent pas.
+"""
+import re
+
+from . import alphabet
+from .mapping import _mapping
+
+# Clé d'un nœud terminal du trie : ce que donne le chemin jusqu'à lui
+_END = ""
+
+ALLAH = alphabet.ALIF + alphabet.LAM + alphabet.LAM + alphabet.HA
+
+# Particules d'une lettre que la translittération sépare de l'article qui suit
+# ("wa l-kitābu")
+_PARTICLES = (
+    (alphabet.WAW, alphabet.FATHA), (alphabet.FA, alphabet.FATHA),
+    (alphabet.BA, alphabet.KASRA), (alphabet.LAM, alphabet.KASRA),
+)
+
+
+def build_trie(entries):
+    """Trie (dictionnaires imbriqués) des chaînes de `entries`, indexé par caractère"""
+    trie = {}
+    for key, value in entries.items():
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[_END] = value
+    return trie
+
+
+def trie_pattern(trie):
+    """Expression régulière qui reconnaît la plus longue clé du trie.
+
+    Chaque nœud terminal rend la suite facultative ; la répétition gloutonne
+    essaie donc le chemin le plus long avant de revenir au plus court.
+    """
+    branches = [
+        re.escape(char) + trie_pattern(child)
+        for char, child in sorted(trie.items()) if char != _END
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in trie:
+        return f"(?:{body})?" if len(branches) == 1 else body + "?"
+    return body
+
+
+def _alternation(strings):
+    return "|".join(map(re.escape, sorted(strings, key=len, reverse=True)))
+
+
+def _first_inverse(letters, skip=()):
+    """Inverse de `letters` ; à transcription égale, le premier caractère l'emporte"""
+    inverse = {}
+    for char, value in letters.items():
+        if value and char not in skip:
+            inverse.setdefault(value, char)
+    return inverse
+
+
+class ReverseTable:
+    """Décodeur compilé d'un schéma, voir compile_reverse"""
+
+    __slots__ = ("pattern", "entries", "translation")
+
+    def untransliterate(self, text):
+        if self.translation is not None:
+            return text.translate(self.translation)
+        return self.pattern.sub(self._replace, text)
+
+    def _replace(self, match):
+        group = match.lastgroup
+        if group == "trie":
+            return self.entries[match.group(0)]
+        if group == "allah":
+            return ALLAH
+        if group == "particle":
+            return self.entries["+" + match.group("particle_word")]
+        if group == "article":
+            return alphabet.ALIF + alphabet.LAM
+        if group == "sun":
+            return alphabet.ALIF + alphabet.LAM + self.entries[match.group("sun_letter")] + alphabet.SHADDA
+        if group == "marbuta":
+            return alphabet.TA_MARBUTA
+        if group == "double":
+            return self.entries[match.group("double_letter")] + alphabet.SHADDA
+        if group == "initial":
+            return self.entries[" " + match.group(0)]
+        if group == "tanwin":
+            return self.entries["-" + match.group(0)]
+        return match.group(0)
+
+
+def _rules_entries(scheme, punctuation_mapping):
+    """Transcription inverse des lettres et des formes produites par les règles"""
+    letters = scheme.letters
+    # à transcription égale, la lettre qui la garde dans mapping._mapping
+    # l'emporte (wolofal : "s" est le sin, pas le tha ni le sad)
+    native = dict(sorted(letters.items(), key=lambda item: _mapping.get(item[0]) != item[1]))
+    consonants = {
+        value: char for value, char in _first_inverse(
+            native, skip=(alphabet.TA_MARBUTA, alphabet.WAW_WITH_HAMZA_ABOVE, alphabet.YA_WITH_HAMZA_ABOVE)
+        ).items()
+        if alphabet.char_class(char) & alphabet.CONSONANT
+    }
+    fatha, kasra, damma = letters[alphabet.FATHA], letters[alphabet.KASRA], letters[alphabet.DAMMA]
+    entries = dict(consonants)
+    entries.update({
+        fatha: alphabet.FATHA,
+        kasra: alphabet.KASRA,
+        damma: alphabet.DAMMA,
+        "ā": alphabet.FATHA + alphabet.ALIF,
+        "á": alphabet.FATHA + alphabet.ALIF_MAKSURA,
+        "ī": alphabet.KASRA + alphabet.YA,
+        "ū": alphabet.DAMMA + alphabet.WAW,
+        "'": alphabet.HAMZA,
+    })
+    entries.update(_first_inverse(punctuation_mapping))
+    # formes des motifs contextuels, voir ReverseTable._replace
+    entries.update({
+        " " + fatha: alphabet.ALIF_WITH_HAMZA_ABOVE + alphabet.FATHA,
+        " " + kasra: alphabet.ALIF_WITH_HAMZA_BELOW + alphabet.KASRA,
+        " " + damma: alphabet.ALIF_WITH_HAMZA_ABOVE + alphabet.DAMMA,
+        " ā": alphabet.ALIF_WITH_MADDA_ABOVE,
+        "-" + letters[alphabet.FATHATAN]: alphabet.FATHATAN + alphabet.ALIF,
+        "-" + letters[alphabet.DAMMATAN]: alphabet.DAMMATAN,
+        "-" + letters[alphabet.KASRATAN]: alphabet.KASRATAN,
+    })
+    entries.update(("+" + letters[char] + letters[vowel], char + vowel) for char, vowel in _PARTICLES)
+    # la sortie du schéma remplace certains caractères des règles (ā -> aa)
+    if scheme.output:
+        for code, value in scheme.output.items():
+            if value:
+                for key in [key for key in entries if chr(code) in key]:
+                    entries[key.replace(chr(code), value)] = entries[key]
+    return entries, consonants
+
+
+def compile_reverse(scheme, punctuation_mapping=None):
+    """ReverseTable d'un schéma (scheme.Scheme).
+
+    `punctuation_mapping` est celui du translittérateur (ponctuation arabe
+    -> latine), inversé lui aussi pour les schémas ``rules``.
+    """
+    table = ReverseTable()
+    table.translation = None
+    if scheme.engine == "table":
+        entries = _first_inverse(scheme.letters)
+        table.entries = entries
+        if not scheme.double_shadda and all(len(key) == 1 for key in entries):
+            table.translation = str.maketrans(entries)
+            return table
+        parts = []
+        if scheme.double_shadda:
+            parts.append(f"(?P<double>(?P<double_letter>{_alternation(entries)})(?P=double_letter))")
+        parts.append(f"(?P<trie>{trie_pattern(build_trie(entries))})")
+        table.pattern = re.compile("|".join(parts))
+        return table
+
+    entries, consonants = _rules_entries(scheme, punctuation_mapping or {})
+    table.entries = entries
+    letters = scheme.letters
+    vowels = [letters[alphabet.FATHA], letters[alphabet.KASRA], letters[alphabet.DAMMA]]
+    sun = [letters[char] for char in alphabet.SUN_LETTERS if letters.get(char)]
+    start = r"(?<!\S)"
+    tanwin = [key[1:] for key in entries if key.startswith("-")]
+    # un tanwin suit au moins une syllabe : "min", "ʿan", "lan" (une seule
+    # consonne en début de mot) sont des particules ; un regard arrière par
+    # longueur de transcription, re exigeant une largeur fixe
+    by_length = {}
+    for value in consonants:
+        by_length.setdefault(len(value), []).append(value)
+    lone_consonant = "".join(
+        rf"(?<!{start}(?:{_alternation(values)}))" for _, values in sorted(by_length.items())
+    )
+    long_a = _alternation(key for key, value in entries.items() if value == alphabet.FATHA + alphabet.ALIF)
+    parts = [
+        rf"(?P<particle>{start}(?P<particle_word>{_alternation(key[1:] for key in entries if key.startswith('+'))}) (?=\w{{0,2}}-))",
+        rf"(?P<allah>{start}(?:{_alternation(vowels)})?l-l(?:{long_a})h)",
+        rf"(?P<sun>{start}(?:{_alternation(vowels)})?(?P<sun_letter>{_alternation(sun)})-(?P=sun_letter))",
+        rf"(?P<article>{start}(?:{_alternation(vowels)})?l-)",
+        rf"(?P<initial>{start}(?:{_alternation(key[1:] for key in entries if key.startswith(' '))}))",
+        rf"(?P<tanwin>{lone_consonant}(?:{_alternation(tanwin)})(?!\w))",
+        # le ta marbuta : "t" entre une fatha et la voyelle finale du mot
+        rf"(?P<marbuta>(?<={re.escape(vowels[0])}){re.escape(letters[alphabet.TA])}(?=(?:{_alternation(tanwin + vowels)})(?!\w)))",
+        rf"(?P<double>(?P<double_letter>{_alternation(consonants)})(?P=double_letter))",
+        rf"(?P<trie>{trie_pattern(build_trie({key: value for key, value in entries.items() if key[0] not in ' -+'}))})",
+    ]
+    table.pattern = re.compile("|".join(parts))
+    return table
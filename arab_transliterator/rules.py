@@ -0,0 +1,712 @@
+"""Table des règles contextuelles utilisées par ArabTransliterator.translate.
+
+Chaque règle est une fonction ``rule(translator, text, i, out, after_tanwin)``
+qui lit le caractère ``text[i]`` et son voisinage, ajoute sa transcription à
+``out`` et retourne l'index du prochain caractère à traiter. La table ``RULES``
+associe un caractère déclencheur à sa règle ; ``compile_rules`` la transforme
+une seule fois en dictionnaire de dispatch indexé par caractère. Les caractères
+absents du dictionnaire passent par ``default_rule``.
+"""
+from bisect import bisect_left
+import re
+from unicodedata import combining
+
+from . import alphabet
+
+# Signes après lesquels un mot est considéré comme un début de phrase
+SENTENCE_ENDS = frozenset(('.', '!', '?', '،', '؟', '\n'))
+
+
+# Classes de caractères lues par les règles autour d'un mot, voir word_context
+_LEFT_CONTEXT_CLASS = dict.fromkeys(SENTENCE_ENDS, ".")
+_LEFT_CONTEXT_CLASS.update(dict.fromkeys(alphabet.TANWIN, "n"))
+_LEFT_CONTEXT_CLASS[" "] = " "
+_RIGHT_CONTEXT_CLASS = {
+    alphabet.SHADDA: alphabet.SHADDA,
+    alphabet.SUKUN: alphabet.SUKUN,
+    alphabet.SMALL_HIGH_ROUNDED_ZERO: alphabet.SUKUN,
+}
+
+
+def word_context(text, start, end):
+    """Ce que les règles lisent autour du mot text[start:end] et de l'espace
+    qui le suit (text[end], s'il existe).
+
+    Le mot est précédé d'un espace (ou du début du texte). Avant cet espace,
+    seuls comptent la position et, sur deux caractères, les espaces, les fins
+    de phrase et les tanwin (article après tanwin, début de phrase). Après
+    l'espace, seul compte un shadda (lam final suivi d'une lettre solaire) ou
+    un sukun (lettre après un alif en début de mot).
+    """
+    classes = _LEFT_CONTEXT_CLASS
+    if start >= 3:
+        left = classes.get(text[start - 2], "x") + classes.get(text[start - 3], "x")
+    elif start == 2:
+        left = classes.get(text[0], "x")
+    else:
+        left = start
+    if end >= len(text) - 1:
+        right = ""
+    else:
+        right = _RIGHT_CONTEXT_CLASS.get(text[end + 1], "x")
+    return left, right
+
+
+def char_at(text, i):
+    """Retourne text[i], ou None hors du texte (sans index négatif)"""
+    if 0 <= i < len(text):
+        return text[i]
+    return None
+
+
+def is_word_start(text, i):
+    return i <= 0 or text[i - 1] == " "
+
+
+def is_sentence_start(text, i):
+    """Début absolu, ou mot précédé d'un espace après une ponctuation de fin"""
+    return i == 0 or (
+        text[i - 1] == " " and (i == 1 or text[i - 2] in SENTENCE_ENDS)
+    )
+
+
+# Caractères qui peuvent ne rien ajouter à la sortie ; la règle du shadda
+# regarde les deux dernières entrées de la sortie, un morceau doit donc
+# commencer par deux caractères qui ajoutent chacun une entrée
+_SILENT = frozenset(
+    (alphabet.ALIF, alphabet.ALIF_MAKSURA, alphabet.HAMZA, alphabet.SHADDA,
+     alphabet.ALIF_WITH_HAMZA_ABOVE, alphabet.ALIF_WITH_HAMZA_BELOW)
+)
+# Caractères dont la règle dépend de la position absolue dans le texte, ou
+# qui peuvent consommer les suivants, être déplacés ou supprimés par normalize
+# (le lam regarde le caractère avant l'espace pour les lettres solaires)
+_UNSAFE_START = _SILENT | alphabet.VOWELS | alphabet.TANWIN | frozenset(
+    (" ", alphabet.LAM, alphabet.ALIF_WITH_MADDA_ABOVE, alphabet.ALIF_WITH_HAMZAT_WASL,
+     alphabet.TATWEEL)
+)
+
+# Entrées de `out` relues par une règle : long_a_rule réécrit out[-1] (la
+# fatha), shadda_rule lit out[-2] et le lam placé deux caractères avant
+# le shadda le consomme
+_LEFT_ENTRIES = {
+    alphabet.ALIF: 1,
+    alphabet.ALIF_MAKSURA: 1,
+    alphabet.SHADDA: 2,
+}
+
+
+def is_safe_boundary(text, k):
+    """Vrai si text[:k] et text[k:] se translittèrent comme text entier.
+
+    Une coupure est sûre juste après l'espace qui suit une ponctuation de fin
+    de phrase : le mot suivant est un début de phrase dans les deux cas et
+    aucune règle ne regarde au-delà de l'espace, tant que ce mot commence par
+    une consonne ordinaire.
+    """
+    return (
+        2 <= k < len(text) - 2
+        and text[k - 1] == " "
+        and text[k - 2] in SENTENCE_ENDS
+        and text[k] not in _UNSAFE_START
+        and text[k + 1] not in _SILENT
+        # deux signes diacritiques de suite peuvent être réordonnés par normalize
+        and not (combining(text[k + 1]) and combining(text[k + 2]))
+    )
+
+
+def is_safe_split(text, k):
+    """Comme is_safe_boundary, pour une coupure après n'importe quel espace.
+
+    Le mot qui suit la coupure devient un début de phrase : seules les règles
+    de l'alif (article, Allah) et du lam le lisent, ainsi que le contexte
+    tanwin avant l'espace. Un mot qui commence par un caractère de
+    _UNSAFE_START ou par un signe diacritique n'est donc jamais détaché.
+    """
+    return (
+        2 <= k < len(text) - 2
+        and text[k - 1] == " "
+        and text[k - 2] not in alphabet.TANWIN
+        and text[k] not in _UNSAFE_START
+        and not combining(text[k])
+        and text[k + 1] not in _SILENT
+        and not (combining(text[k + 1]) and combining(text[k + 2]))
+    )
+
+
+def is_mid(text, i):
+    return (
+        not is_word_start(text, i)
+        and i + 1 < len(text)
+        and text[i + 1] != " "
+    )
+
+
+def default_rule(translator, text, i, out, after_tanwin):
+    out.append(translator.get(text[i]))
+    if char_at(text, i + 1) in (alphabet.SUKUN, alphabet.SMALL_HIGH_ROUNDED_ZERO):
+        if char_at(text, i - 1) == alphabet.ALIF and is_word_start(text, i - 1):
+            out[-1] = translator.get(text[i]) + "-"
+    return i + 1
+
+
+def punctuation_rule(translator, text, i, out, after_tanwin):
+    # Utiliser le mapping de ponctuation si disponible, sinon conserver tel quel
+    out.append(translator.punctuation_mapping.get(text[i], text[i]))
+    return i + 1
+
+
+def allah_rule(translator, text, i, out, after_tanwin):
+    """Mot "الله" : l'alif est suivi de lam, lam, ha"""
+    # Par défaut, utiliser "l-"
+    prefix = "l-"
+    # Cas 1: UNIQUEMENT début de phrase (pas simplement début de mot)
+    if is_sentence_start(text, i):
+        prefix = "al-"
+    # Cas 2: Précédé par un tanwin
+    elif after_tanwin or char_at(text, i - 1) in alphabet.TANWIN:
+        prefix = "il-"
+
+    # Vérifier si HA a des diacritiques
+    vowel = char_at(text, i + 4)
+    if vowel in alphabet.VOWELS:
+        out.append(f"{prefix}lāh{translator.get(vowel)}")
+        return i + 5
+    out.append(f"{prefix}lāh")
+    return i + 4
+
+
+def alif_rule(translator, text, i, out, after_tanwin):
+    if text[i + 1:i + 4] == alphabet.LAM + alphabet.LAM + alphabet.HA:
+        return allah_rule(translator, text, i, out, after_tanwin)
+    return long_a_rule(translator, text, i, out, after_tanwin)
+
+
+def long_a_rule(translator, text, i, out, after_tanwin):
+    """Alif ou alif maksura après une fatha : la voyelle s'allonge"""
+    if char_at(text, i - 1) == alphabet.FATHA:
+        out[-1] = "ā"
+    return i + 1
+
+
+def hamza_rule(translator, text, i, out, after_tanwin):
+    if is_mid(text, i):
+        out.append("'")
+    return i + 1
+
+
+def lam_rule(translator, text, i, out, after_tanwin):
+    sun = text[i + 1] if char_at(text, i + 2) == alphabet.SHADDA else False
+    prev = char_at(text, i - 1)
+
+    # handle alif lam (article défini)
+    if prev == alphabet.ALIF:
+        p = i - 1
+        # Cas 1: UNIQUEMENT début de phrase (pas simplement début de mot)
+        if is_sentence_start(text, p):
+            prefix = "a" if sun else "al-"
+        # Cas 2: Précédé par un tanwin
+        elif (char_at(text, p - 3) in alphabet.TANWIN
+              or char_at(text, p - 2) in alphabet.TANWIN):
+            prefix = "i" if sun else "il-"
+        # Cas 3: Autres cas (milieu de phrase)
+        else:
+            prefix = "" if sun else "l-"
+        out.append(prefix)
+
+    # handle alif with hamzat wasl
+    elif prev == alphabet.ALIF_WITH_HAMZAT_WASL:
+        out[-1] = "a" if i == 1 else "l-"
+
+    # Autres cas pour lam
+    else:
+        out.append("" if sun else "l")
+
+    # Traitement des lettres solaires
+    if sun:
+        sep = "-" if is_word_start(text, i - 1) else ""
+        out.append(sep.join([translator.get(sun)] * 2))
+        return i + 3
+    return i + 1
+
+
+def hamzat_wasl_rule(translator, text, i, out, after_tanwin):
+    out.append("i")
+    return i + 1
+
+
+def madda_rule(translator, text, i, out, after_tanwin):
+    out.append("ā" if i == 0 else "'ā")
+    return i + 1
+
+
+def _clamped(text, i):
+    # next(n) de ArabicText s'arrête sur le dernier caractère du texte
+    return text[min(i, len(text) - 1)]
+
+
+def _long_vowel_rule(short, long, semi_vowel, doubled, vowels_after_shadda):
+    """Voyelle brève suivie de sa lettre de prolongation (kasra + ya, damma + waw)"""
+
+    def rule(translator, text, i, out, after_tanwin):
+        if char_at(text, i + 1) != semi_vowel:
+            return default_rule(translator, text, i, out, after_tanwin)
+        if char_at(text, i + 2) == alphabet.SHADDA:
+            out.append(doubled)
+            vowel = _clamped(text, i + 3)
+            if vowel in vowels_after_shadda:
+                out.append(translator.get(vowel))
+                return i + 4
+            return i + 3
+        if _clamped(text, i + 2) not in alphabet.VOWELS:
+            out.append(long)
+            return i + 2
+        out.append(short)
+        return i + 1
+
+    return rule
+
+
+kasra_rule = _long_vowel_rule(
+    "i", "ī", alphabet.YA, "iyy", frozenset((alphabet.DAMMA, alphabet.FATHA))
+)
+damma_rule = _long_vowel_rule(
+    "u", "ū", alphabet.WAW, "uww", frozenset((alphabet.DAMMA, alphabet.FATHA, alphabet.KASRA))
+)
+
+
+def shadda_rule(translator, text, i, out, after_tanwin):
+    vow = text[max(i - 2, 0)]
+    prev = char_at(text, i - 1)
+    # if preceded by YA
+    if prev == alphabet.YA:
+        if (vow == alphabet.KASRA and is_mid(text, i)) or vow == alphabet.FATHA:
+            out.append("y")
+    # if preceded by WAW
+    elif prev == alphabet.WAW:
+        if vow in (alphabet.DAMMA, alphabet.FATHA):
+            out.append("w")
+    elif prev is not None and is_mid(text, i - 1):
+        if len(out) >= 2 and (not out[-2] == "l-"):
+            out.append(translator.get(prev))
+    return i + 1
+
+
+RULES = (
+    (alphabet.ALIF, alif_rule),
+    (alphabet.HAMZA, hamza_rule),
+    (alphabet.ALIF_WITH_HAMZA_ABOVE, hamza_rule),
+    (alphabet.ALIF_WITH_HAMZA_BELOW, hamza_rule),
+    (alphabet.LAM, lam_rule),
+    (alphabet.ALIF_WITH_HAMZAT_WASL, hamzat_wasl_rule),
+    (alphabet.ALIF_MAKSURA, long_a_rule),
+    (alphabet.ALIF_WITH_MADDA_ABOVE, madda_rule),
+    (alphabet.KASRA, kasra_rule),
+    (alphabet.DAMMA, damma_rule),
+    (alphabet.SHADDA, shadda_rule),
+)
+
+
+def apply_rules(translator, text, i, stop, dispatch, out, after_tanwin):
+    """Applique les règles de text[i] jusqu'à `stop` (qu'une règle peut dépasser).
+
+    Retourne l'index atteint et l'état after_tanwin à ce point.
+    """
+    default = default_rule
+    tanwin = alphabet.TANWIN
+    while i < stop:
+        caracter = text[i]
+        # Suivre si on est après un tanwin pour le prochain caractère
+        if caracter in tanwin:
+            after_tanwin = True
+        elif caracter != " ":
+            # Réinitialiser si ce n'est pas un espace (car les espaces ne changent pas cet état)
+            after_tanwin = False
+
+        # Chaque règle consomme son caractère (et éventuellement les suivants)
+        i = dispatch.get(caracter, default)(translator, text, i, out, after_tanwin)
+    return i, after_tanwin
+
+
+def apply_rules_aligned(translator, text, i, stop, dispatch, out, after_tanwin, origins):
+    """Comme apply_rules, en ajoutant à `origins` l'index du caractère qui a
+    déclenché chaque entrée ajoutée à `out`. Une entrée réécrite par une
+    règle suivante (out[-1] = "ā") garde son origine."""
+    default = default_rule
+    tanwin = alphabet.TANWIN
+    while i < stop:
+        caracter = text[i]
+        if caracter in tanwin:
+            after_tanwin = True
+        elif caracter != " ":
+            after_tanwin = False
+        size = len(out)
+        next_i = dispatch.get(caracter, default)(translator, text, i, out, after_tanwin)
+        origins.extend([i] * (len(out) - size))
+        i = next_i
+    return i, after_tanwin
+
+
+def apply_spans(translator, text, dispatch, simple, out, positions=None):
+    """Comme apply_rules sur tout `text`, en ne passant par les règles que
+    les fenêtres autour des caractères contextuels.
+
+    `simple` vient de compile_simple. Les portions que le motif accepte
+    sont traduites d'un bloc par translate_simple ; chaque
+    caractère refusé passe par apply_rules, précédé de quoi produire les
+    entrées de `out` que sa règle relit (_LEFT_ENTRIES) et suivi, pour un
+    alif, du caractère suivant (lettre suivie d'un sukun après un alif
+    initial).
+
+    `positions` remplace le motif par la liste croissante des caractères
+    contextuels, déjà calculée (voir masks.trigger_positions) ; la table de
+    `simple` doit alors traduire chaque caractère (compile_simple ne l'a
+    pas vidée).
+    """
+    match = simple[0].match
+    count = len(positions) if positions is not None else 0
+    h = 0
+    left_entries = _LEFT_ENTRIES
+    pair_first = _PAIR_FIRST
+    get_rule = dispatch.get
+    default = default_rule
+    tanwin = alphabet.TANWIN
+    alif = alphabet.ALIF
+    end = len(text)
+    size = len(out)
+    # début des entrées produites par les règles depuis le dernier bloc
+    first = None
+    i = 0
+    while i < end:
+        if positions is None:
+            hot = match(text, i).end()
+        else:
+            # les règles ont pu consommer les positions suivantes
+            h = bisect_left(positions, i, h)
+            hot = positions[h] if h < count else end
+        if hot == end:
+            out.append(translate_simple(text[i:], simple))
+            break
+        char = text[hot]
+        start = hot
+        entries = left_entries.get(char, 0)
+        while start > i and entries:
+            start -= 1
+            if text[start] not in _SILENT:
+                entries -= 1
+        # ne pas couper une paire du motif
+        while start > i and text[start - 1] in pair_first:
+            start -= 1
+        if entries and first is not None:
+            # les entrées manquantes seraient dans le dernier bloc
+            if len(out) - first < entries:
+                # cas rare (caractères muets accolés) : tout reprendre
+                del out[size:]
+                apply_rules(translator, text, 0, end, dispatch, out, False)
+                return
+        elif start > i:
+            out.append(translate_simple(text[i:start], simple))
+            first = len(out)
+        after_tanwin = False
+        if text[start] == " ":
+            # état after_tanwin de apply_rules : les espaces ne le changent pas
+            k = start - 1
+            while k >= 0 and text[k] == " ":
+                k -= 1
+            after_tanwin = k >= 0 and text[k] in tanwin
+        stop = hot + 2 if char == alif and hot + 1 < end else hot + 1
+        # boucle de apply_rules, sans l'appel
+        i = start
+        while i < stop:
+            char = text[i]
+            if char in tanwin:
+                after_tanwin = True
+            elif char != " ":
+                after_tanwin = False
+            i = get_rule(char, default)(translator, text, i, out, after_tanwin)
+
+
+# Espaces puis mot (ou espaces seules) : morceaux que translate_simple traduit
+# chacun comme dans le bloc entier, ses motifs ne franchissant pas une espace
+# (sauf la première du doublement de l'article, en tête de morceau)
+_PIECE = re.compile(" *[^ ]+| +")
+
+
+def _spread(start, size, count):
+    """`count` origines réparties dans l'ordre sur start..start + size - 1"""
+    if count == size:
+        return range(start, start + size)
+    if not size:
+        return [start] * count
+    return [start + k * size // count for k in range(count)]
+
+
+def _simple_aligned(text, i, stop, simple, origins):
+    """translate_simple(text[i:stop], simple), en ajoutant à `origins`
+    l'index source de chaque caractère produit.
+
+    La granularité est le mot : chaque espace correspond à son espace, et
+    les caractères produits par un mot sont répartis, dans l'ordre, sur ses
+    caractères source. La table `espaces` de compile_simple dit quelles
+    espaces de la sortie viennent d'une espace source.
+    """
+    block = text[i:stop]
+    output = translate_simple(block, simple)
+    tokens = output.split(" ")
+    kinds = block.translate(simple[4])
+    if len(kinds) != len(tokens) - 1:
+        # sortie inattendue : un mot à la fois
+        parts = []
+        for match in _PIECE.finditer(text, i, stop):
+            start, end = match.span()
+            piece = match.group()
+            word = start + len(piece) - len(piece.lstrip(" "))
+            produced = translate_simple(piece, simple)
+            parts.append(produced)
+            origins.extend(range(start, word))
+            origins.extend(_spread(word, end - word, len(produced) - (word - start)))
+        return "".join(parts)
+    words = block.split(" ")
+    position = i
+    w = 0
+    length = len(tokens[0])
+    for kind, token in zip(kinds, tokens[1:]):
+        if kind == " ":
+            size = len(words[w])
+            origins.extend(_spread(position, size, length))
+            position += size
+            origins.append(position)
+            position += 1
+            w += 1
+            length = len(token)
+        else:
+            length += 1 + len(token)
+    origins.extend(_spread(position, len(words[w]), length))
+    return output
+
+
+def apply_spans_aligned(translator, text, dispatch, simple, out, origins):
+    """Comme apply_spans (sans `positions`), en ajoutant à `origins` une
+    origine par entrée de `out` : l'index du caractère qui a déclenché une
+    règle (voir apply_rules_aligned), ou pour un bloc traduit par
+    translate_simple la liste des index de chacun de ses caractères (voir
+    _simple_aligned).
+    """
+    match = simple[0].match
+    left_entries = _LEFT_ENTRIES
+    pair_first = _PAIR_FIRST
+    get_rule = dispatch.get
+    default = default_rule
+    tanwin = alphabet.TANWIN
+    alif = alphabet.ALIF
+    end = len(text)
+    size = len(out)
+    first = None
+    i = 0
+    while i < end:
+        hot = match(text, i).end()
+        if hot == end:
+            block = []
+            out.append(_simple_aligned(text, i, end, simple, block))
+            origins.append(block)
+            break
+        char = text[hot]
+        start = hot
+        entries = left_entries.get(char, 0)
+        while start > i and entries:
+            start -= 1
+            if text[start] not in _SILENT:
+                entries -= 1
+        while start > i and text[start - 1] in pair_first:
+            start -= 1
+        if entries and first is not None:
+            if len(out) - first < entries:
+                del out[size:]
+                del origins[size:]
+                apply_rules_aligned(translator, text, 0, end, dispatch, out, False, origins)
+                return
+        elif start > i:
+            block = []
+            out.append(_simple_aligned(text, i, start, simple, block))
+            origins.append(block)
+            first = len(out)
+        after_tanwin = False
+        if text[start] == " ":
+            k = start - 1
+            while k >= 0 and text[k] == " ":
+                k -= 1
+            after_tanwin = k >= 0 and text[k] in tanwin
+        stop = hot + 2 if char == alif and hot + 1 < end else hot + 1
+        i = start
+        while i < stop:
+            char = text[i]
+            if char in tanwin:
+                after_tanwin = True
+            elif char != " ":
+                after_tanwin = False
+            count = len(out)
+            next_i = get_rule(char, default)(translator, text, i, out, after_tanwin)
+            origins.extend([i] * (len(out) - count))
+            i = next_i
+
+
+def compile_rules(punctuation):
+    """Construit le dictionnaire de dispatch caractère -> règle.
+
+    La ponctuation est prioritaire sur toutes les autres règles.
+    """
+    dispatch = dict(RULES)
+    dispatch.update(dict.fromkeys(punctuation, punctuation_rule))
+    return dispatch
+
+
+# Caractères de substitution (zone d'usage privé) posés par la table de
+# compile_simple, puis remplacés selon leur voisin par translate_simple
+# (None : caractère sans sortie, comme le sukun)
+_MARKS = {char: chr(0xE000 + k) for k, char in enumerate((
+    alphabet.FATHA, alphabet.KASRA, alphabet.DAMMA, alphabet.ALIF, alphabet.ALIF_MAKSURA,
+    alphabet.ALIF_WITH_HAMZAT_WASL, alphabet.LAM, None,
+))}
+# Tiret de l'article devant une lettre solaire, pour translate_simple
+_HYPHEN = chr(0xE000 + len(_MARKS))
+# Caractères qui peuvent commencer ou continuer une suite de caractères du
+# motif de compile_simple sans être le dernier
+_PAIR_FIRST = frozenset((
+    alphabet.FATHA, alphabet.KASRA, alphabet.DAMMA, alphabet.ALIF, alphabet.ALIF_WITH_HAMZAT_WASL,
+    alphabet.LAM,
+))
+
+
+class _Table(dict):
+    """Table de str.translate : un caractère inconnu donne une espace,
+    comme ArabTransliterator.get"""
+
+    def __missing__(self, code):
+        return " "
+
+
+class _Spaces(dict):
+    """Table de str.translate qui remplace chaque caractère par les espaces
+    qu'il produit avec la table de compile_simple : " " pour une espace,
+    "x" pour une espace produite par un autre caractère (inconnu...)"""
+
+    def __missing__(self, code):
+        return "x"
+
+
+def compile_simple(translator, dispatch):
+    """Chemin rapide pour les portions où aucune règle ne dépend du contexte.
+
+    Retourne (motif, table, corrections, doublements, espaces), voir
+    translate_simple et _simple_aligned. Le motif
+    accepte une suite de caractères (ou de paires) dont la règle, à cette
+    position, revient à une valeur fixe : lettres et signes de la table de
+    translittération, ponctuation, fatha + alif (ā), kasra + ya (ī), damma +
+    waw (ū), article "ال" en milieu de phrase sans lettre solaire (l-),
+    alif et alif maksura muets, lam isolé... Le shadda, les hamzas et le
+    mot Allah restent des déclencheurs. Si la ponctuation remplace l'une de
+    ces règles, le motif n'accepte rien.
+    """
+    marks = _MARKS
+    fatha, kasra, damma = alphabet.FATHA, alphabet.KASRA, alphabet.DAMMA
+    alif, maksura, lam = alphabet.ALIF, alphabet.ALIF_MAKSURA, alphabet.LAM
+    wasl, shadda = alphabet.ALIF_WITH_HAMZAT_WASL, alphabet.SHADDA
+    ya, waw, ha = alphabet.YA, alphabet.WAW, alphabet.HA
+    tanwin = "".join(sorted(alphabet.TANWIN))
+    ends = re.escape("".join(sorted(SENTENCE_ENDS)))
+    vowels = "".join(sorted(alphabet.VOWELS))
+    # (caractère, règle, valeur) des caractères traités par paires
+    special = (
+        (fatha, default_rule, translator.get(fatha)), (kasra, kasra_rule, translator.get(kasra)),
+        (damma, damma_rule, translator.get(damma)), (alif, alif_rule, ""),
+        (maksura, long_a_rule, ""), (wasl, hamzat_wasl_rule, "i"), (lam, lam_rule, "l"),
+        (ya, default_rule, translator.get(ya)), (waw, default_rule, translator.get(waw)),
+        (ha, default_rule, translator.get(ha)), (shadda, shadda_rule, None),
+    )
+    if any(dispatch.get(char, default_rule) is not rule for char, rule, _ in special):
+        return re.compile(""), {}, (), (), {}
+
+    table = _Table()
+    for char, rule in dispatch.items():
+        if rule is punctuation_rule:
+            table[ord(char)] = translator.punctuation_mapping.get(char, char)
+    for char, value in translator.table.items():
+        if char not in dispatch:
+            table[ord(char)] = value
+    table[ord(" ")] = " "
+    single = "".join(re.escape(chr(code)) for code in table if chr(code) not in marks)
+    # lettres que shadda_rule et lam_rule doublent telles quelles
+    letters = "".join(
+        char for char in translator.table
+        if char not in dispatch and char not in (ya, waw) and not combining(char)
+    )
+    table[ord(_HYPHEN)] = "-"
+    known = "".join(re.escape(char) for char in set(dispatch) | set(map(chr, table)))
+    for char, _, value in special:
+        if char in marks:
+            table[ord(char)] = marks[char]
+    # les caractères sans sortie gardent une marque, pour que deux marques
+    # voisines viennent de deux caractères voisins
+    silent = _MARKS[None]
+    for code, value in table.items():
+        if value == "":
+            table[code] = silent
+
+    alternatives = (
+        # article devant une lettre solaire, en début de mot : " x-x"
+        f"(?<=[^{tanwin}][^{ends}{tanwin}]) {alif}{lam}[{letters}]{shadda}",
+        # lettre doublée en milieu de mot, après une lettre qui n'est pas muette
+        f"(?<=[^ {lam}{wasl}{''.join(sorted(_SILENT))}])[{letters}]{shadda}",
+        f"[{single}]",
+        # caractères sans translittération : une espace (default_rule)
+        f"[^{known}]",
+        f"{fatha}(?![{alif}{maksura}])",
+        f"(?<=[^ {fatha}]){alif}(?!{lam})",
+        # article en milieu de phrase, ni Allah ni lettre solaire
+        f"(?<=[^{tanwin}][^{ends}{tanwin}] |[^{tanwin}][^{tanwin}][^ {fatha}]){alif}{lam}"
+        f"(?!{lam}{ha})(?![\\s\\S]{shadda})",
+        f"(?<!{fatha}){maksura}",
+        f"{kasra}(?!{ya})",
+        f"{kasra}{ya}(?![{vowels}{shadda}])",
+        f"{damma}(?!{waw})",
+        f"{damma}{waw}(?![{vowels}{shadda}])",
+        f"{wasl}(?!{lam})",
+        f"(?<=[\\s\\S]){wasl}{lam}(?![\\s\\S]{shadda})",
+        f"(?<![{alif}{wasl}]){lam}(?![\\s\\S]{shadda})",
+    )
+    # les paires d'abord, puis les marques restées seules
+    corrections = (
+        (marks[fatha] + marks[alif], "ā"),
+        (marks[fatha] + marks[maksura], "ā"),
+        (marks[kasra] + translator.get(ya), "ī"),
+        (marks[damma] + translator.get(waw), "ū"),
+        (marks[alif] + marks[lam], "l-"),
+        (marks[wasl] + marks[lam], "l-"),
+        *((marks[char], value) for char, _, value in special if char in marks),
+        (silent, ""),
+    )
+    doubled = (
+        (re.compile(f" {alif}{lam}([{letters}]){shadda}"), lambda match: " " + match[1] + _HYPHEN + match[1]),
+        (re.compile(f"([{letters}]){shadda}"), lambda match: match[1] * 2),
+    )
+    spaces = _Spaces({code: "x" * value.count(" ") for code, value in table.items()})
+    spaces[ord(" ")] = " "
+    # le shadda d'un bloc disparaît avec les doublements, avant la table
+    spaces[ord(shadda)] = ""
+    return re.compile("(?:" + "|".join(alternatives) + ")*"), table, corrections, doubled, spaces
+
+
+def translate_simple(text, simple):
+    """Translittère une portion acceptée par le motif de compile_simple.
+
+    Les lettres doublées par un shadda sont d'abord écrites deux fois dans
+    le texte source ; la table pose ensuite des marques sur les caractères
+    dont la sortie dépend du voisin, que les corrections remplacent.
+    """
+    if alphabet.SHADDA in text:
+        for pattern, double in simple[3]:
+            text = pattern.sub(double, text)
+    text = text.translate(simple[1])
+    for old, new in simple[2]:
+        if old in text:
+            text = text.replace(old, new)
+    return text
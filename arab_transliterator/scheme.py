@@ -0,0 +1,214 @@
+"""Schémas de translittération décrits par des fichiers JSON (dossier schemes/).
+
+Un schéma est un objet JSON :
+
+- ``name``, ``description``
+- ``engine`` : ``"rules"`` (les règles contextuelles, article, Allah...) ou
+  ``"table"`` (un caractère après l'autre, sans contexte)
+- ``letters`` : transcription de chaque caractère ; pour le moteur ``rules``,
+  seulement celles qui diffèrent de mapping._mapping
+- ``output`` (``rules``) : caractères de la sortie des règles à remplacer,
+  par exemple ``"ā"`` par ``"aa"``
+- ``shadda`` (``table``) : ``"double"`` pour écrire deux fois la lettre
+- ``reversible`` (``table``) : vérifie que deux caractères n'ont jamais la
+  même transcription
+
+load_scheme compile un schéma une seule fois par processus. Les schémas
+fournis peuvent aussi être compilés d'avance et sérialisés par marshal dans
+SCHEMES_CACHE (``python -m arab_transliterator.scheme``) : les lancements
+suivants n'ont alors ni json à importer, ni fichier JSON à analyser, ni
+schéma à compiler.
+"""
+from functools import lru_cache
+import marshal
+import os
+import re
+
+from . import alphabet
+from .mapping import _mapping
+
+SCHEMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemes")
+SCHEMES_CACHE = os.path.join(SCHEMES_DIR, "schemes.marshal")
+DEFAULT_SCHEME = "ala-lc"
+# Version du contenu de SCHEMES_CACHE, à changer avec les attributs de Scheme
+_CACHE_FORMAT = 2
+
+ENGINES = ("rules", "table")
+
+# Lettre, signes qui la suivent, shadda (pour le moteur table)
+_DOUBLED = re.compile(
+    f"([^ {alphabet.FATHATAN}-{alphabet.SUKUN}])([{alphabet.FATHATAN}-{alphabet.KASRA}]*){alphabet.SHADDA}"
+)
+
+
+class Scheme:
+    """Schéma compilé, prêt pour le moteur ; voir compile_scheme.
+
+    Pour le moteur ``rules``, ``letters`` remplace ArabTransliterator.table,
+    ``output`` est une table de str.translate appliquée après postprocess (ou
+    None) et ``letter_class`` la classe des lettres latines que postprocess
+    reconnaît autour des tirets. Pour le moteur ``table``, ``table`` est la
+    table de str.translate du texte entier.
+    """
+
+    __slots__ = ("name", "description", "engine", "letters", "output", "letter_class",
+                 "table", "double_shadda", "reversible")
+
+    def __repr__(self):
+        return f"Scheme({self.name!r}, engine={self.engine!r})"
+
+    def transliterate(self, text):
+        """Translittération par le moteur ``table``"""
+        if self.double_shadda and alphabet.SHADDA in text:
+            text = _DOUBLED.sub(r"\1\1\2", text)
+        return text.translate(self.table)
+
+
+def _strings(data, key, name):
+    values = data.get(key, {})
+    if not isinstance(values, dict) or not all(
+        isinstance(char, str) and len(char) == 1 and isinstance(value, str)
+        for char, value in values.items()
+    ):
+        raise ValueError(f"scheme {name!r}: {key!r} must map single characters to strings")
+    return values
+
+
+def compile_scheme(data):
+    """Scheme à partir du contenu d'un fichier de schéma (un dictionnaire)"""
+    name = data.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError("scheme without a name")
+    engine = data.get("engine", "rules")
+    if engine not in ENGINES:
+        raise ValueError(f"scheme {name!r}: unknown engine {engine!r}")
+    letters = _strings(data, "letters", name)
+    output = _strings(data, "output", name)
+
+    scheme = Scheme()
+    scheme.name = name
+    scheme.description = data.get("description", "")
+    scheme.engine = engine
+    scheme.output = None
+    scheme.table = None
+    scheme.double_shadda = False
+    scheme.reversible = False
+    if engine == "rules":
+        if "shadda" in data or "reversible" in data:
+            raise ValueError(f"scheme {name!r}: 'shadda' and 'reversible' need the table engine")
+        scheme.letters = {**_mapping, **letters} if letters else _mapping
+        if output:
+            scheme.output = str.maketrans(output)
+        # lettres latines ajoutées par le schéma, en plus de a-z
+        extra = sorted({
+            char for value in letters.values() for char in value
+            if char.isalpha() and not "a" <= char <= "z"
+        })
+        scheme.letter_class = "a-z" + "".join(map(re.escape, extra))
+    else:
+        if output:
+            raise ValueError(f"scheme {name!r}: 'output' needs the rules engine")
+        shadda = data.get("shadda")
+        if shadda not in (None, "double"):
+            raise ValueError(f"scheme {name!r}: 'shadda' must be \"double\"")
+        scheme.letters = letters
+        scheme.letter_class = "a-z"
+        scheme.table = str.maketrans(letters)
+        scheme.double_shadda = shadda == "double"
+        scheme.reversible = bool(data.get("reversible", False))
+        if scheme.reversible and len(set(letters.values())) < len(letters):
+            raise ValueError(f"scheme {name!r}: two characters share a transcription")
+    return scheme
+
+
+def available_schemes():
+    """Noms des schémas fournis avec le paquet"""
+    return sorted(name[:-5] for name in os.listdir(SCHEMES_DIR) if name.endswith(".json"))
+
+
+def _read(path):
+    import json
+
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _fields(scheme):
+    """Attributs de `scheme`, sérialisables par marshal ; pour le moteur
+    ``rules``, seules les lettres qui diffèrent de mapping._mapping"""
+    fields = {name: getattr(scheme, name) for name in Scheme.__slots__}
+    if scheme.engine == "rules":
+        fields["letters"] = {char: value for char, value in scheme.letters.items() if _mapping.get(char) != value}
+    return fields
+
+
+def _from_fields(fields):
+    """Scheme déjà compilé à partir du résultat de _fields"""
+    scheme = Scheme()
+    for name in Scheme.__slots__:
+        setattr(scheme, name, fields[name])
+    if scheme.engine == "rules":
+        scheme.letters = {**_mapping, **scheme.letters} if scheme.letters else _mapping
+    return scheme
+
+
+@lru_cache(maxsize=None)
+def _prebuilt():
+    """Attributs des schémas compilés de SCHEMES_CACHE (voir _fields), ou {}
+    si le fichier manque, est d'un autre format ou plus ancien qu'un des
+    fichiers de schéma ou que ce module"""
+    try:
+        built = os.stat(SCHEMES_CACHE).st_mtime
+        sources = [os.path.join(SCHEMES_DIR, f"{name}.json") for name in available_schemes()]
+        if any(os.stat(path).st_mtime > built for path in [__file__, *sources]):
+            return {}
+        with open(SCHEMES_CACHE, "rb") as file:
+            data = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != _CACHE_FORMAT:
+        return {}
+    return data["schemes"]
+
+
+def build_cache(path=SCHEMES_CACHE):
+    """Compile tous les schémas fournis et écrit leurs attributs dans `path` (marshal)"""
+    schemes = {
+        name: _fields(compile_scheme(_read(os.path.join(SCHEMES_DIR, f"{name}.json"))))
+        for name in available_schemes()
+    }
+    with open(path, "wb") as file:
+        marshal.dump({"format": _CACHE_FORMAT, "schemes": schemes}, file)
+    _prebuilt.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _load(name):
+    if name.endswith(".json"):
+        path = name
+    else:
+        fields = _prebuilt().get(name)
+        if fields is not None:
+            return _from_fields(fields)
+        path = os.path.join(SCHEMES_DIR, f"{name}.json")
+    try:
+        data = _read(path)
+    except FileNotFoundError:
+        raise ValueError(f"unknown scheme {name!r}, available: {', '.join(available_schemes())}") from None
+    return compile_scheme(data)
+
+
+def load_scheme(scheme=DEFAULT_SCHEME):
+    """Scheme compilé pour un nom de schéma fourni (voir available_schemes)
+    ou le chemin d'un fichier .json ; un Scheme est retourné tel quel.
+
+    Chaque schéma n'est lu et compilé qu'une fois par processus.
+    """
+    if isinstance(scheme, Scheme):
+        return scheme
+    return _load(scheme)
+
+
+if __name__ == "__main__":
+    build_cache()
+    print(f"{len(_prebuilt())} schemes written to {SCHEMES_CACHE}")
@@ -0,0 +1,361 @@
+"""Serveur HTTP de translittération (asyncio, bibliothèque standard seule).
+
+    python -m arab_transliterator.serve [--host 127.0.0.1] [--port 8000] [-j jobs]
+
+``POST /translate`` accepte :
+
+- ``{"text": "..."}`` -> ``{"result": "..."}``
+- ``{"texts": ["...", ...]}`` ou ``["...", ...]`` -> ``{"results": [...]}``
+- un corps NDJSON (``Content-Type: application/x-ndjson``), une chaîne ou un
+  objet ``{"text": ...}`` par ligne -> une ligne ``{"result": ...}`` par texte
+
+Le schéma de translittération (scheme.available_schemes) se choisit par
+``?scheme=...`` ou par une clé ``"scheme"`` de l'objet JSON.
+
+``GET /health`` répond ``{"status": "ok", ...}`` avec l'état des lots.
+
+Les textes des requêtes concurrentes sont regroupés en petits lots
+(MicroBatcher) envoyés à un pool de processus ; la boucle d'événements ne
+fait jamais le travail de translittération elle-même. Au-delà de
+`max_pending` textes en attente, le serveur répond 503 ; une requête qui
+contient à elle seule plus de `max_pending` textes reçoit 413, un
+Content-Length illisible 400, et une erreur inattendue (exception d'une
+règle...) 500. Si un processus de travail meurt, le pool est reconstruit et
+le lot réessayé une fois.
+"""
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import os
+from urllib.parse import parse_qs
+
+from .parallel import _init_worker, _translate_chunk
+from .scheme import available_schemes
+
+# Taille maximale d'un corps de requête
+MAX_BODY = 16 << 20
+
+_SCHEMES = frozenset(available_schemes())
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Overloaded(Exception):
+    """Trop de textes en attente, la requête est refusée"""
+
+
+class TooManyTexts(Exception):
+    """Plus de textes dans une requête que max_pending : elle serait refusée
+    même par un serveur inactif"""
+
+
+class MicroBatcher:
+    """Regroupe les textes des requêtes concurrentes en lots.
+
+    Un lot part dès qu'il atteint `max_batch` textes, ou `max_wait` secondes
+    après l'arrivée de son premier texte. Au plus `max_inflight` lots sont
+    traités à la fois par `executor`. Quand il est cassé (BrokenProcessPool),
+    `executor_factory`, s'il est donné, en crée un nouveau.
+    """
+
+    def __init__(self, executor, max_batch=256, max_wait=0.002, max_pending=10_000, max_inflight=2,
+                 executor_factory=None):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.executor = executor
+        self.executor_factory = executor_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._queue = deque()
+        self._arrived = asyncio.Event()
+        self._task = None
+        self.pending = 0
+        self.batches = 0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def translate(self, texts, scheme=None):
+        """Translittère `texts` avec `scheme` (un nom de schéma) et retourne la
+        liste des résultats, dans l'ordre"""
+        if not texts:
+            return []
+        if len(texts) > self.max_pending:
+            raise TooManyTexts(f"{len(texts)} texts in one request, at most {self.max_pending}")
+        if self.pending + len(texts) > self.max_pending:
+            raise Overloaded(f"{self.pending} texts pending")
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+        self.pending += len(texts)
+        self._queue.extend((text, future, scheme) for text, future in zip(texts, futures))
+        self._arrived.set()
+        try:
+            return await asyncio.gather(*futures)
+        finally:
+            self.pending -= len(texts)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            await self._arrived.wait()
+            # laisser le lot se remplir, sans dépasser max_wait
+            deadline = loop.time() + self.max_wait
+            while len(queue) < self.max_batch and loop.time() < deadline:
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+            await self._inflight.acquire()
+            batch = [queue.popleft() for _ in range(min(self.max_batch, len(queue)))]
+            if not queue:
+                self._arrived.clear()
+            self.batches += 1
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        # un lot peut mêler plusieurs schémas : un appel au pool par schéma
+        groups = {}
+        for text, future, scheme in batch:
+            groups.setdefault(scheme, []).append((text, future))
+        try:
+            await asyncio.gather(*(self._dispatch_group(scheme, items) for scheme, items in groups.items()))
+        finally:
+            self._inflight.release()
+
+    async def _run_chunk(self, texts, scheme):
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, _translate_chunk, texts, scheme)
+        except BrokenProcessPool:
+            # un seul remplacement, même si plusieurs lots l'ont vu cassé
+            if self.executor is executor and self.executor_factory is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = self.executor_factory()
+            raise
+
+    async def _dispatch_group(self, scheme, items):
+        texts = [text for text, _ in items]
+        try:
+            try:
+                results = await self._run_chunk(texts, scheme)
+            except BrokenProcessPool:
+                # processus de travail mort (tué, manque de mémoire...) : le
+                # lot est réessayé une fois sur le nouveau pool
+                results = await self._run_chunk(texts, scheme)
+        except Exception as error:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def _text_of(item):
+    if isinstance(item, dict):
+        item = item.get("text")
+    if not isinstance(item, str):
+        raise ValueError("expected a string or an object with a 'text' string")
+    return item
+
+
+def _json(status, payload):
+    return status, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _scheme_of(scheme):
+    if scheme is None:
+        return None
+    # seulement les schémas fournis, jamais un chemin de fichier
+    if scheme not in _SCHEMES:
+        raise ValueError(f"unknown scheme, available: {', '.join(sorted(_SCHEMES))}")
+    return scheme
+
+
+async def _translate_body(batcher, headers, body, scheme=None):
+    if "ndjson" in headers.get("content-type", ""):
+        lines = body.decode("utf-8").splitlines()
+        texts = [_text_of(json.loads(line)) for line in lines if line.strip()]
+        results = await batcher.translate(texts, _scheme_of(scheme))
+        payload = "".join(
+            json.dumps({"result": result}, ensure_ascii=False) + "\n" for result in results
+        )
+        return 200, "application/x-ndjson", payload.encode("utf-8")
+
+    data = json.loads(body)
+    if isinstance(data, dict):
+        scheme = data.get("scheme", scheme)
+        if "texts" in data:
+            data = data["texts"]
+    scheme = _scheme_of(scheme)
+    if isinstance(data, list):
+        results = await batcher.translate([_text_of(item) for item in data], scheme)
+        return _json(200, {"results": results})
+    result, = await batcher.translate([_text_of(data)], scheme)
+    return _json(200, {"result": result})
+
+
+async def _route(batcher, method, path, headers, body, query=""):
+    if path == "/health":
+        return _json(200, {"status": "ok", "pending": batcher.pending, "batches": batcher.batches})
+    if path != "/translate":
+        return _json(404, {"error": "not found"})
+    if method != "POST":
+        return _json(405, {"error": "use POST"})
+    try:
+        scheme = parse_qs(query).get("scheme", [None])[-1]
+        return await _translate_body(batcher, headers, body, scheme)
+    except Overloaded as error:
+        return _json(503, {"error": f"overloaded: {error}"})
+    except TooManyTexts as error:
+        return _json(413, {"error": str(error)})
+    except (ValueError, UnicodeDecodeError) as error:
+        # json.JSONDecodeError est une ValueError
+        return _json(400, {"error": str(error)})
+    except Exception as error:
+        # BrokenProcessPool, exception d'une règle... : le client reçoit une réponse
+        return _json(500, {"error": f"internal error: {type(error).__name__}: {error}"})
+
+
+async def _handle(batcher, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, path, version = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if "transfer-encoding" in headers:
+                status, content_type, payload = _json(411, {"error": "Content-Length required"})
+                keep_alive = False
+            else:
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, content_type, payload = _json(400, {"error": "invalid Content-Length"})
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, content_type, payload = _json(413, {"error": "body too large"})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    path, _, query = path.partition("?")
+                    status, content_type, payload = await _route(
+                        batcher, method, path, headers, body, query
+                    )
+                    keep_alive = (
+                        version.strip() == "HTTP/1.1"
+                        and headers.get("connection", "").lower() != "close"
+                    )
+
+            head = (
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            )
+            writer.write(head.encode("latin-1") + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        # connexion coupée ou requête illisible
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8000, jobs=None, max_batch=256, max_wait=0.002,
+                max_pending=10_000, ready=None):
+    """Lance le serveur jusqu'à son annulation.
+
+    `ready`, s'il est donné, est appelé avec le port d'écoute une fois le
+    serveur prêt (utile avec port=0).
+    """
+    jobs = jobs or os.cpu_count() or 1
+
+    def new_executor():
+        return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+
+    batcher = MicroBatcher(new_executor(), max_batch, max_wait, max_pending, max_inflight=2 * jobs,
+                           executor_factory=new_executor)
+    try:
+        batcher.start()
+        connections = set()
+
+        async def handle(reader, writer):
+            task = asyncio.current_task()
+            connections.add(task)
+            try:
+                await _handle(batcher, reader, writer)
+            finally:
+                connections.discard(task)
+
+        server = await asyncio.start_server(handle, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # fermer aussi les connexions keep-alive encore ouvertes
+            for task in list(connections):
+                task.cancel()
+            await asyncio.gather(*connections, return_exceptions=True)
+            await batcher.stop()
+    finally:
+        batcher.executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transliteration HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Number of worker processes (0 for all cores)")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Maximum number of texts per batch")
+    parser.add_argument("--max-wait", type=float, default=2.0,
+                        help="Maximum time a text waits for its batch to fill, in milliseconds")
+    parser.add_argument("--max-pending", type=int, default=10_000,
+                        help="Texts pending before new requests get a 503 (a larger single request gets a 413)")
+    args = parser.parse_args(argv)
+
+    def ready(port):
+        print(f"Serving on http://{args.host}:{port}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, args.max_batch,
+                          args.max_wait / 1000, args.max_pending, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
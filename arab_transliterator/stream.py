@@ -0,0 +1,140 @@
+"""Translittération en flux : mémoire bornée quelle que soit la taille de l'entrée."""
+from collections import deque
+from unicodedata import combining
+import io
+import re
+
+from .rules import is_safe_boundary, is_safe_split
+from .scheme import load_scheme
+from .transliterator import ArabTransliterator
+
+# Nombre de caractères lus à la fois dans une ligne trop longue
+DEFAULT_WINDOW = 1 << 16
+# Sans coupure sûre, un morceau est coupé de force au-delà de ce nombre de fenêtres
+MAX_WINDOWS = 4
+
+# Mot latin qui commence par l'article : la particule qui le précède ("wa l-")
+# ne peut pas en être séparée, voir reverse.compile_reverse
+_ARTICLE_START = re.compile(r"\w{0,2}-")
+
+
+def _is_safe_reverse_split(text, k):
+    """Comme rules.is_safe_split, pour un texte latin à translittérer en arabe"""
+    # le motif lit jusqu'à trois caractères après la coupure
+    return 0 < k < len(text) - 3 and text[k - 1] == " " and not _ARTICLE_START.match(text, k)
+
+
+def last_safe_boundary(text, start=0, safe=is_safe_boundary):
+    """Index de la dernière coupure sûre de `text` après `start`, ou 0 s'il
+    n'y en a pas ; `safe` est le test de coupure (rules.is_safe_boundary)"""
+    k = len(text)
+    while k > start:
+        # les coupures sûres suivent toujours un espace
+        k = text.rfind(" ", start, k) + 1
+        if k and safe(text, k):
+            return k
+        k -= 1
+    return 0
+
+
+def _forced_cut(text, start):
+    """Dernière espace après `start`, sinon dernier caractère qui n'est pas un
+    signe diacritique ; retourne (index, coupure_à_une_espace)"""
+    k = text.rfind(" ", start) + 1
+    if k:
+        return k, True
+    k = len(text) - 1
+    while k > start + 1 and combining(text[k]):
+        k -= 1
+    return k, False
+
+
+def iter_windows(stream, window=DEFAULT_WINDOW, reverse=False):
+    """Découpe un flux texte en morceaux à translittérer séparément.
+
+    Retourne des paires (texte, fin). `fin` vaut True pour le dernier morceau
+    d'une ligne, False pour un morceau coupé après une espace, None pour un
+    morceau coupé au milieu d'un mot. Chaque ligne est rendue seule ; une
+    ligne plus longue que `window` est coupée aux coupures sûres, celles de
+    rules.is_safe_boundary de préférence, sinon celles de rules.is_safe_split
+    (avec `reverse`, une espace qui ne précède pas un article latin). Seule la
+    fin lue depuis la fenêtre précédente est examinée. Sans aucune coupure
+    sûre sur MAX_WINDOWS fenêtres, le morceau est coupé de force à sa dernière
+    espace, ou au milieu d'un mot : la mémoire reste bornée, mais la sortie
+    peut alors différer de celle de translate().
+    Comme pour ``split("\\n")``, le dernier morceau est rendu même s'il est vide.
+    """
+    safe = _is_safe_reverse_split if reverse else is_safe_split
+    carry = ""
+    while True:
+        piece = stream.readline(window)
+        if not piece:
+            yield carry, True
+            return
+        # une coupure k dépend de text[k - 2:k + 3] : celles d'avant ont déjà été refusées
+        start = max(0, len(carry) - 3)
+        text = carry + piece
+        carry = ""
+        if text.endswith("\n"):
+            yield text[:-1], True
+        elif len(piece) < window:
+            # fin du flux sans retour à la ligne
+            carry = text
+        else:
+            cut = last_safe_boundary(text, start) or last_safe_boundary(text, start, safe)
+            end = False
+            if not cut and len(text) >= MAX_WINDOWS * window:
+                cut, at_space = _forced_cut(text, start)
+                end = False if at_space else None
+            if cut:
+                yield text[:cut], end
+                text = text[cut:]
+            carry = text
+
+
+def transliterate_stream(instream, outstream, translator=None, window=DEFAULT_WINDOW, jobs=1, scheme=None,
+                         reverse=False):
+    """Translittère `instream` (binaire, UTF-8) vers `outstream` (binaire).
+
+    La sortie est identique à celle de translate() appliqué à chaque ligne.
+    Avec `jobs` différent de 1, les morceaux sont répartis sur des processus.
+    `scheme` est le nom du schéma de translittération ; avec `reverse`,
+    l'entrée est en latin et la sortie celle de untranslate().
+    """
+    reader = io.TextIOWrapper(instream, encoding="utf-8", newline="\n")
+    writer = io.TextIOWrapper(outstream, encoding="utf-8", newline="\n", write_through=False)
+    line_ends = deque()
+
+    def texts():
+        for text, end in iter_windows(reader, window, reverse):
+            line_ends.append(end)
+            yield text
+
+    translator = translator or ArabTransliterator()
+    engine = (translator.scheme if scheme is None else load_scheme(scheme)).engine
+    # le moteur table garde les espaces du texte, les règles les retirent en bout de morceau
+    space = " " if engine == "rules" else ""
+    if jobs == 1:
+        many = translator.untranslate_many if reverse else translator.translate_many
+        results = many(texts(), scheme=scheme)
+    else:
+        from .parallel import translate_parallel
+        # les processus reprennent le schéma, la ponctuation et le cache
+        # persistant de `translator`, comme avec jobs=1
+        results = translate_parallel(texts(), jobs=jobs, scheme=scheme, reverse=reverse,
+                                     disk_cache=translator.disk_cache, translator=translator)
+
+    separator = ""
+    for result in results:
+        end = line_ends.popleft()
+        if result:
+            writer.write(separator)
+            writer.write(result)
+            # un morceau coupé au milieu d'un mot se recolle au suivant
+            separator = space if end is False else ""
+        if end:
+            writer.write("\n")
+            separator = ""
+    writer.flush()
+    writer.detach()
+    reader.detach()
@@ -0,0 +1,175 @@
+"""Découpage paresseux d'un flux de texte en mots et en phrases.
+
+Chaque étape est un générateur qui consomme la précédente, la mémoire utilisée
+ne dépend donc pas de la taille de l'entrée :
+
+    join(transliterate_sentences(sentences(normalize_tokens(tokenize(chunks)))))
+
+donne, morceau par morceau, la même sortie que translate() appliqué à chaque
+ligne, les lignes étant jointes par "\\n" (comme l'option -f en ligne de
+commande). Les mots sont les champs séparés par une espace : deux espaces de
+suite donnent un mot vide, pour que les mots joints par " " redonnent la ligne.
+"""
+from collections import deque
+
+from . import alphabet
+from .rules import SENTENCE_ENDS, is_safe_boundary
+from .transliterator import ArabTransliterator, normalize
+
+
+class Token:
+    """Un mot et le contexte que les règles lisent à sa gauche.
+
+    - ``start`` : position du mot dans le flux (retours à la ligne compris)
+    - ``line_end`` : dernier mot de sa ligne
+    - ``sentence_start`` : début de ligne ou mot qui suit une ponctuation de
+      fin de phrase (rules.is_sentence_start)
+    - ``after_tanwin`` : le dernier caractère non blanc avant le mot, sur la
+      même ligne, est un tanwin
+    - ``wasl`` : le mot commence par un alif avec hamzat wasl, sa voyelle
+      initiale s'élide après le mot précédent
+    """
+
+    __slots__ = ("text", "start", "line_end", "sentence_start", "after_tanwin", "wasl")
+
+    def __init__(self, text, start, line_end, sentence_start, after_tanwin, wasl):
+        self.text = text
+        self.start = start
+        self.line_end = line_end
+        self.sentence_start = sentence_start
+        self.after_tanwin = after_tanwin
+        self.wasl = wasl
+
+    def __repr__(self):
+        return (
+            f"Token({self.text!r}, start={self.start}, line_end={self.line_end}, "
+            f"sentence_start={self.sentence_start}, after_tanwin={self.after_tanwin}, wasl={self.wasl})"
+        )
+
+
+def _fields(chunks):
+    """(mot, début, fin_de_ligne) pour chaque champ du flux ; comme pour
+    ``split("\\n")``, la dernière ligne est rendue même si elle est vide."""
+    carry = ""
+    offset = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (carry + chunk).split("\n")
+        # le dernier champ de la dernière ligne peut continuer dans le morceau suivant
+        words = lines.pop().split(" ")
+        carry = words.pop()
+        for line in lines:
+            *inner, last = line.split(" ")
+            for word in inner:
+                yield word, offset, False
+                offset += len(word) + 1
+            yield last, offset, True
+            offset += len(last) + 1
+        for word in words:
+            yield word, offset, False
+            offset += len(word) + 1
+    yield carry, offset, True
+
+
+def _flagged(fields):
+    """Token pour chaque (mot, début, fin_de_ligne), avec son contexte gauche"""
+    tanwin = alphabet.TANWIN
+    wasl = alphabet.ALIF_WITH_HAMZAT_WASL
+    previous = None
+    index = 0
+    last = ""
+    for text, start, line_end in fields:
+        if previous is None:
+            sentence_start = True
+        elif previous:
+            sentence_start = previous[-1] in SENTENCE_ENDS
+        else:
+            # une seule espace en début de ligne
+            sentence_start = index == 1
+        yield Token(text, start, line_end, sentence_start, last in tanwin, text.startswith(wasl))
+        if line_end:
+            previous = None
+            index = 0
+            last = ""
+        else:
+            previous = text
+            index += 1
+            if text:
+                last = text[-1]
+
+
+def tokenize(chunks):
+    """Mots (Token) d'un flux de texte, donné comme un itérable de chaînes
+    (un fichier texte ouvert, une liste de lignes...) découpé n'importe où."""
+    return _flagged(_fields(chunks))
+
+
+def normalize_tokens(tokens):
+    """Applique normalize à chaque mot ; le contexte gauche est recalculé sur
+    le texte normalisé (normalize ne regarde jamais au-delà d'une espace)."""
+    return _flagged((normalize(token.text), token.start, token.line_end) for token in tokens)
+
+
+def _is_cut(previous, token, following):
+    """Vrai si la ligne peut être coupée juste avant `token` (rules.is_safe_boundary)"""
+    left = previous[-2:]
+    probe = left + " " + token.text
+    if following is not None and not token.line_end:
+        probe += " " + following.text[:2]
+    return is_safe_boundary(probe, len(left) + 1)
+
+
+def sentences(tokens):
+    """Regroupe les mots en listes translittérables séparément : chaque ligne,
+    coupée aux coupures sûres qui suivent une ponctuation de fin de phrase."""
+    tokens = iter(tokens)
+    sentence = []
+    token = next(tokens, None)
+    while token is not None:
+        following = next(tokens, None)
+        if sentence and token.sentence_start and _is_cut(sentence[-1].text, token, following):
+            yield sentence
+            sentence = []
+        sentence.append(token)
+        if token.line_end:
+            yield sentence
+            sentence = []
+        token = following
+
+
+def transliterate_sentences(sentences, translator=None, chunksize=256):
+    """(translittération, fin_de_ligne) pour chaque phrase, dans l'ordre.
+
+    Les mots doivent venir de normalize_tokens. Les phrases passent par
+    translate_many par paquets de `chunksize`.
+    """
+    translator = translator or ArabTransliterator()
+    line_ends = deque()
+
+    def texts():
+        for sentence in sentences:
+            line_ends.append(sentence[-1].line_end)
+            yield " ".join(token.text for token in sentence)
+
+    for result in translator.translate_many(texts(), chunksize=chunksize, normalized=True):
+        yield result, line_ends.popleft()
+
+
+def join(pieces):
+    """Morceaux de texte à écrire à la suite pour les (translittération,
+    fin_de_ligne) de transliterate_sentences."""
+    need_space = False
+    new_line = False
+    for result, line_end in pieces:
+        if new_line:
+            yield "\n"
+            new_line = False
+        if result:
+            if need_space:
+                yield " "
+            yield result
+            need_space = True
+        if line_end:
+            need_space = False
+            new_line = True
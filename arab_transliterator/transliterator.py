@@ -1,347 +1,701 @@
 from . import alphabet
 from .mapping import _mapping
-from .arab_text import ArabicText
+from .rules import (
+    _simple_aligned, apply_rules, apply_rules_aligned, apply_spans, apply_spans_aligned, compile_rules,
+    compile_simple, translate_simple,
+)
+from .scheme import _DOUBLED, DEFAULT_SCHEME, load_scheme
+from functools import lru_cache
+from itertools import islice
 import re
+import unicodedata
+
+# Symboles islamiques spéciaux, toujours traités comme de la ponctuation
+SPECIAL_SYMBOLS = ('ﷺ', 'ﷻ', 'ﷲ', '﷽', '﴿', '﴾')
+
+# Mapping des signes de ponctuation arabes vers latins, copié par chaque instance
+PUNCTUATION_MAPPING = {
+    '،': ',',  # Virgule arabe vers virgule latine
+    '؛': ';',  # Point-virgule arabe vers latin
+    '؟': '?',  # Point d'interrogation arabe vers latin
+    '﴿': '«',  # Inverser les symboles de citation coranique pour la lecture de gauche à droite
+    '﴾': '»',  # Inverser les symboles de citation coranique pour la lecture de gauche à droite
+}
+
+# Tables de dispatch et du chemin rapide déjà compilées dans ce processus,
+# partagées par toutes les instances : seule la première paie la compilation
+_dispatch_for = lru_cache(maxsize=None)(compile_rules)
+_SIMPLES = {}
+
+# En dessous de cette longueur, le découpage de rules.apply_spans coûte plus
+# qu'il ne rapporte
+_MIN_SPANS = 64
+# Même chose pour le calcul des déclencheurs par masques (vectorize)
+_MIN_VECTORIZE = 1 << 12
+
+
+# Le shadda doit précéder les voyelles et tanwin de sa lettre ; la forme NFC
+# les range dans l'ordre inverse (par classe combinatoire)
+_MARKS_BEFORE_SHADDA = re.compile(
+    f"([{alphabet.FATHATAN}-{alphabet.KASRA}]+){alphabet.SHADDA}"
+)
+# Un lam avec shadda mais sans voyelle ni tanwin reçoit une fatha (l-lāh) ;
+# devant un tanwin, elle donnerait "kullaun" pour كُلٌّ
+_LAM_SHADDA_WITHOUT_VOWEL = re.compile(
+    f"{alphabet.LAM}{alphabet.SHADDA}(?![{alphabet.FATHATAN}-{alphabet.KASRA}])"
+)
 
 
 def normalize(text):
-    # some text may have shadda coming after a vowel whic in this case
-    # will fail the script, so were swapping
-    text = list(text)
-    for i, c in enumerate(text):
-        if c == alphabet.SHADDA:
-            if text[i - 1] in alphabet.VOWELS:
-                text[i], text[i - 1] = text[i - 1], text[i]
-            elif (text[i - 1] == alphabet.LAM) and not (text[i + 1] in alphabet.VOWELS):
-                text.insert(i + 1, alphabet.FATHA)
+    """Forme canonique du texte avant translittération, en temps linéaire.
+
+    - forme Unicode NFC (alif + madda -> آ, etc.)
+    - suppression du tatweel
+    - shadda placé avant les voyelles et tanwin qui le précèdent, quel que
+      soit leur ordre dans le texte
+    - fatha ajoutée après un lam avec shadda sans voyelle ni tanwin
+    """
+    if not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+    if alphabet.TATWEEL in text:
+        text = text.replace(alphabet.TATWEEL, "")
+    if alphabet.SHADDA in text:
+        text = _LAM_SHADDA_WITHOUT_VOWEL.sub(alphabet.LAM + alphabet.SHADDA + alphabet.FATHA, text)
+        text = _MARKS_BEFORE_SHADDA.sub(alphabet.SHADDA + r"\1", text)
     return text
 
 
+# Suite de caractères sans espace
+_WORD = re.compile("[^ ]+")
+
+
+def _nfc_aligned(text, offsets):
+    """Forme NFC de `text`, en suivant `offsets`.
+
+    Les mots déjà en forme NFC sont gardés tels quels ; les autres sont
+    composés groupe par groupe (lettre de base et signes qui la suivent).
+    Si le résultat diffère de la forme NFC du texte entier, la
+    correspondance est approchée à partir de la forme entière.
+    """
+    from .alignment import align_replacement
+
+    normalized = unicodedata.normalize("NFC", text)
+    parts = []
+    new_offsets = []
+    last = 0
+    for match in _WORD.finditer(text):
+        word = match.group(0)
+        if unicodedata.is_normalized("NFC", word):
+            continue
+        start, end = match.span()
+        parts.append(text[last:start])
+        new_offsets.extend(offsets[last:start])
+        group_start = start
+        for group_end in range(start + 1, end + 1):
+            if group_end == end or not unicodedata.combining(text[group_end]):
+                group = text[group_start:group_end]
+                composed = unicodedata.normalize("NFC", group)
+                parts.append(composed)
+                if composed == group:
+                    new_offsets.extend(offsets[group_start:group_end])
+                else:
+                    new_offsets.extend(offsets[group_start + j] for j in align_replacement(group, composed))
+                group_start = group_end
+        last = end
+    parts.append(text[last:])
+    new_offsets.extend(offsets[last:])
+    if "".join(parts) != normalized:
+        return normalized, [offsets[j] for j in align_replacement(text, normalized)]
+    return normalized, new_offsets
+
+
+def _shadda_first(old, new):
+    # marques + shadda -> shadda + marques
+    return [len(old) - 1, *range(len(old) - 1)]
+
+
+def _normalize_aligned(text):
+    """normalize(text) et l'index dans `text` de chaque caractère du résultat"""
+    from .alignment import sub_aligned
+
+    offsets = list(range(len(text)))
+    if not unicodedata.is_normalized("NFC", text):
+        text, offsets = _nfc_aligned(text, offsets)
+    if alphabet.TATWEEL in text:
+        kept = [j for j, char in enumerate(text) if char != alphabet.TATWEEL]
+        text = text.replace(alphabet.TATWEEL, "")
+        offsets = [offsets[j] for j in kept]
+    if alphabet.SHADDA in text:
+        text, offsets = sub_aligned(
+            _LAM_SHADDA_WITHOUT_VOWEL,
+            lambda match: alphabet.LAM + alphabet.SHADDA + alphabet.FATHA, text, offsets,
+            lambda old, new: (0, 1, 1),
+        )
+        text, offsets = sub_aligned(
+            _MARKS_BEFORE_SHADDA, lambda match: alphabet.SHADDA + match.group(1), text, offsets,
+            _shadda_first,
+        )
+    return text, offsets
+
+
+# Post-traitement pour corriger certains problèmes spécifiques. Les anciennes
+# substitutions successives sont regroupées en trois passes compilées une seule
+# fois et sautées quand le texte ne contient pas leur déclencheur. L'ordre des
+# passes compte : la correction des tirets peut par exemple créer "lillah".
+# Chaque alternative commence par un caractère littéral pour que le moteur
+# d'expressions régulières puisse sauter directement aux candidats.
+
+# Les passes 1 à 3 dépendent de la classe des lettres latines, propre à
+# chaque schéma (scheme.Scheme.letter_class) ; elles sont compilées une fois
+# par classe.
+@lru_cache(maxsize=None)
+def _hyphen_patterns(letters):
+    return (
+        # 1. Assurer que "lah" est toujours écrit avec le macron: "l-lāh"
+        # 2. Corriger "wa l-" qui peut être écrit "wal-" par erreur
+        re.compile(rf'l-la(?=h)|wa(?=[{letters}]-)'),
+        # 3. Corriger les tirets mal placés
+        re.compile(rf'([{letters}])-([aeiou])'),
+    )
+
+
+_LAH_AND_WA, _MISPLACED_HYPHEN = _hyphen_patterns("a-z")
+
+# 4. Assurer que la forme "li + l-lāh" est correctement écrite "lillāh"
+# 5. Corriger les prépositions fusionnées avec Allah (bi, li, fa, wa)
+# 6. "Allah" en début de phrase (après ponctuation ; le début absolu est
+#    traité à part)
+# 7. "Allah" après tanwin
+_ALLAH_FORMS = re.compile(
+    r'li l-lāh'
+    r'|billah|lillah|fallah|fāllah|wallah|wāllah'
+    r'|\.\sl-lāh|!\sl-lāh|\?\sl-lāh|،\sl-lāh|؟\sl-lāh|\n\s*l-lāh'
+    r'|ⁿl-lāh|ᵐl-lāh|ⁱl-lāh'
+)
+
+_PREPOSITIONS = {"bi": "bi", "li": "li", "fa": "fa", "fā": "fa", "wa": "wa", "wā": "wa"}
+
+
+def _fix_lah_and_wa(match):
+    return "l-lā" if match.group(0) == "l-la" else "wa "
+
+
+def _fix_allah_form(match):
+    form = match.group(0)
+    if form == "li l-lāh":
+        return "lillāh"
+    if form.endswith("llah"):
+        return _PREPOSITIONS[form[:-4]] + "llāh"
+    if form[0] in "ⁿᵐⁱ":
+        return form[0] + "il-lāh"
+    return form[:-5] + "al-lāh"
+
+
+def postprocess(result, letters="a-z"):
+    """Corrige la sortie brute de la passe principale et normalise les espaces.
+
+    `letters` est la classe des lettres latines du schéma utilisé.
+    """
+    if "-" in result:
+        lah_and_wa, misplaced_hyphen = _hyphen_patterns(letters)
+        result = lah_and_wa.sub(_fix_lah_and_wa, result)
+        result = misplaced_hyphen.sub(r'\1\2', result)
+    if "l-lāh" in result or "llah" in result:
+        result = _ALLAH_FORMS.sub(_fix_allah_form, result)
+        if result.startswith("l-lāh"):
+            result = "a" + result
+    # Normaliser les espaces
+    return " ".join(filter(None, result.split(" ")))
+
+
+def _postprocess_aligned(result, offsets, letters="a-z"):
+    """postprocess(result) en suivant `offsets`, un index source par caractère"""
+    from .alignment import sub_aligned
+
+    if "-" in result:
+        lah_and_wa, misplaced_hyphen = _hyphen_patterns(letters)
+        result, offsets = sub_aligned(lah_and_wa, _fix_lah_and_wa, result, offsets)
+        result, offsets = sub_aligned(
+            misplaced_hyphen, lambda match: match.group(1) + match.group(2), result, offsets
+        )
+    if "l-lāh" in result or "llah" in result:
+        result, offsets = sub_aligned(_ALLAH_FORMS, _fix_allah_form, result, offsets)
+        if result.startswith("l-lāh"):
+            result = "a" + result
+            offsets = offsets[:1] + offsets
+    # Normaliser les espaces : une seule espace, rattachée à la dernière
+    # espace de la suite qu'elle remplace
+    words = []
+    kept = []
+    for match in _WORD.finditer(result):
+        start, end = match.span()
+        if words:
+            kept.append(offsets[start - 1] if start else offsets[0])
+        words.append(match.group(0))
+        kept.extend(offsets[start:end])
+    return " ".join(words), kept
+
+
+def _translate_aligned_table(result, offsets, table):
+    """result.translate(table) en suivant `offsets`"""
+    new_offsets = []
+    for char, offset in zip(result, offsets):
+        new = table.get(ord(char), char)
+        if new:
+            new_offsets.extend([offset] * len(new))
+    return result.translate(table), new_offsets
+
+
+def _doubled_first(old, new):
+    # lettre + signes + shadda -> lettre + lettre + signes
+    return [0, *range(len(new) - 1)]
+
+
 class ArabTransliterator:
-    def __init__(self):
-        self.table = _mapping
-        # Définir une liste de signes de ponctuation à préserver
-        self.punctuation = [
-            '،', '؟', '!', '.', ':', ';', '(', ')', '[', ']', '{', '}', '"', "'", '؛',
-            ',', '?', '-', '_', '/', '\\', '«', '»', '*', '&', '%', '$', '#', '@',
-            '+', '=', '<', '>', '|', '~', '^', '٠', '١', '٢', '٣', '٤', '٥', '٦', '٧', '٨', '٩',
-            '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
-            # Symboles islamiques spéciaux
-            'ﷺ', 'ﷻ', 'ﷲ', '﷽', '﴿', '﴾'
-        ]
-        
+    def __init__(self, cache_size=0, scheme=DEFAULT_SCHEME, disk_cache=None, vectorize=False):
+        """`cache_size` > 0 active un cache LRU des mots déjà translittérés.
+
+        `scheme` est le schéma par défaut (voir scheme.load_scheme) ;
+        translate et translate_many acceptent aussi un schéma par appel.
+        `disk_cache` (un chemin ou un disk_cache.DiskCache) active le cache
+        persistant des textes entiers, partagé entre processus.
+        `vectorize` fait chercher les positions où une règle dépend du
+        contexte par masques (masks.trigger_positions) dans les longs textes,
+        avec NumPy s'il est installé. Expérimental : de bout en bout, le gain
+        mesuré est nul sans NumPy et d'environ 10 % avec.
+        """
+        self.scheme = load_scheme(scheme)
+        # Schéma de l'appel en cours et transcription des lettres qu'il donne
+        # aux règles
+        self._active = self.scheme
+        self.table = self.scheme.letters if self.scheme.engine == "rules" else _mapping
+        self.cache = None
+        if cache_size:
+            from .cache import WordCache
+
+            self.cache = WordCache(cache_size)
+        if disk_cache is not None and not hasattr(disk_cache, "get_many"):
+            from .disk_cache import DiskCache
+
+            disk_cache = DiskCache(disk_cache)
+        self.disk_cache = disk_cache
+        self._trigger_positions = None
+        if vectorize:
+            from .masks import trigger_positions
+
+            self._trigger_positions = trigger_positions
+        # Liste des signes de ponctuation à préserver, modifiable par instance
+        self.punctuation = list(alphabet.PUNCTUATION)
+
         # Mapping des signes de ponctuation arabes vers latins
-        self.punctuation_mapping = {
-            '،': ',',  # Virgule arabe vers virgule latine
-            '؛': ';',  # Point-virgule arabe vers latin
-            '؟': '?',  # Point d'interrogation arabe vers latin
-            '﴿': '«',  # Inverser les symboles de citation coranique pour la lecture de gauche à droite
-            '﴾': '»',  # Inverser les symboles de citation coranique pour la lecture de gauche à droite
-        }
+        self.punctuation_mapping = dict(PUNCTUATION_MAPPING)
+        # Table de dispatch des règles, compilée au premier appel de translate
+        self._compiled = None
+        # (motif, table) du chemin rapide par str.translate, voir compile_simple,
+        # pour le schéma courant et pour chaque schéma déjà utilisé
+        self._simple = None
+        self._simples = {}
+        # Décodeurs de untranslate, par schéma (voir reverse.compile_reverse)
+        self._reverses = {}
+
+    def _get_dispatch(self):
+        """Table de dispatch compilée, reconstruite seulement si la ponctuation change"""
+        punctuation = tuple(self.punctuation)
+        if self._compiled is None or self._compiled[0] != punctuation:
+            # Ajouter les symboles spéciaux à la liste des ponctuations
+            for symbol in SPECIAL_SYMBOLS:
+                if symbol not in self.punctuation:
+                    self.punctuation.append(symbol)
+            punctuation = tuple(self.punctuation)
+            dispatch = _dispatch_for(punctuation)
+            self._compiled = (punctuation, dispatch)
+            self._simples.clear()
+            if self.cache is not None:
+                self.cache.clear()
+        return self._compiled[1]
 
     def get(self, key):
         return self.table.get(key, " ")
 
-    def translate(self, text):
+    def _prepare(self, scheme=None):
+        """Réglages communs à tous les appels, retourne la table de dispatch.
+
+        Active `scheme` (par défaut self.scheme) ; ses tables sont compilées
+        à sa première utilisation puis gardées, changer de schéma d'un appel
+        à l'autre ne coûte donc qu'une recherche dans un dictionnaire.
+        """
+        dispatch = self._get_dispatch()
+        scheme = self.scheme if scheme is None else load_scheme(scheme)
+        self._active = scheme
+        if scheme.engine == "rules":
+            self.table = scheme.letters
+            simple = self._simples.get(scheme)
+            if simple is None:
+                key = (scheme, self._compiled[0], tuple(self.punctuation_mapping.items()))
+                simple = _SIMPLES.get(key)
+                if simple is None:
+                    simple = _SIMPLES[key] = compile_simple(self, dispatch)
+                self._simples[scheme] = simple
+            self._simple = simple
+        return dispatch
+
+    def translate(self, text, return_alignment=False, scheme=None):
+        """Translittère `text`, avec `scheme` ou le schéma par défaut.
+
+        Avec `return_alignment`, retourne (résultat, alignment.Alignment) qui
+        relie chaque caractère du résultat au caractère de `text` qui l'a
+        produit ; le cache de mots n'est alors pas utilisé.
+        """
+        dispatch = self._prepare(scheme)
+        scheme = self._active
+        if return_alignment:
+            return self._translate_aligned(text, dispatch)
         if not text:
             return ""
-        
-        # Ajouter les symboles spéciaux à la liste des ponctuations
-        special_symbols = ['ﷺ', 'ﷻ', 'ﷲ', '﷽', '﴿', '﴾']
-        for symbol in special_symbols:
-            if symbol not in self.punctuation:
-                self.punctuation.append(symbol)
-                
+        if self.disk_cache is not None:
+            return self._translate_stored([text], dispatch, False, [])[0]
+        if scheme.engine == "table":
+            return scheme.transliterate(text)
+        result = postprocess(self._transliterate(text, dispatch, []), scheme.letter_class)
+        return result.translate(scheme.output) if scheme.output else result
+
+    def _translate_aligned(self, text, dispatch):
+        # alignment n'est importé qu'au premier appel avec return_alignment
+        from .alignment import Alignment, sub_aligned
+
+        scheme = self._active
+        if scheme.engine == "table":
+            offsets = list(range(len(text)))
+            if scheme.double_shadda and alphabet.SHADDA in text:
+                text, offsets = sub_aligned(
+                    _DOUBLED, lambda match: match[1] + match[1] + match[2], text, offsets, _doubled_first
+                )
+            result, result_offsets = _translate_aligned_table(text, offsets, scheme.table)
+            return result, Alignment(result_offsets, len(offsets))
+        normalized, offsets = _normalize_aligned(text)
         out = []
-        text = normalize(text)
-        arabic_text = iter(ArabicText(text))
-        
-        # Pour suivre si nous sommes après un tanwin
-        after_tanwin = False
-
-        for caracter in arabic_text:
-            # Suivre si on est après un tanwin pour le prochain caractère
-            if caracter in [alphabet.FATHATAN, alphabet.DAMMATAN, alphabet.KASRATAN]:
-                after_tanwin = True
-            elif not caracter.is_blank():
-                # Réinitialiser si ce n'est pas un espace (car les espaces ne changent pas cet état)
-                after_tanwin = False
-
-            # Vérifier si le caractère est un signe de ponctuation
-            if str(caracter) in self.punctuation:
-                # Utiliser le mapping de ponctuation si disponible, sinon conserver tel quel
-                out.append(self.punctuation_mapping.get(str(caracter), str(caracter)))
-                continue
-            
-            # Vérifier si on a le début de "الله"
-            if (caracter == alphabet.ALIF and 
-                caracter.get_lookahead(1) == alphabet.LAM and 
-                caracter.get_lookahead(2) == alphabet.LAM and 
-                caracter.get_lookahead(3) == alphabet.HA):
-                
-                # Par défaut, utiliser "l-"
-                prefix = "l-"
-                
-                # Cas 1: UNIQUEMENT début de phrase (pas simplement début de mot)
-                # On vérifie si c'est le début absolu ou après ponctuation/nouvelle ligne
-                if (not caracter.prev() or 
-                    (caracter.prev().is_blank() and (not caracter.prev().prev() or 
-                                                    caracter.prev().prev() in ['.', '!', '?', '،', '؟', '\n']))):
-                    prefix = "al-"
-                # Cas 2: Précédé par un tanwin
-                elif after_tanwin or caracter.prev() in [alphabet.FATHATAN, alphabet.DAMMATAN, alphabet.KASRATAN]:
-                    prefix = "il-"
-                
-                # Avancer jusqu'à HA et traiter les diacritiques
-                next(arabic_text)  # LAM
-                next(arabic_text)  # LAM
-                ha = next(arabic_text)  # HA
-                
-                # Vérifier si HA a des diacritiques
-                next_char = ha.next()
-                if next_char and next_char in alphabet.VOWELS:
-                    if next_char == alphabet.FATHA:
-                        out.append(f"{prefix}lāha")
-                        next(arabic_text)  # Consommer la voyelle
-                    elif next_char == alphabet.DAMMA:
-                        out.append(f"{prefix}lāhu")
-                        next(arabic_text)  # Consommer la voyelle
-                    elif next_char == alphabet.KASRA:
-                        out.append(f"{prefix}lāhi")
-                        next(arabic_text)  # Consommer la voyelle
-                    else:
-                        out.append(f"{prefix}lāh")
-                else:
-                    out.append(f"{prefix}lāh")
-                
-                continue
-                
-            # handle hamza
-            if caracter in alphabet.HAMZAS:
-                if caracter.is_mid():
-                    out.append("'")
-                continue
-
-            # handle lam
-            elif caracter == alphabet.LAM:
-                sun = caracter.is_sun()
-                
-                # handle alif lam (article défini)
-                if (p := caracter.prev()) == alphabet.ALIF:
-                    # Déterminer le préfixe en fonction du contexte
-                    prefix = ""
-                    possible_tanwin_other = p.prev().prev() if p.prev() else None
-                    possible_tanwin_fatha = p.prev().prev().prev() if p.prev() and p.prev().prev() else None
-                    
-                    # Cas 1: UNIQUEMENT début de phrase (pas simplement début de mot)
-                    if (not p.prev() or 
-                        (p.prev().is_blank() and (not p.prev().prev() or 
-                                                 p.prev().prev() in ['.', '!', '?', '،', '؟', '\n']))):
-                        if sun:
-                            prefix = "a"  # Pour les lettres solaires: as-shams
-                        else:
-                            prefix = "al-"  # Pour les lettres lunaires: al-qamar
-                    
-                    # Cas 2: Précédé par un tanwin
-                    
-                    elif (possible_tanwin_fatha and possible_tanwin_fatha in [alphabet.FATHATAN, alphabet.DAMMATAN, alphabet.KASRATAN]) or (possible_tanwin_other and possible_tanwin_other in [alphabet.FATHATAN, alphabet.DAMMATAN, alphabet.KASRATAN]):
-                        if sun:
-                            prefix = "i"  # Pour les lettres solaires après tanwin
-                        else:
-                            prefix = "il-"  # Pour les lettres lunaires après tanwin
-                    
-                    # Cas 3: Autres cas (milieu de phrase)
-                    else:
-                        if sun:
-                            prefix = ""  # Pas de préfixe pour les lettres solaires: s-shams
-                        else:
-                            prefix = "l-"  # Pour les lettres lunaires: l-qamar
-                    
-                    out.append(prefix)
-                    
-                # handle alif with hamzat wasl
-                elif (p := caracter.prev()) == alphabet.ALIF_WITH_HAMZAT_WASL:
-                    out[-1] = "a" if p.is_start() else "l-"
-                
-                # Autres cas pour lam
-                else:
-                    out.append("" if sun else "l")
-
-                # Traitement des lettres solaires
-                if sun:
-                    sep = "-" if caracter.prev().is_word_start() else ""
-                    out.append(sep.join([self.get(sun)] * 2))
-                    next(arabic_text)
-                    next(arabic_text)
-
-                continue
-
-            # handle alif
-            elif caracter == alphabet.ALIF:
-                if caracter.prev() == alphabet.FATHA:
-                    out[-1] = "ā"
-                continue
-
-            # handle alif with hamzat wasl
-            elif caracter == alphabet.ALIF_WITH_HAMZAT_WASL:
-                out.append("i")
-                continue
-
-            # handle alif maksura
-            elif caracter == alphabet.ALIF_MAKSURA:
-                if caracter.prev() == alphabet.FATHA:
-                    out[-1] = "ā"
-                continue
-
-            # handle alif with maddah above
-            elif caracter == alphabet.ALIF_WITH_MADDA_ABOVE:
-                out.append("ā" if caracter.is_start() else "'ā")
-                continue
-
-            # kasra + ya
-            elif caracter.is_kasra_followed_by_ya():
-                # Vérifier si ya est suivi d'un shadda
-                if caracter.next() == alphabet.YA and caracter.next().next() == alphabet.SHADDA:
-                    # Cas spécial: kasra + ya + shadda → "iyy"
-                    out.append("iyy")
-                    next(arabic_text)  # Consommer le ya
-                    next(arabic_text)  # Consommer le shadda
-                    # Si après le shadda il y a un damma ou fatha, l'ajouter
-                    next_char = caracter.next(3) if caracter.next(2) else None
-                    if next_char == alphabet.DAMMA:
-                        out.append("u")
-                        next(arabic_text)  # Consommer le damma
-                    elif next_char == alphabet.FATHA:
-                        out.append("a")
-                        next(arabic_text)  # Consommer le fatha
-                elif caracter.next(2) not in alphabet.VOWELS:
-                    # Cas standard: kasra + ya → "ī"
-                    out.append("ī")
-                    next(arabic_text)
-                else:
-                    out.append("i")
-                continue
-
-            # damma + waw
-            elif caracter.is_damma_followed_by_waw():
-                # Vérifier si waw est suivi d'un shadda
-                if caracter.next() == alphabet.WAW and caracter.next().next() == alphabet.SHADDA:
-                    # Cas spécial: damma + waw + shadda → "uww"
-                    out.append("uww")
-                    next(arabic_text)  # Consommer le waw
-                    next(arabic_text)  # Consommer le shadda
-                    # Si après le shadda il y a une voyelle, l'ajouter
-                    next_char = caracter.next(3) if caracter.next(2) else None
-                    if next_char == alphabet.DAMMA:
-                        out.append("u")
-                        next(arabic_text)  # Consommer le damma
-                    elif next_char == alphabet.FATHA:
-                        out.append("a")
-                        next(arabic_text)  # Consommer le fatha
-                    elif next_char == alphabet.KASRA:
-                        out.append("i")
-                        next(arabic_text)  # Consommer le kasra
-                elif caracter.next(2) not in alphabet.VOWELS:
-                    out.append("ū")
-                    next(arabic_text)
-                else:
-                    out.append("u")
-                continue
+        origins = []
+        # mêmes chemins que _main_pass, hors cache de mots et vectorize
+        path = self._path(normalized) if self.cache is None else "rules"
+        if path == "simple":
+            block = []
+            out.append(_simple_aligned(normalized, 0, len(normalized), self._simple, block))
+            origins.append(block)
+        elif path in ("spans", "vectorize"):
+            apply_spans_aligned(self, normalized, dispatch, self._simple, out, origins)
+        else:
+            apply_rules_aligned(self, normalized, 0, len(normalized), dispatch, out, False, origins)
+        raw_offsets = []
+        for entry, origin in zip(out, origins):
+            if origin.__class__ is int:
+                raw_offsets.extend([offsets[origin]] * len(entry))
+            else:
+                # bloc de translate_simple : une origine par caractère
+                raw_offsets.extend(map(offsets.__getitem__, origin))
+        result, result_offsets = _postprocess_aligned("".join(out), raw_offsets, scheme.letter_class)
+        if scheme.output:
+            result, result_offsets = _translate_aligned_table(result, result_offsets, scheme.output)
+        return result, Alignment(result_offsets, len(text))
 
-            # handle SHADDA
-            elif caracter == alphabet.SHADDA:
-                vow = caracter.prev(2)
-                # if preceded by YA
-                if caracter.prev() == alphabet.YA:
-                    if vow == alphabet.KASRA and caracter.is_mid():
-                        out.append("y")
+    def translate_many(self, texts, *, chunksize=1024, normalized=False, scheme=None):
+        """Translittère une suite de textes et retourne un générateur des résultats.
 
-                    elif vow == alphabet.FATHA:
-                        out.append("y")
+        La préparation (ponctuation, table de dispatch) est faite une seule fois
+        et le tampon de sortie est réutilisé d'un texte à l'autre. Les textes
+        sont consommés par paquets de `chunksize`, dans l'ordre. La ponctuation
+        ne doit pas être modifiée pendant l'itération. Avec `normalized`, les
+        textes sont déjà passés par normalize (qui n'est pas idempotente sur
+        certaines suites de signes) et ne le sont pas une seconde fois.
+        `scheme` remplace le schéma par défaut, comme pour translate.
+        Avec un cache persistant, chaque paquet y est cherché en une requête
+        et ses textes absents y sont ajoutés en une transaction.
+        """
+        if chunksize < 1:
+            raise ValueError("chunksize must be >= 1")
+        out = []
+        transliterate = self._main_pass if normalized else self._transliterate
+        texts = iter(texts)
+        while chunk := list(islice(texts, chunksize)):
+            # préparé à chaque paquet : un autre appel a pu changer de schéma
+            # pendant que le générateur attendait
+            dispatch = self._prepare(scheme)
+            if self.disk_cache is not None:
+                yield from self._translate_stored(chunk, dispatch, normalized, out)
+            else:
+                yield from self._translate_chunk(chunk, dispatch, transliterate, out)
 
-                # if preceded by WAW
-                elif caracter.prev() == alphabet.WAW:
-                    if vow == alphabet.DAMMA:
-                        out.append("w")
+    def _translate_chunk(self, chunk, dispatch, transliterate, out):
+        """Résultats de `chunk` pour le schéma actif, sans le cache persistant"""
+        active = self._active
+        if active.engine == "table":
+            return list(map(active.transliterate, chunk))
+        letters = active.letter_class
+        results = [
+            postprocess(transliterate(text, dispatch, out), letters) if text else ""
+            for text in chunk
+        ]
+        if active.output:
+            results = [result.translate(active.output) for result in results]
+        return results
 
-                    elif vow == alphabet.FATHA:
-                        out.append("w")
+    def _translate_stored(self, chunk, dispatch, normalized, out):
+        """_translate_chunk en passant par self.disk_cache.
 
-                elif caracter.prev().is_mid():
-                    if len(out) >= 2 and (not out[-2] == "l-"):
-                        out.append(self.get(str(caracter.prev())))
+        La clé est calculée sur le texte normalisé (sur le texte brut pour le
+        moteur ``table``), qui est aussi celui que reçoit la passe principale
+        pour les textes absents du cache.
+        """
+        store = self.disk_cache
+        if self._active.engine == "rules" and not normalized:
+            chunk = [normalize(text) if text else "" for text in chunk]
+        keys = store.keys(self, chunk)
+        results = store.get_many(keys)
+        # un texte répété dans le paquet n'est traduit et écrit qu'une fois
+        missing = {}
+        for k, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[k], k)
+        if missing:
+            computed = dict(zip(missing, self._translate_chunk(
+                [chunk[k] for k in missing.values()], dispatch, self._main_pass, out
+            )))
+            results = [computed[key] if result is None else result for key, result in zip(keys, results)]
+            store.put_many(computed.items())
+        return results
 
-            # handle the rest
-            else:
-                out.append(self.get(str(caracter)))
-                if caracter.next() in (
-                    alphabet.SUKUN,
-                    alphabet.SMALL_HIGH_ROUNDED_ZERO,
-                ):
-                    if (
-                        caracter.prev() == alphabet.ALIF
-                        and caracter.prev().is_word_start()
-                    ):
-                        out[-1] = self.get(str(caracter)) + "-"
-
-        # Obtenir le résultat initial
-        result = "".join(out)
-        
-        # Post-traitement pour corriger certains problèmes spécifiques
-        
-        # 1. Assurer que "lah" est toujours écrit avec le macron: "lāh"
-        result = re.sub(r'l-lah[aui]?', lambda m: m.group(0).replace('lah', 'lāh'), result)
-        result = re.sub(r'al-lah[aui]?', lambda m: m.group(0).replace('lah', 'lāh'), result)
-        result = re.sub(r'il-lah[aui]?', lambda m: m.group(0).replace('lah', 'lāh'), result)
-        
-        # 2. Corriger "wa l-" qui peut être écrit "wal-" par erreur
-        result = re.sub(r'wa([a-z])-', r'wa \1-', result)
-        
-        # 3. Corriger les tirets mal placés
-        result = re.sub(r'([a-z])-([aeiou])', r'\1\2', result)
-        
-        # 4. Assurer que la forme "li + l-lāh" est correctement écrite "lillāh"
-        result = re.sub(r'li l-lāh([aui]?)', r'lillāh\1', result)
-        
-        # 5. Corriger les prépositions fusionnées avec Allah (bi, li, fa, wa)
-        result = re.sub(r'billah([aui]?)', r'billāh\1', result)
-        result = re.sub(r'lillah([aui]?)', r'lillāh\1', result)
-        result = re.sub(r'fallah([aui]?)', r'fallāh\1', result)
-        result = re.sub(r'fāllah([aui]?)', r'fallāh\1', result)
-        result = re.sub(r'wallah([aui]?)', r'wallāh\1', result)
-        result = re.sub(r'wāllah([aui]?)', r'wallāh\1', result)
-        
-        # Post-traitement pour le mot "Allah"
-        # 1. Début de phrase uniquement (après ponctuation ou début absolu)
-        result = re.sub(r'(^|\.\s|\!\s|\?\s|،\s|؟\s|\n\s*)l-lāh([aui]?)', r'\1al-lāh\2', result)
-        
-        # 2. Après tanwin (utiliser le symbole de tanwin adéquat selon votre système)
-        result = re.sub(r'([ⁿᵐⁱ])l-lāh([aui]?)', r'\1il-lāh\2', result)
-        
-        # 3. Pour les occurrences intermédiaires, garder "l-lāh"
-        # (pas besoin de règle supplémentaire)
-        
-        # Normaliser les espaces
-        result = " ".join(filter(None, result.split(" ")))
-        
-        return result
+    def _reverse(self, scheme=None):
+        """Décodeur latin -> arabe de `scheme`, compilé à sa première utilisation"""
+        scheme = self.scheme if scheme is None else load_scheme(scheme)
+        reverse = self._reverses.get(scheme)
+        if reverse is None:
+            from .reverse import compile_reverse
+
+            reverse = self._reverses[scheme] = compile_reverse(scheme, self.punctuation_mapping)
+        return scheme, reverse
+
+    def untranslate(self, text, scheme=None):
+        """Écriture arabe de `text`, translittéré avec `scheme` ou le schéma
+        par défaut (voir reverse.py).
+
+        Exacte pour un schéma réversible : untranslate(translate(texte))
+        redonne le texte. Pour les autres schémas, le résultat est approché ;
+        les espaces sont normalisés comme par translate.
+        """
+        scheme, reverse = self._reverse(scheme)
+        result = reverse.untransliterate(text)
+        if scheme.engine == "table":
+            return result
+        return " ".join(filter(None, result.split(" ")))
+
+    def untranslate_many(self, texts, *, chunksize=1024, scheme=None):
+        """untranslate sur une suite de textes, par paquets de `chunksize`,
+        comme translate_many ; retourne un générateur des résultats."""
+        if chunksize < 1:
+            raise ValueError("chunksize must be >= 1")
+        scheme, reverse = self._reverse(scheme)
+        untransliterate = reverse.untransliterate
+        texts = iter(texts)
+        while chunk := list(islice(texts, chunksize)):
+            results = list(map(untransliterate, chunk))
+            if scheme.engine == "rules":
+                results = [" ".join(filter(None, result.split(" "))) for result in results]
+            yield from results
+
+    def _transliterate(self, text, dispatch, out):
+        """Passe principale : applique les règles caractère par caractère.
+
+        `out` est un tampon vidé puis rempli par les règles. Les portions
+        sans déclencheur de règle contextuelle (voir rules.compile_simple)
+        sont traduites d'un bloc par str.translate.
+        """
+        return self._main_pass(normalize(text), dispatch, out)
+
+    def _path(self, text):
+        """Chemin de _main_pass pour `text` (déjà normalisé) : ``spans``,
+        ``vectorize``, ``simple``, ``cache`` ou ``rules``"""
+        if self.cache is None and len(text) >= _MIN_SPANS:
+            # une table vide (voir compile_simple) ne traduit pas les portions entre les positions
+            if self._trigger_positions is not None and len(text) >= _MIN_VECTORIZE and self._simple[1]:
+                return "vectorize"
+            return "spans"
+        # match plutôt que fullmatch, qui reviendrait en arrière sur tout le texte
+        if self._simple[0].match(text).end() == len(text):
+            return "simple"
+        return "cache" if self.cache is not None else "rules"
+
+    def _main_pass(self, text, dispatch, out):
+        """_transliterate sur un texte déjà normalisé"""
+        out.clear()
+        path = self._path(text)
+        if path == "simple":
+            return translate_simple(text, self._simple)
+        if path == "spans":
+            apply_spans(self, text, dispatch, self._simple, out)
+        elif path == "vectorize":
+            apply_spans(self, text, dispatch, self._simple, out, self._trigger_positions(text, self, dispatch))
+        elif path == "cache":
+            self.cache.apply(self, text, dispatch, out)
+        else:
+            apply_rules(self, text, 0, len(text), dispatch, out, False)
+        return "".join(out)
+
+
+def _read_lines(path):
+    with open(path, "rb") as file:
+        return file.read().decode("utf-8").split("\n")
+
+
+def _stdin_loop(translator, reverse=False):
+    """Une ligne translittérée (ou rendue en arabe) par ligne lue sur stdin,
+    écrite dès que la ligne est lue : un seul processus sert un flux de
+    requêtes sans payer le démarrage à chaque fois."""
+    import sys
+
+    stdin = open(sys.stdin.fileno(), encoding="utf-8", newline="\n", closefd=False)
+    stdout = open(sys.stdout.fileno(), "w", encoding="utf-8", newline="\n", closefd=False)
+    convert = translator.untranslate if reverse else translator.translate
+    for line in iter(stdin.readline, ""):
+        stdout.write(convert(line.rstrip("\n")) + "\n")
+        stdout.flush()
 
 
 if __name__ == "__main__":
-    from pathlib import Path
-    import argparse
+    import sys
+
+    # "-t texte" seul, l'appel répété des pipelines (xargs) : argparse et son
+    # formateur d'aide coûtent plus que la translittération elle-même
+    if len(sys.argv) == 3 and sys.argv[1] in ("-t", "--text"):
+        print(ArabTransliterator().translate(sys.argv[2]))
+        sys.exit()
 
-    translator = ArabTransliterator()
+    import argparse
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-f", "--file", help="The arab file you want the transcription")
     parser.add_argument("-t", "--text", help="The arab text you want the transcription")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of processes used to transcribe a file (0 for all cores)")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Transcribe the file (or stdin) incrementally with bounded memory")
+    parser.add_argument("--scheme", default=DEFAULT_SCHEME,
+                        help="Transliteration scheme: a name (see scheme.available_schemes) or a .json file")
+    parser.add_argument("-r", "--reverse", action="store_true",
+                        help="Write the Latin text (or file) back in Arabic script")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print rule hits and time per phase for the text (or file) instead of the transcription")
+    parser.add_argument("--stdin-loop", action="store_true",
+                        help="Answer each line read on stdin with its transcription, flushed at once")
+    parser.add_argument("--disk-cache", metavar="PATH",
+                        help="Persistent cache file (sqlite) shared by runs and processes")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Fill --disk-cache with the transcription of every line of the file, then print its stats")
+    parser.add_argument("--disk-cache-prune", action="store_true",
+                        help="Delete the --disk-cache entries written by other versions of the rules, then exit")
+    parser.add_argument("--vectorize", action="store_true",
+                        help="Experimental: find the context-dependent characters of long texts with vectorized masks "
+                             "(NumPy if installed; about 10%% faster with NumPy, no faster without)")
+    parser.add_argument("--lines", metavar="START[:STOP]",
+                        help="Only transcribe these lines of the file (from 0, like a Python slice), "
+                             "read through a line index saved next to it")
+    parser.add_argument("--indexed-output", metavar="PATH",
+                        help="Write the transcription of the file to PATH, with its line index")
     args = parser.parse_args()
+    if (args.lines or args.indexed_output) and not args.file:
+        parser.error("--lines and --indexed-output need -f")
+    if args.warm_cache and not (args.disk_cache and args.file):
+        parser.error("--warm-cache needs --disk-cache and -f")
+    if args.disk_cache_prune and not args.disk_cache:
+        parser.error("--disk-cache-prune needs --disk-cache")
+    translator = ArabTransliterator(scheme=args.scheme, disk_cache=args.disk_cache, vectorize=args.vectorize)
+
+    if args.disk_cache_prune:
+        removed = translator.disk_cache.prune()
+        print(f"removed: {removed}", f"size: {len(translator.disk_cache)}", sep="\n")
+
+    elif args.profile:
+        from .profiling import Profiler
+
+        profiler = Profiler()
+        if args.file:
+            texts = _read_lines(args.file)
+        else:
+            texts = [args.text or ""]
+        profiler.translate_many(translator, texts)
+        print(profiler.summary())
+
+    elif args.warm_cache:
+        lines = _read_lines(args.file)
+        if args.jobs == 1:
+            for _ in translator.translate_many(lines):
+                pass
+        else:
+            from .parallel import translate_parallel
+            for _ in translate_parallel(lines, jobs=args.jobs, scheme=args.scheme, disk_cache=args.disk_cache):
+                pass
+        info = translator.disk_cache.info()
+        if args.jobs != 1:
+            # les compteurs de chaque processus restent dans ce processus
+            for name in ("hits", "misses", "writes", "hit_rate"):
+                del info[name]
+        print(f"lines: {len(lines)}", *(f"{name}: {value}" for name, value in info.items()), sep="\n")
+
+    elif args.lines:
+        from .indexed import IndexedCorpus
+
+        start, colon, stop = args.lines.partition(":")
+        start = int(start or 0)
+        if colon:
+            stop = int(stop) if stop else None
+        else:
+            # une seule ligne ; avec -1, la dernière
+            stop = start + 1 or None
+        with IndexedCorpus(args.file) as corpus:
+            print(*corpus.translate(start, stop, translator, reverse=args.reverse), sep="\n")
+
+    elif args.indexed_output:
+        from .indexed import write_translated
+
+        write_translated(args.file, args.indexed_output, translator, reverse=args.reverse)
+
+    elif args.stdin_loop:
+        _stdin_loop(translator, args.reverse)
+
+    elif args.stream and not args.text:
+        from .stream import transliterate_stream
+
+        if args.file:
+            with open(args.file, "rb") as source:
+                transliterate_stream(source, sys.stdout.buffer, translator, jobs=args.jobs, scheme=args.scheme,
+                                     reverse=args.reverse)
+        else:
+            transliterate_stream(sys.stdin.buffer, sys.stdout.buffer, translator, jobs=args.jobs,
+                                 scheme=args.scheme, reverse=args.reverse)
+
+    elif args.file and args.reverse:
+        lines = _read_lines(args.file)
+        if args.jobs == 1:
+            print(*translator.untranslate_many(lines), sep="\n")
+        else:
+            # pas de découpage des lignes longues : rules.is_safe_split ne
+            # vaut que pour le texte arabe
+            from .parallel import translate_parallel
+            print(*translate_parallel(lines, jobs=args.jobs, scheme=args.scheme, reverse=True), sep="\n")
+
+    elif args.text and args.reverse:
+        print(translator.untranslate(args.text))
 
-    if args.file:
-        file = Path(args.file)
-        lines = file.read_bytes().decode("utf-8").split("\n")
-        print(*map(translator.translate, lines), sep="\n")
+    elif args.file:
+        lines = _read_lines(args.file)
+        if args.jobs == 1:
+            print(*translator.translate_many(lines), sep="\n")
+        else:
+            from .parallel import translate_sharded
+            print(*translate_sharded(lines, jobs=args.jobs, scheme=args.scheme, disk_cache=args.disk_cache),
+                  sep="\n")
 
     elif args.text:
-        print(translator.translate(args.text))
+        if args.jobs == 1:
+            print(translator.translate(args.text))
+        else:
+            from .parallel import translate_sharded
+            print(*translate_sharded([args.text], jobs=args.jobs, scheme=args.scheme, disk_cache=args.disk_cache))
@@ -0,0 +1,76 @@
+"""Taux de succès et gain du cache de mots sur un corpus de la taille du Coran.
+
+Le corpus est synthétique et déterministe : ~78 000 mots tirés selon une loi
+de Zipf dans un vocabulaire vocalisé, regroupés en versets d'une ligne.
+
+Usage: python benchmarks/bench_cache.py [--words 78000] [--cache-size 4096]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator import alphabet
+from arab_transliterator.transliterator import ArabTransliterator
+from bench_translate import SAMPLE
+
+CONSONANTS = [chr(c) for c in range(0x0628, 0x063B) if chr(c) != alphabet.TA_MARBUTA] + [
+    alphabet.FA, alphabet.QAF, alphabet.KAF, alphabet.LAM, alphabet.MEEM, alphabet.NOON, alphabet.HA,
+]
+
+
+def make_vocabulary(rng, size):
+    words = SAMPLE.split()
+    while len(words) < size:
+        syllables = []
+        for _ in range(rng.randint(1, 4)):
+            syllable = rng.choice(CONSONANTS) + rng.choice(sorted(alphabet.VOWELS))
+            if rng.random() < 0.2:
+                syllable += rng.choice((alphabet.ALIF, alphabet.SUKUN))
+            syllables.append(syllable)
+        prefix = rng.choice(("", "", "", "ال", "وَ", "بِ"))
+        words.append(prefix + "".join(syllables))
+    return words
+
+
+def make_corpus(words, seed=0):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, 15_000)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    drawn = rng.choices(vocabulary, weights, k=words)
+    return [" ".join(drawn[i:i + 12]) for i in range(0, len(drawn), 12)]
+
+
+def run(words, cache_size):
+    verses = make_corpus(words)
+
+    start = time.perf_counter()
+    expected = list(ArabTransliterator().translate_many(verses))
+    plain = time.perf_counter() - start
+
+    translator = ArabTransliterator(cache_size=cache_size)
+    start = time.perf_counter()
+    results = list(translator.translate_many(verses))
+    cached = time.perf_counter() - start
+
+    assert results == expected
+    info = translator.cache.info()
+    print(f"{len(verses)} verses, {words} words")
+    print(f"without cache: {plain:.3f} s")
+    print(f"with cache:    {cached:.3f} s (x{plain / cached:.2f})")
+    print(f"hits: {info['hits']}, misses: {info['misses']}, evictions: {info['evictions']}, "
+          f"hit rate: {info['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=78_000)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    args = parser.parse_args()
+    run(args.words, args.cache_size)
@@ -0,0 +1,62 @@
+"""Débit en lignes par seconde de dataset.py sur une table synthétique, CSV
+et Parquet (si pyarrow est installé), sur un ou plusieurs processus.
+
+Chaque ligne de la table est une ligne du corpus (corpus.make_lines) ; la
+colonne produite est comparée à translate_many.
+
+Usage: python benchmarks/bench_dataset.py [--size 10000000] [--style full] [-j 0]
+"""
+import argparse
+import csv
+import sys
+import tempfile
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.dataset import transliterate_csv, transliterate_parquet
+from arab_transliterator.transliterator import ArabTransliterator
+from corpus import STYLES, make_lines
+
+
+def run(size, style, jobs):
+    lines = make_lines(size, style)
+    expected = list(ArabTransliterator().translate_many(lines))
+    directory = Path(tempfile.mkdtemp())
+    with open(directory / "in.csv", "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows([["id", "text"], *([i, line] for i, line in enumerate(lines))])
+    formats = [("csv", transliterate_csv)]
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        print("pyarrow is not installed: Parquet skipped\n")
+    else:
+        pyarrow.parquet.write_table(pyarrow.table({"id": list(range(len(lines))), "text": lines}),
+                                    directory / "in.parquet", row_group_size=max(len(lines) // 16, 1))
+        formats.append(("parquet", transliterate_parquet))
+
+    print(f"{len(lines)} rows")
+    print(f"{'format':>8} {'jobs':>5} {'time (s)':>9} {'rows/s':>9}")
+    for name, function in formats:
+        for count in sorted({1, jobs}):
+            report = function(directory / f"in.{name}", directory / f"out.{name}", "text", jobs=count)
+            if name == "csv":
+                with open(directory / "out.csv", newline="", encoding="utf-8") as file:
+                    assert [row[2] for row in list(csv.reader(file))[1:]] == expected
+            else:
+                table = pyarrow.parquet.read_table(directory / "out.parquet")
+                assert table.column("text_latin").to_pylist() == expected
+            print(f"{name:>8} {count:>5} {report['seconds']:>9.3f} {report['rows_per_second']:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10_000_000, help="Taille du corpus en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="Processus de la seconde mesure (0 : tous les cœurs)")
+    args = parser.parse_args()
+    run(args.size, args.style, args.jobs)
@@ -0,0 +1,57 @@
+"""Gain du cache persistant (disk_cache.DiskCache) sur un corpus synthétique.
+
+Mesure translate_many sans cache, avec un cache vide (chaque texte y est
+écrit) puis avec le cache rempli par la mesure précédente, comme un second
+lancement de la ligne de commande ; les résultats sont comparés à ceux
+sans cache.
+
+Usage: python benchmarks/bench_disk_cache.py [--size 2000000] [--style full] [--path /tmp/cache.db]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.disk_cache import DiskCache
+from arab_transliterator.transliterator import ArabTransliterator
+from corpus import STYLES, make_lines
+
+
+def timed(translator, lines):
+    start = time.perf_counter()
+    results = list(translator.translate_many(lines))
+    return results, time.perf_counter() - start
+
+
+def run(size, style, path):
+    lines = make_lines(size, style)
+    expected, plain = timed(ArabTransliterator(), lines)
+    cache = DiskCache(path)
+    cache.clear()
+    cold_results, cold = timed(ArabTransliterator(disk_cache=cache), lines)
+    warm_results, warm = timed(ArabTransliterator(disk_cache=DiskCache(path)), lines)
+    assert cold_results == expected and warm_results == expected
+
+    # les écritures récentes sont encore dans le journal WAL
+    stored = sum(os.path.getsize(name) for name in (path, path + "-wal") if os.path.exists(name))
+    print(f"{len(lines)} lines, {size} bytes, cache: {len(cache)} entries, {stored} bytes on disk")
+    print(f"{'run':>10} {'time (s)':>9} {'speedup':>8}")
+    for name, seconds in (("no cache", plain), ("cold", cold), ("warm", warm)):
+        print(f"{name:>10} {seconds:>9.3f} {plain / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=2_000_000, help="Taille du corpus en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    parser.add_argument("--path", default=os.path.join(tempfile.mkdtemp(), "cache.db"),
+                        help="Fichier du cache, vidé au début de la mesure")
+    args = parser.parse_args()
+    run(args.size, args.style, args.path)
@@ -0,0 +1,94 @@
+"""Chemin rapide str.translate (rules.compile_simple) sur un corpus mélangé.
+
+Le corpus mêle, par style de vocalisation (bare, partial, full), des lignes
+entières et des enregistrements courts de 1 à 3 mots, plus le texte
+coranique de bench_translate. Pour chaque partie, affiche la part des
+caractères traduits en bloc et le débit avec et sans le chemin rapide
+(règles appliquées à chaque caractère), après avoir vérifié que les
+sorties sont identiques.
+
+Usage: python benchmarks/bench_fast_path.py [--size 1000000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.rules import apply_rules
+from arab_transliterator.transliterator import ArabTransliterator, normalize
+from bench_translate import SAMPLE
+from corpus import STYLES, make_lines
+
+
+class RulesOnly(ArabTransliterator):
+    """Passe principale d'origine : les règles pour chaque caractère"""
+
+    def _transliterate(self, text, dispatch, out):
+        out.clear()
+        text = normalize(text)
+        apply_rules(self, text, 0, len(text), dispatch, out, False)
+        return "".join(out)
+
+
+def make_records(lines, rng):
+    """Enregistrements courts (noms, titres) tirés des lignes"""
+    records = []
+    for line in lines:
+        words = line.split()
+        while words:
+            count = rng.randint(1, 3)
+            records.append(" ".join(words[:count]))
+            words = words[count:]
+    return records
+
+
+def timed(translator, texts):
+    start = time.perf_counter()
+    results = list(translator.translate_many(texts))
+    return time.perf_counter() - start, results
+
+
+def run(size):
+    fast = ArabTransliterator()
+    slow = RulesOnly()
+    fast._prepare()
+    match = fast._simple[0].match
+    rng = random.Random(0)
+
+    corpus = []
+    for style in STYLES:
+        lines = make_lines(size, style)
+        corpus.append((f"{style} lines", lines))
+        corpus.append((f"{style} records", make_records(lines, rng)))
+    corpus.append(("mixed", [text for _, texts in corpus for text in texts]))
+    corpus.append(("quran", SAMPLE.split("\n") * 200))
+
+    print(f"{'corpus':>16} {'texts':>8} {'block %':>8} {'rules (s)':>10} {'fast (s)':>9} {'speedup':>8}")
+    for name, texts in corpus:
+        total = simple = 0
+        for text in texts:
+            text = normalize(text)
+            i = 0
+            while i < len(text):
+                end = match(text, i).end()
+                simple += end - i
+                i = end + 1
+            total += len(text)
+        full_time, expected = timed(slow, texts)
+        fast_time, results = timed(fast, texts)
+        assert results == expected, name
+        print(f"{name:>16} {len(texts):>8} {100 * simple / total:>7.1f}% "
+              f"{full_time:>10.3f} {fast_time:>9.3f} {full_time / fast_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000, help="Taille de chaque style en octets")
+    args = parser.parse_args()
+    run(args.size)
@@ -0,0 +1,53 @@
+"""Coût d'une frappe dans IncrementalTransliterator selon la taille du document.
+
+Chaque frappe insère un caractère à une position aléatoire ; le temps moyen
+d'une frappe doit rester à peu près constant quand le document grandit,
+alors que translate() du document entier croît linéairement.
+
+Usage: python benchmarks/bench_incremental.py [--max-size 1000000] [--edits 200]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.incremental import IncrementalTransliterator
+from arab_transliterator.transliterator import ArabTransliterator
+from corpus import make_text
+
+
+def run(max_size, edits):
+    translator = ArabTransliterator()
+    rng = random.Random(0)
+    size = 10_000
+    print(f"{'size (B)':>10} {'chars':>9} {'full (ms)':>10} {'edit (ms)':>10} {'recomputed':>11}")
+    while size <= max_size:
+        text = make_text(size, "full")
+        start = time.perf_counter()
+        for line in text.split("\n"):
+            translator.translate(line)
+        full = time.perf_counter() - start
+
+        document = IncrementalTransliterator(text, translator)
+        recomputed = 0
+        start = time.perf_counter()
+        for _ in range(edits):
+            document.insert(rng.randrange(len(text)), rng.choice("بتَ "))
+            recomputed += document.last_recomputed
+        edit = (time.perf_counter() - start) / edits
+        print(f"{size:>10} {len(text):>9} {full * 1e3:>10.2f} {edit * 1e3:>10.3f} {recomputed // edits:>11}")
+        size *= 10
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-size", type=int, default=1_000_000, help="Taille maximale en octets")
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+    run(args.max_size, args.edits)
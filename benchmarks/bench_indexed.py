@@ -0,0 +1,70 @@
+"""Accès direct aux lignes d'un grand corpus (indexed.py) comparé à la
+lecture du fichier entier par ``-f``.
+
+Mesure la construction de l'index, l'ouverture d'un corpus déjà indexé, la
+translittération de lignes tirées au hasard (get_line puis translate) et la
+même chose en lisant tout le fichier à chaque demande, puis write_translated.
+
+Usage: python benchmarks/bench_indexed.py [--size 100000000] [--style full] [--lookups 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.indexed import IndexedCorpus, build_index, write_translated
+from arab_transliterator.transliterator import ArabTransliterator, _read_lines
+from corpus import STYLES, make_lines
+
+
+def run(size, style, lookups):
+    directory = Path(tempfile.mkdtemp())
+    source = directory / "corpus.txt"
+    lines = make_lines(size, style)
+    source.write_text("\n".join(lines), encoding="utf-8")
+    translator = ArabTransliterator()
+    wanted = random.Random(0).choices(range(len(lines)), k=lookups)
+
+    start = time.perf_counter()
+    build_index(source)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with IndexedCorpus(source) as corpus:
+        opened = time.perf_counter() - start
+        results = [translator.translate(corpus.get_line(i)) for i in wanted]
+    indexed = time.perf_counter() - start - opened
+
+    # sans index, chaque demande relit le fichier ; mesurée sur quelques-unes
+    sample = wanted[:max(lookups // 100, 1)]
+    start = time.perf_counter()
+    for i in sample:
+        assert translator.translate(_read_lines(source)[i]) == results[wanted.index(i)]
+    whole = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    write_translated(source, directory / "latin.txt", translator)
+    written = time.perf_counter() - start
+
+    print(f"{len(lines)} lines, {os.path.getsize(source)} bytes")
+    print(f"  {'build index':<36} {build * 1000:10.1f} ms")
+    print(f"  {'open indexed corpus':<36} {opened * 1000:10.3f} ms")
+    print(f"  {'line lookup + translate, indexed':<36} {indexed / lookups * 1e6:10.1f} µs")
+    print(f"  {'line lookup + translate, whole file':<36} {whole * 1e6:10.1f} µs")
+    print(f"  {'write_translated':<36} {written:10.2f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000_000, help="Taille du corpus en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    parser.add_argument("--lookups", type=int, default=1000, help="Nombre de lignes demandées")
+    args = parser.parse_args()
+    run(args.size, args.style, args.lookups)
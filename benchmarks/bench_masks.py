@@ -0,0 +1,63 @@
+"""Étape de classification vectorisée (masks.py) sur de grands textes.
+
+Mesure, sur un texte d'un seul bloc de `--size` octets (10 Mo par défaut) :
+
+- classify : les masques de masks.FLAGS, avec NumPy et en pur Python
+- triggers : masks.trigger_positions, avec NumPy et en pur Python
+- translate : ArabTransliterator().translate, avec et sans vectorize (NumPy
+  s'il est installé), dont les résultats sont comparés
+
+Sans NumPy, les mesures NumPy sont sautées.
+
+Usage: python benchmarks/bench_masks.py [--size 10000000] [--style full]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator import masks
+from arab_transliterator.transliterator import ArabTransliterator, normalize
+from corpus import STYLES, make_text
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run(size, style):
+    text = make_text(size, style)
+    print(f"{len(text)} characters, style {style}, NumPy: {'yes' if masks.numpy else 'no'}")
+    print(f"{'stage':>24} {'time (s)':>9} {'MB/s':>7}")
+
+    def report(name, seconds):
+        print(f"{name:>24} {seconds:>9.3f} {size / seconds / 1e6:>7.1f}")
+
+    normalized = normalize(text)
+    plain = ArabTransliterator()
+    dispatch = plain._prepare()
+    for use_numpy in ((False, True) if masks.numpy else (False,)):
+        backend = "numpy" if use_numpy else "python"
+        _, seconds = timed(masks.classify, normalized, use_numpy)
+        report(f"classify ({backend})", seconds)
+        _, seconds = timed(masks.trigger_positions, normalized, plain, dispatch, use_numpy)
+        report(f"triggers ({backend})", seconds)
+    expected, seconds = timed(plain.translate, text)
+    report("translate", seconds)
+    result, seconds = timed(ArabTransliterator(vectorize=True).translate, text)
+    assert result == expected
+    report("translate (vectorize)", seconds)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10_000_000, help="Taille du texte en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    args = parser.parse_args()
+    run(args.size, args.style)
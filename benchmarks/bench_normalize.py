@@ -0,0 +1,44 @@
+"""Vérifie que normalize() reste linéaire sur un texte très vocalisé.
+
+Le texte est saturé de lam + shadda sans voyelle (le cas qui insérait une
+fatha au milieu d'une liste) ; le temps par caractère doit rester stable
+quand la taille double.
+
+Usage: python benchmarks/bench_normalize.py [--max-size 4000000] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.transliterator import normalize
+
+# "الّه" sans voyelle, une kasra avant le shadda et un tatweel
+WORD = "الّه بِّـر "
+
+
+def run(max_size, repeat):
+    size = 125_000
+    while size <= max_size:
+        text = (WORD * (size // len(WORD) + 1))[:size]
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            normalize(text)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{size:>10} chars: {best:.4f} s ({best / size * 1e9:.1f} ns/char)")
+        size *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-size", type=int, default=4_000_000, help="Taille maximale en caractères")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.max_size, args.repeat)
@@ -0,0 +1,46 @@
+"""Mesure séparément la passe principale et le post-traitement de translate().
+
+Usage: python benchmarks/bench_postprocess.py [--size 1000000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.transliterator import ArabTransliterator, postprocess
+from bench_translate import make_text
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(size, repeat):
+    translator = ArabTransliterator()
+    text = make_text(size)
+    dispatch = translator._prepare()
+    raw = translator._transliterate(text, dispatch, [])
+    main = best_of(repeat, translator._transliterate, text, dispatch, [])
+    post = best_of(repeat, postprocess, raw)
+    print(f"input: {len(text)} chars, raw output: {len(raw)} chars")
+    print(f"main pass:       {main:.4f} s")
+    print(f"post-processing: {post:.4f} s ({post / (main + post):.1%} of translate)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000, help="Taille de l'entrée en octets")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.size, args.repeat)
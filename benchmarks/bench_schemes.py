@@ -0,0 +1,58 @@
+"""Débit de chaque schéma de translittération, et coût d'un changement de
+schéma à chaque texte sur une même instance.
+
+Usage: python benchmarks/bench_schemes.py [--size 1000000] [--style full]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.scheme import available_schemes
+from arab_transliterator.transliterator import ArabTransliterator
+from corpus import STYLES, make_lines
+
+
+def timed(function):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(size, style):
+    lines = make_lines(size, style)
+    names = available_schemes()
+    translator = ArabTransliterator()
+    megabytes = sum(len(line.encode("utf-8")) + 1 for line in lines) / 1e6
+
+    print(f"{'scheme':>12} {'time (s)':>9} {'MB/s':>7}")
+    expected = {}
+    for name in names:
+        elapsed, expected[name] = timed(lambda: list(translator.translate_many(lines, scheme=name)))
+        print(f"{name:>12} {elapsed:>9.3f} {megabytes / elapsed:>7.2f}")
+
+    # un schéma différent à chaque texte, comme un serveur aux requêtes mêlées
+    def alternate():
+        return [translator.translate(line, scheme=names[i % len(names)]) for i, line in enumerate(lines)]
+
+    elapsed, results = timed(alternate)
+    assert results == [expected[names[i % len(names)]][i] for i in range(len(lines))]
+    single = sum(timed(lambda: [translator.translate(line, scheme=name) for line in lines[i::len(names)]])[0]
+                 for i, name in enumerate(names))
+    print(f"\nalternating schemes per text: {elapsed:.3f} s (same texts grouped by scheme: {single:.3f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000, help="Taille du corpus en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    args = parser.parse_args()
+    run(args.size, args.style)
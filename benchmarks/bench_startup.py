@@ -0,0 +1,105 @@
+"""Temps de démarrage de la ligne de commande.
+
+- import : temps cumulé de ``import arab_transliterator.transliterator``
+  donné par ``python -X importtime``, et les modules les plus coûteux
+- cold call : durée d'un ``python -m arab_transliterator.transliterator -t``
+  complet, et la même moins celle de ``python -c pass``
+- stdin loop : latence d'une ligne envoyée à un seul processus
+  ``--stdin-loop`` resté ouvert
+
+Chaque mesure est la médiane de `--runs` lancements. Avec `--tree`, les
+mêmes mesures sont faites sur une autre copie du dépôt (par exemple
+``git worktree add /tmp/before HEAD~1``) pour comparer avant et après.
+
+Usage: python benchmarks/bench_startup.py [--runs 20] [--tree /tmp/before]
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+
+TEXT = "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ"
+
+
+def python(tree, *args, **kwargs):
+    # sans PYTHONDONTWRITEBYTECODE, pour lire les .pyc comme un utilisateur
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    return subprocess.run([sys.executable, *args], cwd=tree, env=env, capture_output=True, text=True,
+                          check=True, **kwargs)
+
+
+def import_times(tree, runs):
+    """Médiane du temps cumulé de l'import, et temps propre médian de chaque module"""
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        log = python(tree, "-X", "importtime", "-c", "import arab_transliterator.transliterator").stderr
+        for line in log.splitlines()[1:]:
+            _, own, cumulative, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+            modules.setdefault(name, []).append(int(own))
+            if name == "arab_transliterator.transliterator":
+                totals.append(int(cumulative))
+    own = {name: statistics.median(times) for name, times in modules.items()}
+    return statistics.median(totals) / 1000, own
+
+
+def wall(tree, runs, *args):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        python(tree, *args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def loop_latency(tree, runs):
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "arab_transliterator.transliterator", "--stdin-loop"], cwd=tree, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8",
+    )
+    times = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            process.stdin.write(TEXT + "\n")
+            process.stdin.flush()
+            if not process.stdout.readline():
+                raise OSError("--stdin-loop exited")
+            times.append(time.perf_counter() - start)
+    finally:
+        process.stdin.close()
+        process.wait()
+    return statistics.median(times) * 1000
+
+
+def run(tree, runs):
+    compileall.compile_dir(str(Path(tree) / "arab_transliterator"), quiet=1)
+    total, own = import_times(tree, runs)
+    baseline = wall(tree, runs, "-c", "pass")
+    cold = wall(tree, runs, "-m", "arab_transliterator.transliterator", "-t", TEXT)
+    print(f"tree: {tree}")
+    print(f"  import arab_transliterator.transliterator: {total:6.1f} ms")
+    for name, micros in sorted(own.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {name:<40} {micros / 1000:6.2f} ms")
+    print(f"  cold call (-t): {cold:6.1f} ms, {cold - baseline:6.1f} ms over python -c pass")
+    try:
+        print(f"  --stdin-loop, per line: {loop_latency(tree, runs):6.2f} ms")
+    except (subprocess.CalledProcessError, OSError, BrokenPipeError):
+        print("  --stdin-loop: not available")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--tree", help="Autre copie du dépôt à mesurer avant celle-ci")
+    args = parser.parse_args()
+    if args.tree:
+        run(args.tree, args.runs)
+    run(str(root_dir), args.runs)
@@ -0,0 +1,82 @@
+"""Coût de chaque étape du pipeline de tokenizer.py et mémoire de pointe.
+
+Les étapes sont mesurées cumulativement (tokenize, puis + normalize_tokens,
+puis + sentences, puis le pipeline complet) sur un texte découpé en morceaux
+de 64 Kio, et comparées à translate_many sur les lignes du texte entier. La
+mémoire de pointe du pipeline complet (tracemalloc) doit rester à peu près
+constante quand la taille de l'entrée augmente.
+
+Usage: python benchmarks/bench_tokenizer.py [--size 1000000] [--style full]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.tokenizer import join, normalize_tokens, sentences, tokenize, transliterate_sentences
+from arab_transliterator.transliterator import ArabTransliterator
+from corpus import STYLES, make_text
+
+CHUNK = 1 << 16
+
+
+def chunks(text):
+    return (text[i:i + CHUNK] for i in range(0, len(text), CHUNK))
+
+
+def stages(translator):
+    return (
+        ("tokenize", lambda text: tokenize(chunks(text))),
+        ("+ normalize", lambda text: normalize_tokens(tokenize(chunks(text)))),
+        ("+ sentences", lambda text: sentences(normalize_tokens(tokenize(chunks(text))))),
+        ("+ translate/join", lambda text: join(transliterate_sentences(
+            sentences(normalize_tokens(tokenize(chunks(text)))), translator))),
+        ("translate_many", lambda text: translator.translate_many(text.split("\n"))),
+    )
+
+
+def timed(pipeline, text):
+    start = time.perf_counter()
+    deque(pipeline(text), maxlen=0)
+    return time.perf_counter() - start
+
+
+def peak(pipeline, text):
+    tracemalloc.start()
+    deque(pipeline(text), maxlen=0)
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def run(size, style):
+    translator = ArabTransliterator()
+    text = make_text(size, style)
+    expected = "\n".join(translator.translate_many(text.split("\n")))
+    pipeline = stages(translator)[3][1]
+    assert "".join(pipeline(text)) == expected
+
+    print(f"{'stage':>17} {'time (s)':>9} {'MB/s':>7}")
+    for name, stage in stages(translator):
+        elapsed = min(timed(stage, text) for _ in range(3))
+        print(f"{name:>17} {elapsed:>9.3f} {len(text.encode('utf-8')) / elapsed / 1e6:>7.2f}")
+
+    print(f"\n{'size (B)':>10} {'peak (KiB)':>11}")
+    for factor in (0.5, 1, 2):
+        part = make_text(int(size * factor), style)
+        print(f"{int(size * factor):>10} {peak(pipeline, part) / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000, help="Taille du texte en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    args = parser.parse_args()
+    run(args.size, args.style)
@@ -0,0 +1,50 @@
+"""Mesure le temps de translate() en fonction de la taille de l'entrée.
+
+Usage: python benchmarks/bench_translate.py [--max-size 10000000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.transliterator import ArabTransliterator
+
+SAMPLE = (
+    "وَلَقَدْ آتَيْنَا مُوسَى الْكِتَابَ وَقَفَّيْنَا مِن بَعْدِهِ بِالرُّسُلِ ۖ "
+    "وَآتَيْنَا عِيسَى ابْنَ مَرْيَمَ الْبَيِّنَاتِ وَأَيَّدْنَاهُ بِرُوحِ الْقُدُسِ ۗ "
+    "قَالَ اللهُ تَعَالَى: ﴿وَاللهُ يَدْعُو إِلَى دَارِ السَّلَامِ﴾ "
+)
+
+
+def make_text(size):
+    """Construit un texte d'une seule ligne d'environ `size` octets UTF-8."""
+    sample_bytes = len(SAMPLE.encode("utf-8"))
+    return SAMPLE * max(1, size // sample_bytes)
+
+
+def run(max_size):
+    translator = ArabTransliterator()
+    size = 1000
+    previous = None
+    print(f"{'size (B)':>12} {'chars':>10} {'time (s)':>10} {'us/char':>8} {'x prev':>7}")
+    while size <= max_size:
+        text = make_text(size)
+        start = time.perf_counter()
+        translator.translate(text)
+        elapsed = time.perf_counter() - start
+        ratio = f"{elapsed / previous:.1f}" if previous else "-"
+        print(f"{size:>12} {len(text):>10} {elapsed:>10.3f} {elapsed / len(text) * 1e6:>8.2f} {ratio:>7}")
+        previous = elapsed
+        size *= 10
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-size", type=int, default=10_000_000, help="Taille maximale de l'entrée en octets")
+    args = parser.parse_args()
+    run(args.max_size)
@@ -0,0 +1,44 @@
+"""Compare translate_many() à map(translate, ...) sur beaucoup de textes courts.
+
+Usage: python benchmarks/bench_translate_many.py [--count 100000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.transliterator import ArabTransliterator
+from bench_translate import SAMPLE
+
+
+def run(count, chunksize):
+    words = SAMPLE.split()
+    # textes courts de 1 à 4 mots, comme des enregistrements isolés
+    texts = [" ".join(words[i % len(words):i % len(words) + 1 + i % 4]) for i in range(count)]
+    translator = ArabTransliterator()
+
+    start = time.perf_counter()
+    expected = list(map(translator.translate, texts))
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = list(translator.translate_many(texts, chunksize=chunksize))
+    batch = time.perf_counter() - start
+
+    assert results == expected
+    print(f"{count} texts")
+    print(f"map(translate):  {single:.3f} s ({count / single:,.0f} texts/s)")
+    print(f"translate_many:  {batch:.3f} s ({count / batch:,.0f} texts/s), x{single / batch:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--chunksize", type=int, default=1024)
+    args = parser.parse_args()
+    run(args.count, args.chunksize)
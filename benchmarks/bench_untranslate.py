@@ -0,0 +1,65 @@
+"""Débit de la translittération inverse (untranslate_many) de chaque schéma,
+comparé à celui de translate_many, et aller-retour des schémas réversibles.
+
+Le texte latin est la sortie de translate_many sur le corpus ; pour un schéma
+réversible, untranslate_many doit redonner le corpus à l'identique. Pour les
+autres, la colonne "round trip" donne la part des lignes dont l'écriture
+arabe retrouvée se translittère de nouveau en le même texte latin.
+
+Usage: python benchmarks/bench_untranslate.py [--size 1000000] [--style full]
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.scheme import available_schemes, load_scheme
+from arab_transliterator.stream import transliterate_stream
+from arab_transliterator.transliterator import ArabTransliterator
+from corpus import STYLES, make_lines
+
+
+def timed(function):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(size, style):
+    lines = make_lines(size, style)
+    translator = ArabTransliterator()
+
+    print(f"{'scheme':>12} {'forward (s)':>12} {'reverse (s)':>12} {'MB/s':>7} {'round trip':>11}")
+    for name in available_schemes():
+        forward, latin = timed(lambda: list(translator.translate_many(lines, scheme=name)))
+        reverse, arabic = timed(lambda: list(translator.untranslate_many(latin, scheme=name)))
+        megabytes = sum(len(line.encode("utf-8")) + 1 for line in latin) / 1e6
+        if load_scheme(name).reversible:
+            assert arabic == lines
+            round_trip = "exact"
+        else:
+            again = translator.translate_many(arabic, scheme=name)
+            round_trip = f"{sum(map(str.__eq__, again, latin)) / len(lines):.0%}"
+        print(f"{name:>12} {forward:>12.3f} {reverse:>12.3f} {megabytes / reverse:>7.2f} {round_trip:>11}")
+
+    latin = "\n".join(translator.translate_many(lines)).encode("utf-8")
+    output = io.BytesIO()
+    elapsed, _ = timed(lambda: transliterate_stream(io.BytesIO(latin), output, translator, reverse=True))
+    print(f"\nstreaming reverse: {elapsed:.3f} s ({len(latin) / elapsed / 1e6:.2f} MB/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000, help="Taille du corpus en octets")
+    parser.add_argument("--style", choices=STYLES, default="full")
+    args = parser.parse_args()
+    run(args.size, args.style)
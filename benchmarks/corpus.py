@@ -0,0 +1,124 @@
+"""Générateur déterministe de texte arabe synthétique pour les benchmarks.
+
+Trois styles de vocalisation :
+
+- ``bare`` : consonnes seules, sans aucun diacritique
+- ``partial`` : environ une voyelle sur deux, comme dans la presse
+- ``full`` : texte entièrement vocalisé avec shadda, tanwin, article, Allah,
+  signes coraniques (marques de pause, alif suscrit, hamzat wasl) et
+  citations ﴿…﴾
+
+Le même (style, taille, graine) donne toujours le même texte.
+
+Usage: python benchmarks/corpus.py [--style full] [--size 1000] [--seed 0]
+"""
+import argparse
+from itertools import accumulate
+import random
+import sys
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator import alphabet
+
+STYLES = ("bare", "partial", "full")
+# 100 o, 1 Ko, ... 100 Mo
+SIZES = tuple(10 ** exponent for exponent in range(2, 9))
+
+CONSONANTS = [chr(c) for c in range(0x0628, 0x063B) if chr(c) != alphabet.TA_MARBUTA] + [
+    alphabet.FA, alphabet.QAF, alphabet.KAF, alphabet.LAM, alphabet.MEEM, alphabet.NOON, alphabet.HA,
+]
+VOWELS = sorted(alphabet.VOWELS)
+TANWIN = sorted(alphabet.TANWIN)
+PAUSE_MARKS = ("ۖ", "ۗ", "ۚ", "ۛ")
+_LONG = {
+    alphabet.FATHA: (alphabet.ALIF, alphabet.ALIF_KHANJAREEYA),
+    alphabet.KASRA: (alphabet.YA, alphabet.YA),
+    alphabet.DAMMA: (alphabet.WAW, alphabet.WAW),
+}
+_WORDS_PER_LINE = 12
+_VOCABULARY_SIZE = 15_000
+_DIACRITICS = frozenset(alphabet.VOWELS | alphabet.TANWIN | alphabet.QURANIC_MARKS) | {
+    alphabet.SHADDA, alphabet.SUKUN,
+}
+
+
+def _make_word(rng):
+    letters = []
+    for _ in range(rng.randint(1, 4)):
+        letters.append(rng.choice(CONSONANTS))
+        if rng.random() < 0.15:
+            letters.append(alphabet.SHADDA)
+        elif rng.random() < 0.15:
+            letters.append(alphabet.SUKUN)
+            continue
+        vowel = rng.choice(VOWELS)
+        letters.append(vowel)
+        if rng.random() < 0.25:
+            # voyelle longue (alif, alif suscrit, ya ou waw de prolongation)
+            letters.append(_LONG[vowel][rng.random() < 0.2])
+    if letters[-1] in alphabet.VOWELS and rng.random() < 0.15:
+        letters[-1] = rng.choice(TANWIN)
+    prefix = rng.choice(("", "", "", "ال", "وَ", "بِ", "ٱل"))
+    return prefix + "".join(letters)
+
+
+def make_vocabulary(rng, size=_VOCABULARY_SIZE):
+    """Mots entièrement vocalisés, les plus fréquents en premier"""
+    words = ["اللهُ", "اللهِ", "الرَّحْمَنِ", "قَالَ", "فِي", "مِنْ", "عَلَى", "إِلَى"]
+    while len(words) < size:
+        words.append(_make_word(rng))
+    return words
+
+
+def _strip(word, rng, keep):
+    return "".join(c for c in word if c not in _DIACRITICS or (keep and rng.random() < keep))
+
+
+def make_lines(size, style="full", seed=0):
+    """Lignes de texte totalisant environ `size` octets UTF-8"""
+    if style not in STYLES:
+        raise ValueError(f"unknown style: {style!r}")
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    if style != "full":
+        keep = 0.5 if style == "partial" else 0
+        vocabulary = [_strip(word, rng, keep) for word in vocabulary]
+    # loi de Zipf ; les poids cumulés évitent de les recalculer à chaque tirage
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    lines = []
+    total = 0
+    while total < size:
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=_WORDS_PER_LINE)
+        if style == "full":
+            words[rng.randrange(_WORDS_PER_LINE)] += " " + rng.choice(PAUSE_MARKS)
+            if rng.random() < 0.2:
+                words[0] = "﴿" + words[0]
+                words[-1] += "﴾"
+        line = " ".join(words) + rng.choice((".", "،", "", ""))
+        # la dernière ligne est raccourcie pour ne pas dépasser `size`
+        budget = size - total
+        while len(line.encode("utf-8")) > budget and " " in line:
+            line = line[:line.rindex(" ")]
+        lines.append(line)
+        total += len(line.encode("utf-8")) + 1
+    return lines
+
+
+def make_text(size, style="full", seed=0):
+    """Texte multiligne d'environ `size` octets UTF-8"""
+    return "\n".join(make_lines(size, style, seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--style", choices=STYLES, default="full")
+    parser.add_argument("--size", type=int, default=1000, help="Taille en octets")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.stdout.buffer.write(make_text(args.size, args.style, args.seed).encode("utf-8"))
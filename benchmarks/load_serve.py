@@ -0,0 +1,112 @@
+"""Test de charge du serveur HTTP (arab_transliterator.serve) sur localhost.
+
+Lance le serveur dans un sous-processus (sauf si --port désigne un serveur
+déjà démarré), ouvre `--connections` connexions keep-alive qui envoient
+chacune `--requests` requêtes d'un texte court, puis affiche le débit, les
+latences p50/p99 et le nombre de lots formés par le serveur.
+
+Usage: python benchmarks/load_serve.py [--connections 64] [--requests 200]
+                                       [--texts-per-request 1] [--port PORT]
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from bench_translate import SAMPLE
+
+
+async def request(reader, writer, method, path, body=b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(port, bodies, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/translate", body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port, connections, requests, texts_per_request):
+    words = SAMPLE.split()
+    bodies = []
+    for i in range(requests):
+        texts = [" ".join(words[(i + k) % len(words):(i + k) % len(words) + 3])
+                 for k in range(texts_per_request)]
+        payload = {"text": texts[0]} if texts_per_request == 1 else {"texts": texts}
+        bodies.append(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, bodies, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, health = await request(reader, writer, "GET", "/health")
+    writer.close()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{total} requests ({total * texts_per_request} texts) in {elapsed:.2f} s: "
+          f"{total / elapsed:.0f} req/s")
+    print(f"latency p50 {latencies[total // 2] * 1e3:.1f} ms, "
+          f"p99 {latencies[min(total - 1, total * 99 // 100)] * 1e3:.1f} ms, "
+          f"max {latencies[-1] * 1e3:.1f} ms")
+    print(f"errors: {len(errors)}, server: {json.loads(health)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes par connexion")
+    parser.add_argument("--texts-per-request", type=int, default=1)
+    parser.add_argument("--port", type=int, default=None, help="Port d'un serveur déjà lancé")
+    parser.add_argument("--server-args", default="", help="Options passées au serveur lancé")
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "arab_transliterator.serve", "--port", "0", *args.server_args.split()],
+            cwd=root_dir, stdout=subprocess.PIPE, text=True,
+        )
+        # "Serving on http://127.0.0.1:PORT"
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+    try:
+        asyncio.run(load(port, args.connections, args.requests, args.texts_per_request))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
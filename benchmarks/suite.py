@@ -0,0 +1,197 @@
+"""Suite de benchmarks avec comparaison à une référence enregistrée.
+
+Pour chaque style de corpus.py et chaque taille, mesure séparément :
+
+- ``normalize`` : normalize() seul
+- ``arabic_text`` : construction d'un ArabicText et parcours de ses caractères
+- ``main_pass`` : passe principale des règles (sans post-traitement)
+- ``postprocess`` : post-traitement de la sortie brute
+- ``translate`` : translate() de bout en bout
+
+Les résultats (caractères par seconde, pic mémoire et blocs alloués encore
+vivants à la fin de l'opération, mesurés avec tracemalloc) sont comparés à
+benchmarks/baseline.json. Le script se termine avec le code 1 si un débit
+baisse ou si un pic mémoire augmente de plus de `--tolerance` ; une mesure
+en régression est d'abord refaite `--retries` fois.
+
+Usage: python benchmarks/suite.py [--max-size 1000000] [--styles full ...]
+                                  [--ops translate ...] [--save] [--tolerance 0.3] [--retries 3]
+"""
+import argparse
+from functools import partial
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Assurons-nous que le paquet est dans le chemin de recherche
+root_dir = Path(__file__).parent.parent
+if str(root_dir) not in sys.path:
+    sys.path.insert(0, str(root_dir))
+
+from arab_transliterator.arab_text import ArabicText
+from arab_transliterator.transliterator import ArabTransliterator, normalize, postprocess
+from corpus import SIZES, STYLES, make_text
+
+BASELINE = Path(__file__).parent / "baseline.json"
+# Durée minimale cumulée des répétitions d'une mesure, en secondes
+MIN_DURATION = 0.2
+
+
+OPERATIONS = ("normalize", "arabic_text", "main_pass", "postprocess", "translate")
+
+
+def walk_arabic_text(text):
+    """Construit un ArabicText et lit chacun de ses caractères ; la
+    construction seule ne coûte rien (le texte n'est pas copié)"""
+    for char in ArabicText(text):
+        char.char()
+
+
+def prepare(name, translator, text):
+    """Appel sans argument qui exécute l'opération `name` sur `text`"""
+    dispatch = translator._prepare()
+    if name == "normalize":
+        return partial(normalize, text)
+    if name == "arabic_text":
+        return partial(walk_arabic_text, text)
+    if name == "main_pass":
+        return partial(translator._transliterate, text, dispatch, [])
+    if name == "postprocess":
+        return partial(postprocess, translator._transliterate(text, dispatch, []))
+    return partial(translator.translate, text)
+
+
+def time_best(func):
+    """Meilleur temps d'un appel, répété jusqu'à MIN_DURATION (au moins 3 fois).
+
+    Comme timeit, le ramasse-miettes est suspendu pendant la mesure.
+    """
+    best = None
+    total = 0.0
+    runs = 0
+    gc.collect()
+    gc.disable()
+    try:
+        while runs < 3 or total < MIN_DURATION:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            total += elapsed
+            runs += 1
+            if elapsed > MIN_DURATION:
+                break
+    finally:
+        gc.enable()
+    return best
+
+
+def measure_memory(func):
+    """Pic mémoire (octets) et nombre de blocs encore alloués après l'appel"""
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, blocks
+
+
+def measure(translator, name, text):
+    func = prepare(name, translator, text)
+    seconds = time_best(func)
+    peak, blocks = measure_memory(func)
+    return {
+        "chars": len(text),
+        "chars_per_s": len(text) / seconds,
+        "peak_bytes": peak,
+        "blocks": blocks,
+    }
+
+
+def run(sizes, styles, ops, baseline=None, tolerance=0.0, retries=0):
+    """Mesure toutes les combinaisons ; une mesure en régression par rapport
+    à `baseline` est refaite jusqu'à `retries` fois (machine bruitée) et le
+    meilleur débit est gardé."""
+    translator = ArabTransliterator()
+    results = {}
+    print(f"{'benchmark':<32} {'chars':>10} {'Mchars/s':>9} {'peak (KiB)':>11} {'blocks':>8}")
+    for style in styles:
+        for size in sizes:
+            text = make_text(size, style)
+            for name in ops:
+                key = f"{name}/{style}/{size}"
+                result = measure(translator, name, text)
+                for _ in range(retries):
+                    if not compare({key: result}, baseline or {}, tolerance):
+                        break
+                    retry = measure(translator, name, text)
+                    result["chars_per_s"] = max(result["chars_per_s"], retry["chars_per_s"])
+                results[key] = result
+                print(f"{key:<32} {len(text):>10} {result['chars_per_s'] / 1e6:>9.3f} "
+                      f"{result['peak_bytes'] / 1024:>11.1f} {result['blocks']:>8}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Liste des régressions de `results` par rapport à `baseline`"""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result["chars_per_s"] < reference["chars_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {result['chars_per_s']:.0f} chars/s "
+                f"< baseline {reference['chars_per_s']:.0f}"
+            )
+        if result["peak_bytes"] > reference["peak_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: peak memory {result['peak_bytes']} B > baseline {reference['peak_bytes']}"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-size", type=int, default=1_000_000,
+                        help="Taille maximale en octets (jusqu'à 100000000)")
+    parser.add_argument("--styles", nargs="+", choices=STYLES, default=list(STYLES))
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="Enregistre les résultats comme nouvelle référence")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Écart relatif accepté avant de signaler une régression")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Nouvelles mesures d'un résultat en régression avant de conclure")
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in SIZES if size <= args.max_size]
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+
+    if args.save:
+        baseline.update(run(sizes, args.styles, args.ops))
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    results = run(sizes, args.styles, args.ops, baseline, args.tolerance, args.retries)
+    if not baseline:
+        print(f"no baseline at {args.baseline}, run with --save first")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
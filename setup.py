@@ -8,6 +8,8 @@ setup(
     description="python script for arabic text transcription",
     url="https://github.com/Tariha/transcription",
     packages=find_packages(),
+    package_data={"arab_transliterator": ["schemes/*.json", "schemes/*.marshal"]},
     install_requires=[],
+    extras_require={"arrow": ["pyarrow"], "numpy": ["numpy"]},
     keywords=["python", "arab ", "transcription", "transliteration"],
 )
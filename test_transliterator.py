@@ -6,7 +6,10 @@ parent_dir = Path(__file__).parent
 if str(parent_dir) not in sys.path:
     sys.path.append(str(parent_dir))
 
-from arab_transliterator.transliterator import ArabTransliterator
+from arab_transliterator import alphabet
+from arab_transliterator.transliterator import ArabTransliterator, normalize
+from arab_transliterator.parallel import translate_parallel
+from arab_transliterator.stream import transliterate_stream
 
 def print_comparison(arabic_text, transliterated_text):
     """Affiche côte à côte le texte arabe et sa translittération."""
@@ -66,6 +69,666 @@ def test_transliterator():
     transliterated_text = transliterator.translate(custom_text)
     print_comparison(custom_text, transliterated_text)
 
+def test_expected_outputs():
+    """Vérifie que la sortie reste identique sur les exemples de référence."""
+    transliterator = ArabTransliterator()
+    expected = {
+        "السَّلَّامُ عَلَيْكُمْ": "as-sallāmu ʿalaykum",
+        "اللهُ": "al-lāhu",
+        "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ": "bismi l-lāhi r-raḥmani r-raḥīmi",
+        "قَالَ النَّبِيُّ مُحَمَّدٌ ﷺ": "qāla n-nabiyyu muḥammadun ﷺ",
+        "هَلْ تَعْلَمْ؟ نَعَمْ، أَعْلَمُ!": "hal taʿlam? naʿam, aʿlamu!",
+        "الصَّفْحَةُ ١٢٣ - الْفَصْلُ 456": "aṣ-ṣafḥatu ١٢٣ - l-faṣlu 456",
+        "قَالَ اللهُ تَعَالَى: ﴿وَاللهُ يَدْعُو إِلَى دَارِ السَّلَامِ﴾ [يونس: ٢٥]":
+            "qāla l-lāhu taʿāl-ā: «wa l-lāhu yadʿū ilā dāri s-salāmi» [ywns: ٢٥]",
+        "اَلْحَمْدُ لِلَّهِ رَبِّ الْعَالَمِينَ": "alḥamdu lillāhi rabbi l-ʿālamīna",
+        "وَاللهِ، بِاللَّهِ، لِلَّهِ، فَاللَّهُ": "wa l-lāhi, billāhi, lillāhi, fallāhu",
+        "عَنَّا مُحَمَّدًا الْمُخْتَارَ فِي الْقِدَمِ": "ʿannā muḥammadan il-mukhtāra fī l-qidami",
+        "الْحَمْدُ لِلَّهِ، إِنْ شَاءَ اللَّهُ، سُبْحَانَ اللَّهِ":
+            "al-ḥamdu lillāhi, in shā'a l-lāhu, subḥāna l-lāhi",
+        "اللهُمَّ صَلِّ عَلَى مُحَمَّدٍ ﷺ": "al-lāhumma ṣalli ʿalā muḥammadin ﷺ",
+    }
+    for arabic_text, transliterated_text in expected.items():
+        assert transliterator.translate(arabic_text) == transliterated_text
+
+
+def test_translate_many():
+    """translate_many doit donner les mêmes résultats que translate, dans l'ordre."""
+    transliterator = ArabTransliterator()
+    texts = ["اللهُ", "", "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "عَنَّا مُحَمَّدًا الْمُخْتَارَ"] * 3
+    expected = [transliterator.translate(text) for text in texts]
+    assert list(transliterator.translate_many(texts, chunksize=5)) == expected
+
+
+def test_translate_parallel():
+    """La version multi-processus garde l'ordre et les résultats de translate."""
+    transliterator = ArabTransliterator()
+    texts = ["اللهُ", "", "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "عَنَّا مُحَمَّدًا الْمُخْتَارَ"] * 5
+    expected = [transliterator.translate(text) for text in texts]
+    assert list(translate_parallel(texts, jobs=2, chunksize=3)) == expected
+
+
+def test_translate_sharded():
+    """Une ligne géante coupée en morceaux garde la sortie de translate."""
+    from arab_transliterator.parallel import split_text, translate_sharded
+    from arab_transliterator.rules import is_safe_split
+
+    transliterator = ArabTransliterator()
+    # tanwin, Allah et articles (lettre solaire ou non) de part et d'autre des espaces
+    line = "كِتَابٌ اللهُ عَظِيمٌ الرَّحْمَنِ قَالَ الْكِتَابَ وَاللهِ مُحَمَّدًا السَّلَامِ بَيْتًا كَبِيرًا " * 40
+    assert not is_safe_split("كِتَابٌ مُحَمَّدٌ", 8)
+    assert not is_safe_split("قَالَ اللهُ", 6)
+    assert not is_safe_split("قَالَ الْكِتَابَ", 6)
+    assert is_safe_split("قَالَ كِتَابَ", 6)
+    for size in (1, 7, 100):
+        pieces = split_text(line, size)
+        assert "".join(pieces) == line and len(pieces) > 1
+        for previous, piece in zip(pieces, pieces[1:]):
+            assert previous[-2] not in alphabet.TANWIN and piece[0] not in (alphabet.ALIF, alphabet.LAM)
+        assert " ".join(filter(None, map(transliterator.translate, pieces))) == transliterator.translate(line)
+    texts = [line, "", "اللهُ"]
+    expected = [transliterator.translate(text) for text in texts]
+    assert list(translate_sharded(texts, jobs=2, shard_size=50, chunksize=4)) == expected
+
+
+def test_word_cache():
+    """Le cache de mots sert les mots répétés sans changer la sortie."""
+    transliterator = ArabTransliterator()
+    cached = ArabTransliterator(cache_size=3)
+    texts = ["بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "عَنَّا مُحَمَّدًا الْمُخْتَارَ", "اللهُ اللهُ اللهُ اللهُ"] * 2
+    for text in texts:
+        assert cached.translate(text) == transliterator.translate(text)
+    info = cached.cache.info()
+    assert info["hits"] > 0 and info["evictions"] > 0 and info["size"] == 3
+
+
+def test_transliterate_stream():
+    """Le mode flux coupe les longues lignes sans changer la sortie."""
+    import io
+
+    transliterator = ArabTransliterator()
+    sentence = "وَقَالَ اللهُ تَعَالَى: ﴿وَاللهُ يَدْعُو إِلَى دَارِ السَّلَامِ﴾. "
+    lines = [sentence * 20, "", "عَنَّا مُحَمَّدًا الْمُخْتَارَ فِي الْقِدَمِ", sentence * 3]
+    expected = "\n".join(map(transliterator.translate, lines)) + "\n"
+    output = io.BytesIO()
+    transliterate_stream(io.BytesIO("\n".join(lines).encode("utf-8")), output, window=50)
+    assert output.getvalue().decode("utf-8") == expected
+
+    # une longue ligne sans ponctuation est coupée aux espaces sûres, en morceaux bornés
+    from arab_transliterator.stream import MAX_WINDOWS, iter_windows
+
+    line = "كِتَابٌ اللهُ عَظِيمٌ الرَّحْمَنِ قَالَ الْكِتَابَ وَاللهِ مُحَمَّدًا السَّلَامِ " * 200
+    output = io.BytesIO()
+    transliterate_stream(io.BytesIO(line.encode("utf-8")), output, window=50)
+    assert output.getvalue().decode("utf-8") == transliterator.translate(line) + "\n"
+    assert max(len(text) for text, _ in iter_windows(io.StringIO(line), 50)) < 2 * 50
+    latin = transliterator.translate(line)
+    output = io.BytesIO()
+    transliterate_stream(io.BytesIO(latin.encode("utf-8")), output, window=50, reverse=True)
+    assert output.getvalue().decode("utf-8") == transliterator.untranslate(latin) + "\n"
+    # sans aucune espace, la coupure est forcée
+    pieces = list(iter_windows(io.StringIO("بِ" * 1000), 50))
+    assert "".join(text for text, _ in pieces) == "بِ" * 1000
+    assert max(len(text) for text, _ in pieces) <= MAX_WINDOWS * 50
+
+    # avec des processus, le schéma et la ponctuation de `translator` sont gardés
+    custom = ArabTransliterator(scheme="din-31635")
+    custom.punctuation_mapping["؟"] = "¿"
+    source = "\n".join([*lines, "مَا اسْمُكَ؟"]).encode("utf-8")
+    outputs = []
+    for jobs in (1, 2):
+        output = io.BytesIO()
+        transliterate_stream(io.BytesIO(source), output, custom, window=50, jobs=jobs)
+        outputs.append(output.getvalue().decode("utf-8"))
+    assert outputs[0] == outputs[1] != expected + transliterator.translate("مَا اسْمُكَ؟") + "\n"
+    assert outputs[1].endswith("¿\n")
+
+
+def test_normalize():
+    """Formes canoniques : NFC, sans tatweel, shadda avant les voyelles."""
+    assert normalize("\u0627\u0653") == "\u0622"
+    assert normalize("كـتـب") == "كتب"
+    # kasra + shadda et tanwin + shadda sont remis dans l'ordre attendu
+    assert normalize("\u0628\u0650\u0651") == "\u0628\u0651\u0650"
+    assert normalize("\u0628\u064b\u0651") == "\u0628\u0651\u064b"
+    # lam avec shadda sans voyelle
+    assert normalize("\u0627\u0644\u0651\u0647") == "\u0627\u0644\u0651\u064e\u0647"
+    # mais pas devant un tanwin, dans un ordre comme dans l'autre (kullun, pas kullaun)
+    assert normalize("\u0643\u0644\u0651\u064c") == "\u0643\u0644\u0651\u064c"
+    assert normalize("\u0643\u0644\u064c\u0651") == "\u0643\u0644\u0651\u064c"
+    assert ArabTransliterator().translate("\u0643\u064f\u0644\u0651\u064c") == "kullun"
+
+
+def test_char_classes():
+    """La table des classes est cohérente avec les ensembles de alphabet."""
+    assert alphabet.char_class(alphabet.SHEEN) == alphabet.CONSONANT | alphabet.SUN_LETTER
+    assert alphabet.char_class(alphabet.BA) == alphabet.CONSONANT
+    for vowel in alphabet.VOWELS:
+        assert alphabet.char_class(vowel) == alphabet.SHORT_VOWEL
+    assert alphabet.char_class("٣") == alphabet.DIGIT
+    assert alphabet.char_class("﷽") == alphabet.char_class("،") == alphabet.PUNCTUATION_MARK
+    assert alphabet.char_class("x") == alphabet.char_class(alphabet.TATWEEL) == 0
+    for char in (alphabet.ALIF, alphabet.ALIF_MAKSURA, alphabet.TA_MARBUTA):
+        assert not alphabet.char_class(char) & alphabet.CONSONANT
+    assert alphabet.char_class(alphabet.ALIF_WITH_HAMZA_ABOVE) == alphabet.CONSONANT | alphabet.HAMZA_CARRIER
+
+
+def test_fast_path():
+    """Les portions traduites par str.translate donnent la sortie des règles."""
+    import random
+
+    from arab_transliterator.rules import apply_rules
+    from arab_transliterator.transliterator import postprocess
+
+    transliterator = ArabTransliterator()
+    dispatch = transliterator._prepare()
+
+    def expected(text):
+        text = normalize(text)
+        out = []
+        apply_rules(transliterator, text, 0, len(text), dispatch, out, False)
+        return postprocess("".join(out))
+
+    texts = ["كتب محمد", "مدرسة كبيرة، جديدة.", "كَتَبَ", "سلام", "مكتبة الجامعة",
+             "فَلْلَه", "عُلِمَ", "قُولُوا", "مصطفى", "ثُمَّ", "abc ٣", "قَالَ الشَّمْسُ وَالْقَمَرُ",
+             "كِتَابٌ السَّلَامِ", "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "ٱلْحَمْدُ لِلَّهِ رَبِّ ٱلْعَٰلَمِينَ"]
+    rng = random.Random(0)
+    alphabet_sample = "بتسشكمنهوي ًٌٍَُِّْللااىءأإآةٱ.،ـ\nلله"
+    texts += ["".join(rng.choice(alphabet_sample) for _ in range(rng.randrange(1, 20)))
+              for _ in range(3000)]
+    for text in texts:
+        assert transliterator.translate(text) == expected(text), text
+    pattern = transliterator._simple[0]
+    assert pattern.fullmatch(normalize("كتب محمد"))
+    assert pattern.fullmatch(normalize("مكتبة الجامعة"))
+    assert not pattern.fullmatch(normalize("الجامعة"))
+
+
+def test_incremental():
+    """Les modifications d'un document donnent la sortie d'une translittération complète."""
+    from arab_transliterator.incremental import IncrementalTransliterator
+
+    transliterator = ArabTransliterator()
+    sentence = "وَقَالَ اللهُ تَعَالَى: ﴿وَاللهُ يَدْعُو إِلَى دَارِ السَّلَامِ﴾. "
+    text = sentence * 20 + "\nعَنَّا مُحَمَّدًا الْمُخْتَارَ"
+    document = IncrementalTransliterator(text, transliterator)
+    output = document.output
+    edits = [(0, 0, "بِ"), (70, 75, ""), (len(sentence) * 2, len(sentence) * 2, "اللهُ. "),
+             (10, 10, "\n"), (len(sentence) * 20, len(sentence) * 20 + 2, "")]
+    for start, end, replacement in edits:
+        text = text[:start] + replacement + text[end:]
+        output_start, output_end, new = document.replace(start, end, replacement)
+        output = output[:output_start] + new + output[output_end:]
+        expected = "\n".join(map(transliterator.translate, text.split("\n")))
+        assert document.text == text
+        assert document.output == output == expected
+        assert document.last_recomputed < len(text) // 4
+
+    # sans ponctuation, une frappe ne retranslittère que quelques mots
+    line = "كِتَابٌ اللهُ عَظِيمٌ الرَّحْمَنِ قَالَ الْكِتَابَ وَاللهِ مُحَمَّدًا السَّلَامِ " * 100
+    document = IncrementalTransliterator(line, transliterator)
+    position = len(line) // 2
+    document.insert(position, "بِ")
+    line = line[:position] + "بِ" + line[position:]
+    assert document.output == transliterator.translate(line) and document.last_recomputed < 100
+    start, end = document.to_output(position)
+    assert 0 < end - start < 40 and document.to_source(start)[0] <= position
+
+
+def test_alignment():
+    """L'alignement relie chaque mot de la sortie au mot source qui l'a produit."""
+    transliterator = ArabTransliterator()
+    text = "بِسْمِ  اللهِ الرَّحْمَـنِ الرَّحِيمِ، قَالَ اللهُ"
+    # un texte long passe par apply_spans, avec un caractère inconnu (une espace) dans un bloc
+    long_text = " ".join([text, "كِتَابٌ عَظِيمٌ فِي الْقِدَمِ", "وَقَالَ مُوسَى ۖ هُدًى", text])
+    assert transliterator._path(normalize(long_text)) == "spans"
+    for sample in (text, long_text):
+        result, alignment = transliterator.translate(sample, return_alignment=True)
+        assert result == transliterator.translate(sample)
+        assert len(alignment) == len(result)
+        source_words = [word for word in sample.split() if word != "ۖ"]
+        output_words = result.split()
+        assert len(source_words) == len(output_words)
+        source_start = 0
+        output_start = 0
+        for source_word, output_word in zip(source_words, output_words):
+            source_start = sample.index(source_word, source_start)
+            output_start = result.index(output_word, output_start)
+            span = (source_start, source_start + len(source_word))
+            assert alignment.output_span(*span) == (output_start, output_start + len(output_word))
+            start, end = alignment.source_span(output_start, output_start + len(output_word))
+            assert span[0] <= start < end <= span[1]
+            source_start += len(source_word)
+            output_start += len(output_word)
+
+    # index inverse : caractères réordonnés et caractère muet
+    from arab_transliterator.alignment import Alignment
+
+    alignment = Alignment([0, 3, 1, 1, 3], 4)
+    assert alignment.output_span(1, 2) == (2, 4)
+    assert alignment.output_span(2, 3) == (1, 1)
+    assert alignment.output_span(1, 4) == (1, 5)
+
+
+def test_serve():
+    """Le serveur HTTP répond aux requêtes simples, par lot et NDJSON."""
+    import asyncio
+    import http.client
+    import json
+    import queue
+    import socket
+    import threading
+    from concurrent.futures import ProcessPoolExecutor
+
+    from arab_transliterator.parallel import _init_worker
+    from arab_transliterator.serve import MicroBatcher, _route, serve
+
+    transliterator = ArabTransliterator()
+    texts = ["اللهُ", "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", ""]
+    expected = [transliterator.translate(text) for text in texts]
+
+    ports = queue.Queue()
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(serve(port=0, jobs=1, max_pending=3, ready=ports.put))
+
+    def run_server():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run_server)
+    thread.start()
+    try:
+        port = ports.get(timeout=30)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+        def post(body, content_type="application/json", path="/translate"):
+            connection.request("POST", path, body.encode("utf-8"), {"Content-Type": content_type})
+            response = connection.getresponse()
+            return response.status, response.read().decode("utf-8")
+
+        status, body = post(json.dumps({"text": texts[0]}))
+        assert status == 200 and json.loads(body) == {"result": expected[0]}
+        status, body = post(json.dumps({"texts": texts}))
+        assert status == 200 and json.loads(body) == {"results": expected}
+        status, body = post("\n".join(json.dumps(text) for text in texts), "application/x-ndjson")
+        assert [json.loads(line)["result"] for line in body.splitlines()] == expected
+        status, body = post("{")
+        assert status == 400
+        status, body = post(json.dumps({"texts": texts, "scheme": "din-31635"}))
+        assert json.loads(body)["results"] == [transliterator.translate(text, scheme="din-31635") for text in texts]
+        status, body = post(json.dumps(texts[0]), path="/translate?scheme=buckwalter")
+        assert json.loads(body) == {"result": transliterator.translate(texts[0], scheme="buckwalter")}
+        status, body = post(json.dumps({"text": texts[0], "scheme": "schemes/ala-lc.json"}))
+        assert status == 400
+        # plus de textes que max_pending : jamais servie, même par un serveur inactif
+        status, body = post(json.dumps(texts * 2))
+        assert status == 413
+        connection.close()
+        # Content-Length illisible ou négatif : 400, pas une connexion coupée
+        for length in (b"abc", b"-5"):
+            with socket.create_connection(("127.0.0.1", port), timeout=30) as raw:
+                raw.sendall(b"POST /translate HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+                assert raw.makefile("rb").readline().startswith(b"HTTP/1.1 400 ")
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+        loop.close()
+
+    class BrokenBatcher:
+        async def translate(self, texts, scheme=None):
+            raise RuntimeError("worker died")
+
+    status, _, body = asyncio.run(_route(BrokenBatcher(), "POST", "/translate", {}, b'{"text": "x"}'))
+    assert status == 500 and "worker died" in json.loads(body)["error"]
+
+    # un processus de travail tué : le pool est reconstruit et le lot réessayé
+    def new_executor():
+        return ProcessPoolExecutor(max_workers=1, initializer=_init_worker)
+
+    async def kill_worker():
+        batcher = MicroBatcher(new_executor(), max_wait=0, executor_factory=new_executor)
+        batcher.start()
+        try:
+            assert await batcher.translate(texts) == expected
+            broken = batcher.executor
+            for process in list(broken._processes.values()):
+                process.kill()
+                process.join()
+            assert await batcher.translate(texts) == expected
+            assert batcher.executor is not broken
+            assert await batcher.translate(texts) == expected
+        finally:
+            await batcher.stop()
+            batcher.executor.shutdown()
+
+    asyncio.run(kill_worker())
+
+
+def test_tokenizer():
+    """Le pipeline de tokenizer.py donne la sortie de translate sur chaque ligne."""
+    from arab_transliterator.tokenizer import join, normalize_tokens, sentences, tokenize, transliterate_sentences
+
+    transliterator = ArabTransliterator()
+    sentence = "وَقَالَ اللهُ تَعَالَى: ﴿وَاللهُ يَدْعُو إِلَى دَارِ السَّلَامِ﴾. "
+    text = sentence * 5 + "\n\n" + "عَنَّا  مُحَمَّدًا الْمُخْتَارَ. كِتَابٌ اللهُ\n" + sentence
+    expected = "\n".join(map(transliterator.translate, text.split("\n")))
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    tokens = list(normalize_tokens(tokenize(chunks)))
+    assert " ".join(token.text for token in tokens[:8]) == normalize(sentence)[:-1]
+    # coupé après chaque point, sauf devant l'alif de "اللهُ"
+    assert [len(words) for words in sentences(tokens)] == [8, 8, 8, 8, 9, 1, 4, 2, 9]
+    assert "".join(join(transliterate_sentences(sentences(tokens), transliterator))) == expected
+
+    words = {token.text: token for token in tokenize(["كِتَابٌ اللهُ. ٱبْنُ"])}
+    assert words["اللهُ."].after_tanwin and not words["اللهُ."].sentence_start
+    assert words["ٱبْنُ"].sentence_start and words["ٱبْنُ"].wasl
+
+def test_schemes():
+    """Les schémas se choisissent par appel et donnent la sortie d'une instance dédiée."""
+    from arab_transliterator.scheme import available_schemes, compile_scheme, load_scheme
+
+    text = "قَالَ مُؤْمِنٌ: الشَّمْسُ خَيْرٌ. اللهُ أَكْبَرُ"
+    assert {"ala-lc", "din-31635", "iso-233", "buckwalter", "wolofal"} <= set(available_schemes())
+    assert load_scheme("din-31635") is load_scheme("din-31635")
+    shared = ArabTransliterator(cache_size=16)
+    for name in available_schemes():
+        expected = ArabTransliterator(scheme=name).translate(text)
+        assert shared.translate(text, scheme=name) == expected
+        assert list(shared.translate_many([text, ""], scheme=name)) == [expected, ""]
+        result, alignment = shared.translate(text, return_alignment=True, scheme=name)
+        assert result == expected and len(alignment) == len(result)
+    assert shared.translate(text) == ArabTransliterator().translate(text)
+
+    assert shared.translate("شَيْءٌ خَيْرٌ", scheme="din-31635") == "šayʾun ḫayrun"
+    assert shared.translate("الشَّمْسُ", scheme="din-31635") == "aš-šamsu"
+    assert shared.translate("قَالَ", scheme="wolofal") == "qaala"
+    buckwalter = load_scheme("buckwalter")
+    assert shared.translate(text, scheme="buckwalter") == text.translate(buckwalter.table)
+    reverse = {value: key for key, value in buckwalter.letters.items()}
+    assert "".join(reverse.get(char, char) for char in shared.translate(text, scheme="buckwalter")) == text
+    assert shared.translate("مُحَمَّدٌ", scheme="iso-233") == "muḥammadú"
+
+    for data in ({"name": "x", "engine": "sql"}, {"name": "x", "letters": {"ab": "c"}},
+                 {"name": "x", "engine": "table", "reversible": True, "letters": {"a": "b", "c": "b"}}):
+        try:
+            compile_scheme(data)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(data)
+
+
+def test_untranslate():
+    """untranslate décode les digrammes et voyelles longues, et fait l'aller-retour des schémas réversibles."""
+    import io
+
+    translator = ArabTransliterator()
+    assert translator.untranslate("shaykhun thābitun") == "شَيخٌ ثَابِتٌ"
+    assert translator.untranslate("bismi l-lāhi r-raḥmāni r-raḥīmi") == "بِسمِ اللهِ الرَّحمَانِ الرَّحِيمِ"
+    assert translator.untranslate("wa l-madrasatu, ghadan?") == "وَالمَدرَسَةُ، غَدًا؟"
+    assert translator.untranslate("šayʾun ḫayrun", scheme="din-31635") == "شَيءٌ خَيرٌ"
+    assert translator.untranslate("muḥammadú", scheme="iso-233") == "مُحَمَّدٌ"
+    # une seule consonne avant la finale : une particule, pas un tanwin
+    assert translator.untranslate("min") == "مِن"
+    assert translator.untranslate("ʿan") == "عَن"
+    assert translator.untranslate("lan") == "لَن"
+    assert translator.untranslate("shay'un min ʿan yadun") == "شَيءٌ مِن عَن يَدٌ"
+    for text in ("شَيخٌ ثَابِتٌ", "جَاءَ المُعَلِّمُ"):
+        assert translator.untranslate(translator.translate(text)) == text
+
+    text = "قَالَ مُؤْمِنٌ: الشَّمْسُ خَيْرٌ. اللهُ أَكْبَرُ"
+    latin = translator.translate(text, scheme="buckwalter")
+    assert translator.untranslate(latin, scheme="buckwalter") == text
+    assert list(translator.untranslate_many([latin, ""], scheme="buckwalter")) == [text, ""]
+
+    lines = ["shaykhun thābitun. qāla", "", "al-kitābu"]
+    output = io.BytesIO()
+    transliterate_stream(io.BytesIO("\n".join(lines).encode("utf-8")), output, reverse=True)
+    assert output.getvalue().decode("utf-8") == "\n".join(translator.untranslate_many(lines)) + "\n"
+
+
+
+def test_profiler():
+    """Le profileur compte les branches des règles sans changer la sortie de translate."""
+    from arab_transliterator.profiling import PHASES, Profiler
+
+    translator = ArabTransliterator()
+    profiler = Profiler()
+    texts = ["بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "", "قَالَ النَّبِيُّ مُحَمَّدٌ ﷺ"]
+    assert profiler.translate_many(translator, texts) == list(translator.translate_many(texts))
+    assert profiler.translate(translator, texts[0], scheme="buckwalter") == translator.translate(
+        texts[0], scheme="buckwalter")
+    info = profiler.info()
+    assert info["texts"] == 4 and set(info["seconds"]) == set(PHASES)
+    assert info["hits"]["allah"] == 1 and info["hits"]["lam_sun"] == 3 and info["hits"]["path.table"] == 1
+    assert 'rule_hits_total{branch="shadda"}' in profiler.prometheus()
+    profiler.reset()
+    assert not profiler.hits and profiler.texts == 0
+
+    # un texte long passe par apply_spans, ses branches sont comptées quand même
+    verse = "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ قَالَ النَّبِيُّ مُحَمَّدٌ ﷺ وَالسَّلَامُ عَلَيْكُمْ"
+    assert profiler.translate(translator, verse) == translator.translate(verse)
+    assert profiler.hits["path.spans"] == 1 and profiler.hits["lam_sun"] == 4
+    vectorized = ArabTransliterator(vectorize=True)
+    profiler.translate(vectorized, verse * 80)
+    assert profiler.hits["path.vectorize"] == 1 and profiler.hits["lam_sun"] == 4 + 4 * 80
+
+
+
+def test_command_line_loop(tmp_path):
+    """--stdin-loop répond ligne par ligne ; le cache marshal redonne les schémas compilés."""
+    import json
+    import marshal
+    import subprocess
+    from arab_transliterator.scheme import (
+        SCHEMES_DIR, Scheme, _from_fields, available_schemes, build_cache, compile_scheme,
+    )
+
+    translator = ArabTransliterator()
+    texts = ["بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "", "قَالَ"]
+    process = subprocess.run(
+        [sys.executable, "-m", "arab_transliterator.transliterator", "--stdin-loop"],
+        input="\n".join(texts) + "\n", capture_output=True, text=True, encoding="utf-8", cwd=parent_dir, check=True,
+    )
+    assert process.stdout == "".join(translator.translate(text) + "\n" for text in texts)
+    process = subprocess.run(
+        [sys.executable, "-m", "arab_transliterator.transliterator", "-t", texts[0]],
+        capture_output=True, text=True, encoding="utf-8", cwd=parent_dir, check=True,
+    )
+    assert process.stdout == translator.translate(texts[0]) + "\n"
+
+    build_cache(tmp_path / "schemes.marshal")
+    data = marshal.loads((tmp_path / "schemes.marshal").read_bytes())["schemes"]
+    for name in available_schemes():
+        with open(Path(SCHEMES_DIR) / f"{name}.json", encoding="utf-8") as file:
+            compiled = compile_scheme(json.load(file))
+        # relu sans compiler, le schéma a les attributs de compile_scheme
+        prebuilt = _from_fields(data[name])
+        assert all(getattr(prebuilt, slot) == getattr(compiled, slot) for slot in Scheme.__slots__)
+
+
+
+def test_dataset(tmp_path):
+    """La colonne translittérée d'une table CSV (et Parquet avec pyarrow) suit translate, ligne par ligne."""
+    import csv
+    import pytest
+    from arab_transliterator.dataset import transliterate_batches, transliterate_csv, transliterate_parquet
+
+    translator = ArabTransliterator()
+    texts = ["بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "", "قَالَ النَّبِيُّ مُحَمَّدٌ ﷺ", "اللهُ"] * 5
+    with open(tmp_path / "in.csv", "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows([["id", "text"], *([i, text] for i, text in enumerate(texts))])
+    expected = [[str(i), text, translator.translate(text)] for i, text in enumerate(texts)]
+    for jobs in (1, 2):
+        report = transliterate_csv(tmp_path / "in.csv", tmp_path / "out.csv", "text", jobs=jobs, batch_size=3)
+        with open(tmp_path / "out.csv", newline="", encoding="utf-8") as file:
+            assert list(csv.reader(file)) == [["id", "text", "text_latin"], *expected]
+        assert report["rows"] == len(texts)
+    # une colonne de sortie déjà présente est réécrite, même sur une ligne courte
+    with open(tmp_path / "in.csv", "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows([["text", "id", "latin"], [texts[0], "0", "ancien"], [texts[2]], []])
+    transliterate_csv(tmp_path / "in.csv", tmp_path / "out.csv", "text", output_column="latin")
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as file:
+        assert list(csv.reader(file)) == [
+            ["text", "id", "latin"], [texts[0], "0", expected[0][2]], [texts[2], "", expected[2][2]], ["", "", ""],
+        ]
+
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    pq.write_table(pa.table({"id": list(range(len(texts))), "text": [*texts[:-1], None]}),
+                   tmp_path / "in.parquet", row_group_size=6)
+    for jobs in (1, 2):
+        transliterate_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "text", jobs=jobs, batch_size=4)
+        result = pq.read_table(tmp_path / "out.parquet")
+        assert result.column("text_latin").to_pylist() == [row[2] for row in expected[:-1]] + [None]
+    # une colonne de sortie déjà présente, ici entière, est remplacée par le texte
+    pq.write_table(pa.table({"text": texts, "latin": list(range(len(texts)))}), tmp_path / "in.parquet",
+                   row_group_size=6)
+    for jobs in (1, 2):
+        transliterate_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "text", output_column="latin",
+                              jobs=jobs)
+        result = pq.read_table(tmp_path / "out.parquet")
+        assert result.schema.field("latin").type == pa.string()
+        assert result.column("latin").to_pylist() == [row[2] for row in expected]
+    # une colonne absente est une erreur, pas la dernière colonne du lot
+    with pytest.raises(ValueError, match="no column 'texte'"):
+        transliterate_parquet(tmp_path / "in.parquet", tmp_path / "out.parquet", "texte")
+    with pytest.raises(ValueError, match="no column 'texte'"):
+        next(transliterate_batches(pq.ParquetFile(tmp_path / "in.parquet").iter_batches(), "texte"))
+
+
+def test_disk_cache(tmp_path, monkeypatch):
+    """Le cache persistant rend les résultats de translate, entre instances et processus ; chaque version des règles garde ses entrées jusqu'à prune."""
+    import json
+    import sqlite3
+    import subprocess
+    from arab_transliterator import disk_cache
+    from arab_transliterator.disk_cache import DiskCache
+    from arab_transliterator.parallel import translate_parallel
+
+    texts = ["بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "", "قَالَ النَّبِيُّ مُحَمَّدٌ ﷺ", "اللهُ"] * 3
+    path = tmp_path / "cache.db"
+    for scheme in ("ala-lc", "buckwalter"):
+        expected = list(ArabTransliterator(scheme=scheme).translate_many(texts))
+        translator = ArabTransliterator(scheme=scheme, disk_cache=path)
+        assert list(translator.translate_many(texts, chunksize=5)) == expected
+        assert translator.disk_cache.info()["writes"] == 4
+        again = ArabTransliterator(scheme=scheme, disk_cache=DiskCache(path))
+        assert [again.translate(text) for text in texts if text] == [result for result in expected if result]
+        assert again.disk_cache.info()["misses"] == 0
+        assert list(translate_parallel(texts, jobs=2, chunksize=3, scheme=scheme, disk_cache=path)) == expected
+
+    # une autre version des règles sur le même fichier n'efface rien et ne lit
+    # pas les entrées de la version courante
+    size = len(DiskCache(path))
+    monkeypatch.setattr(disk_cache, "rules_version", lambda: "0" * 32)
+    other = ArabTransliterator(disk_cache=path)
+    assert list(other.translate_many(texts)) == list(ArabTransliterator().translate_many(texts))
+    assert other.disk_cache.info()["hits"] == 0 and len(other.disk_cache) == size + 4
+    monkeypatch.undo()
+    again = ArabTransliterator(disk_cache=path)
+    assert list(again.translate_many(texts)) == list(ArabTransliterator().translate_many(texts))
+    assert again.disk_cache.info()["misses"] == 0 and len(again.disk_cache) == size + 4
+    # prune retire les entrées de l'autre version (aussi en ligne de commande)
+    assert again.disk_cache.prune() == 4 and len(again.disk_cache) == size
+    process = subprocess.run(
+        [sys.executable, "-m", "arab_transliterator.transliterator", "--disk-cache", str(path), "--disk-cache-prune"],
+        capture_output=True, text=True, cwd=parent_dir, check=True,
+    )
+    assert process.stdout == f"removed: 0\nsize: {size}\n"
+
+    # un fichier d'avant les versions : ses entrées n'ont pas de version
+    legacy = tmp_path / "legacy.db"
+    with sqlite3.connect(legacy) as connection:
+        connection.execute("CREATE TABLE translations (key BLOB PRIMARY KEY, result TEXT NOT NULL) WITHOUT ROWID")
+        connection.execute("INSERT INTO translations VALUES (?, ?)", (bytes(16), "ancien"))
+    translator = ArabTransliterator(disk_cache=legacy)
+    assert translator.translate(texts[0]) == ArabTransliterator().translate(texts[0])
+    assert len(translator.disk_cache) == 2 and translator.disk_cache.prune() == 1
+
+    # masks et le contenu des schémas font partie de la clé
+    assert "masks" in disk_cache._RULES_MODULES
+    keys = []
+    for letter in ("q", "ḳ"):
+        # le même schéma avant et après une modification de son fichier
+        scheme_file = tmp_path / f"custom-{letter}.json"
+        scheme_file.write_text(json.dumps({"name": "custom", "letters": {"ق": letter}}), encoding="utf-8")
+        keys.append(DiskCache(tmp_path / "keys.db").keys(ArabTransliterator(scheme=str(scheme_file)), texts[:1]))
+    assert keys[0] != keys[1]
+
+
+def test_indexed(tmp_path):
+    """get_line lit une ligne par l'index ; write_translated écrit la translittération ligne à ligne, avec son index."""
+    import os
+    from arab_transliterator.indexed import IndexedCorpus, index_path, write_translated
+
+    translator = ArabTransliterator()
+    lines = ["بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ", "", "قَالَ النَّبِيُّ مُحَمَّدٌ ﷺ", "اللهُ", ""]
+    source = tmp_path / "in.txt"
+    source.write_text("\n".join(lines), encoding="utf-8")
+    with IndexedCorpus(source) as corpus:
+        assert len(corpus) == len(lines) and os.path.exists(index_path(source))
+        assert [corpus.get_line(i) for i in (3, 0, -1)] == [lines[3], lines[0], lines[-1]]
+        assert list(corpus.translate(2, 4, translator)) == [translator.translate(line) for line in lines[2:4]]
+
+    assert write_translated(source, tmp_path / "out.txt") == len(lines)
+    expected = [translator.translate(line) for line in lines]
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "\n".join(expected)
+    with IndexedCorpus(tmp_path / "out.txt") as output:
+        assert list(output.lines()) == expected and output.get_line(2) == expected[2]
+
+    # un index périmé est reconstruit
+    source.write_text("اللهُ\n" * 2, encoding="utf-8")
+    os.utime(source, ns=(0, 0))
+    with IndexedCorpus(source) as corpus:
+        assert list(corpus.lines()) == ["اللهُ", "اللهُ", ""]
+
+    # un index tronqué ou aux positions fausses, avec un en-tête valide, aussi
+    index = index_path(source)
+    with open(index, "rb") as file:
+        good = file.read()
+    for damaged in (good[:-3], good[:-8], good[:-16] + bytes(16)):
+        with open(index, "wb") as file:
+            file.write(damaged)
+        with IndexedCorpus(source) as corpus:
+            assert list(corpus.lines()) == ["اللهُ", "اللهُ", ""]
+        with open(index, "rb") as file:
+            assert file.read() == good
+
+
+def test_masks():
+    """Les masques de classify valent les prédicats de ArabicTextChar ; vectorize ne change pas la sortie."""
+    from arab_transliterator import masks
+    from arab_transliterator.arab_text import ArabicText
+    from arab_transliterator.scheme import available_schemes
+
+    text = "بِسْمِ اللهِ الرَّحْمَنِ الرَّحِيمِ قَالَ النَّبِيُّ مُحَمَّدٌ. هُوَ الشَّمْسُ عَلَى الْقَمَرِ"
+    chars = list(ArabicText(text))
+    backends = [False] + ([True] if masks.numpy is not None else [])
+    for use_numpy in backends:
+        classified = masks.classify(text, use_numpy)
+        for name, predicate in masks.FLAGS.items():
+            assert [bool(flag) for flag in classified[name]] == [bool(getattr(c, predicate)()) for c in chars], name
+    assert list(ArabicText(text).masks()["sun"]) == list(masks.classify(text)["sun"])
+
+    long_text = (text + "\n") * 80
+    for name in available_schemes():
+        plain = ArabTransliterator(scheme=name)
+        assert ArabTransliterator(scheme=name, vectorize=True).translate(long_text) == plain.translate(long_text)
+
+    # les ensembles sont partagés par contenu : deux ponctuations (deux tables de
+    # dispatch) aux mêmes déclencheurs n'en font qu'une entrée
+    masks._sets_for.cache_clear()
+    for k in range(40):
+        vectorized = ArabTransliterator(vectorize=True)
+        vectorized.punctuation.append(chr(0x2460 + k % 2))
+        vectorized.translate(long_text)
+    info = masks._sets_for.cache_info()
+    assert info.currsize == 1 and info.hits == 39
+
+
 if __name__ == "__main__":
     print("Démarrage des tests du translittérateur arabe...")
     test_transliterator()